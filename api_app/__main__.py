@@ -1,11 +1,181 @@
-from .utils import TokenManager, APIManager
+import argparse
+import calendar
+import json
+import time
+from typing import Any, Dict, List, Optional
 
-def main():
-    token_manager = TokenManager().get_token()
-    access_token = token_manager["access_token"]
+# Keys accepted in the ``--config`` file: the sync scope and the ``APIManager`` options
+CONFIG_KEYS = (
+    'sections', 'athletes', 'parallel_athletes', 'since', 'full_sync', 'lookback_days', 'storage_backend', 'use_local_store',
+    'detect_changes', 'http_cache', 'write_behind', 'pretty_json', 'export_format', 'metrics_file', 'metrics_port', 'trace_file',
+    'profile_file', 'slow_callback_ms', 'base_url', 'limit_per_host', 'dns_cache_ttl', 'concurrency', 'athlete_zones'
+)
 
-    client = APIManager(access_token)
-    client.process_activities()
+def parse_since(value: str) -> int:
+    """
+    Parse a ``--since`` value into an epoch timestamp.
+
+    :param value: A date (YYYY-MM-DD), a UTC date-time (YYYY-MM-DDTHH:MM:SS) or an epoch timestamp.
+    :return: The epoch timestamp.
+    :raises argparse.ArgumentTypeError: If the value cannot be parsed.
+    """
+    if value.isdigit():
+        return int(value)
+    for date_format in ('%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%SZ'):
+        try:
+            return calendar.timegm(time.strptime(value, date_format))
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Invalid date: {value}. Use YYYY-MM-DD, YYYY-MM-DDTHH:MM:SS or an epoch timestamp")
+
+def parse_sections(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [section.strip() for section in value.split(',') if section.strip()]
+    return list(value)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m api_app', description="Download Strava data. Without a command, the sections are chosen in interactive popups.")
+    subparsers = parser.add_subparsers(dest='command')
+    sync = subparsers.add_parser('sync', help="Download the given sections without any user interaction")
+    sync.add_argument('--sections', help="Comma-separated sections: athlete, activities, laps, zones, comments, kudos, streams, routes, clubs, club_members, club_activities")
+    sync.add_argument('--since', type=parse_since, help="List activities from this date (YYYY-MM-DD) instead of the last synced activity")
+    sync.add_argument('--config', help=f"JSON file with any of: {', '.join(CONFIG_KEYS)}")
+    sync.add_argument('--full', action='store_true', default=None, help="Ignore the sync state and list the full activity history")
+    sync.add_argument('--lookback-days', type=float, help="Days before the last synced activity to list again")
+    sync.add_argument('--storage', choices=['json', 'shards'], help="Storage backend of the raw API responses")
+    sync.add_argument('--athletes', help="Sync the athletes added with add-athlete concurrently: 'all' or comma-separated athlete IDs")
+    sync.add_argument('--parallel-athletes', type=int, help="Maximum number of athletes synced at the same time (default 4)")
+    sync.add_argument('--no-local-store', action='store_true', default=None, help="Do not write fetched data to the SQLite store")
+    sync.add_argument('--metrics-file', help="Write Prometheus metrics to this text file after every run")
+    sync.add_argument('--metrics-port', type=int, help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics while syncing")
+    sync.add_argument('--trace', help="Write a Chrome trace of the requests, rate-limit waits, decoding and saves to this JSON file")
+    sync.add_argument('--profile', help="Profile the sync with cProfile and dump the statistics to this file")
+    sync.add_argument('--slow-callback-ms', type=float, help="Report the callbacks blocking the event loop longer than this many milliseconds")
+    sync.add_argument('--base-url', help="API base URL, e.g. of the local fake server (default https://www.strava.com/api/v3)")
+    sync.add_argument('--pretty', action='store_true', default=None, help="Indent the saved JSON files")
+    sync.add_argument('--export', choices=['parquet', 'arrow'], help="Export activities, laps and segment efforts to partitioned columnar files after the sync")
+    sync.add_argument('--no-http-cache', action='store_true', default=None, help="Always request athlete, stats, clubs and routes instead of using cached responses")
+    sync.add_argument('--no-change-detection', action='store_true', default=None, help="Do not fetch again the saved activity data whose listed summary changed")
+    subparsers.add_parser('add-athlete', help="Authorize an athlete in the browser and add their tokens to athlete_tokens.json")
+    return parser
+
+def load_sync_config(args: argparse.Namespace, parser: argparse.ArgumentParser) -> Dict[str, Any]:
+    """
+    Merge the ``--config`` file with the command-line flags, flags taking precedence.
+
+    An unreadable config file, unknown keys and missing or unknown sections are reported
+    through ``parser.error``, which exits.
+
+    :param args: The parsed arguments of the sync command.
+    :param parser: The parser reporting the invalid config file.
+    :return: The sync configuration.
+    """
+    config: Dict[str, Any] = {}
+    if args.config:
+        try:
+            with open(args.config, "r") as file:
+                config = json.load(file)
+        except (OSError, ValueError) as e:
+            parser.error(f"Cannot read --config {args.config}: {str(e)}")
+        if not isinstance(config, dict):
+            parser.error(f"--config {args.config} must contain a JSON object")
+        unknown = sorted(set(config) - set(CONFIG_KEYS))
+        if unknown:
+            parser.error(f"Unknown keys in --config {args.config}: {', '.join(unknown)}. Supported keys are: {', '.join(CONFIG_KEYS)}")
+    if isinstance(config.get('since'), str):
+        try:
+            config['since'] = parse_since(config['since'])
+        except argparse.ArgumentTypeError as e:
+            parser.error(f"Invalid since in --config {args.config}: {str(e)}")
+    overrides = {
+        'sections': args.sections,
+        'athletes': args.athletes,
+        'parallel_athletes': args.parallel_athletes,
+        'since': args.since,
+        'full_sync': args.full,
+        'lookback_days': args.lookback_days,
+        'storage_backend': args.storage,
+        'pretty_json': args.pretty,
+        'export_format': args.export,
+        'metrics_file': args.metrics_file,
+        'metrics_port': args.metrics_port,
+        'trace_file': args.trace,
+        'profile_file': args.profile,
+        'slow_callback_ms': args.slow_callback_ms,
+        'base_url': args.base_url,
+        'use_local_store': False if args.no_local_store else None,
+        'detect_changes': False if args.no_change_detection else None,
+        'http_cache': False if args.no_http_cache else None
+    }
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    config['sections'] = parse_sections(config.get('sections', []))
+    if not config['sections']:
+        parser.error("sync needs at least one section: pass --sections or set sections in --config")
+    from .utils.api_manager import options_from_sections
+    try:
+        options_from_sections(config['sections'])
+    except ValueError as e:
+        parser.error(str(e))
+    if 'athletes' in config:
+        config['athletes'] = parse_sections(config['athletes'])
+    return config
+
+def sync(config: Dict[str, Any]) -> None:
+    from .utils import TokenManager
+    from .utils.api_manager import APIManager, options_from_sections
+
+    options = options_from_sections(config.pop('sections'))
+    athletes = config.pop('athletes', None)
+    parallel_athletes = config.pop('parallel_athletes', 4)
+    if athletes:
+        sync_athletes(options, None if athletes == ['all'] else athletes, parallel_athletes, config)
+        return
+
+    token_manager = TokenManager()
+    access_token = token_manager.get_token()["access_token"]
+    client = APIManager(access_token, token_refresher=token_manager.refresher(), **config)
+    try:
+        client.run_sections(options)
+    finally:
+        client.close()
+
+def sync_athletes(options: Dict[str, Any], athlete_ids: Optional[List[str]], parallel_athletes: int, config: Dict[str, Any]) -> None:
+    from .utils.athlete_supervisor import AthleteSupervisor
+
+    results = AthleteSupervisor(max_parallel=parallel_athletes, **config).run(options, athlete_ids)
+    failed = [athlete_id for athlete_id, error in results.items() if error is not None]
+    if failed:
+        raise SystemExit(f"Sync failed for athletes: {', '.join(failed)}")
+
+def add_athlete() -> None:
+    from .utils import TokenManager
+    from .utils.token_store import TokenStore
+
+    token_data = TokenManager().authorize()
+    if token_data is None:
+        raise SystemExit("Authorization failed")
+    TokenStore().add(token_data)
+
+def main(argv: Optional[List[str]] = None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'sync':
+        sync(load_sync_config(args, parser))
+        return
+    if args.command == 'add-athlete':
+        add_athlete()
+        return
+
+    from .utils import TokenManager, APIManager
+
+    token_manager = TokenManager()
+    access_token = token_manager.get_token()["access_token"]
+
+    client = APIManager(access_token, token_refresher=token_manager.refresher())
+    try:
+        client.process_activities()
+    finally:
+        client.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,4 +1,16 @@
-from .token_manager import TokenManager
-from .api_manager import APIManager
+import importlib
 
-__all__ = ['TokenManager', 'APIManager']
\ No newline at end of file
+# Submodules are imported on first access, so importing the package does not
+# pay for aiohttp, requests or tkinter until they are actually used.
+_EXPORTS = {
+    'TokenManager': '.token_manager',
+    'APIManager': '.api_manager',
+    'LocalStore': '.local_store'
+}
+
+__all__ = ['TokenManager', 'APIManager', 'LocalStore']
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,277 @@
+import os
+import json
+import logging
+import time
+from typing import Dict, Any, Iterable, List, Optional
+
+from .stream_store import StreamStore, _import_numpy
+
+ANALYTICS_CACHE_FILENAME = 'analytics_cache.json'
+CACHE_VERSION = 1
+
+DEFAULT_DURATIONS = [1, 5, 10, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 5400, 7200]
+DEFAULT_DISTANCES = {
+    '400m': 400.0,
+    '1k': 1000.0,
+    '1mile': 1609.34,
+    '5k': 5000.0,
+    '10k': 10000.0,
+    'half_marathon': 21097.5,
+    'marathon': 42195.0
+}
+
+def resample_1hz(np: Any, timestamps: Any, values: Any, max_gap: int = 5) -> Any:
+    """
+    Resample a stream to one sample per second.
+
+    Samples are linearly interpolated; seconds inside a recording gap longer
+    than ``max_gap`` (auto-pause, lost signal) are set to zero.
+
+    :param np: The numpy module.
+    :param timestamps: Sample times in seconds, increasing.
+    :param values: Sample values.
+    :param max_gap: Longest gap in seconds that is interpolated.
+    :return: The resampled values as float64.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values) & (values >= 0)
+    timestamps, values = timestamps[valid], values[valid]
+    if len(timestamps) < 2:
+        return values
+    grid = np.arange(timestamps[0], timestamps[-1] + 1)
+    resampled = np.interp(grid, timestamps, values)
+    previous = np.clip(np.searchsorted(timestamps, grid, side='right') - 1, 0, len(timestamps) - 2)
+    # The sample opening a gap keeps its value, only the seconds after it are zeroed
+    gap = ((timestamps[previous + 1] - timestamps[previous]) > max_gap) & (grid > timestamps[previous])
+    resampled[gap] = 0.0
+    return resampled
+
+def mean_max(np: Any, values_1hz: Any, durations: Iterable[int]) -> Dict[int, float]:
+    """
+    Best average of a 1 Hz series over each duration, using one cumulative sum.
+
+    :param np: The numpy module.
+    :param values_1hz: The series, one sample per second.
+    :param durations: Window lengths in seconds.
+    :return: The best average per duration that fits in the series.
+    """
+    cumulative = np.concatenate(([0.0], np.cumsum(values_1hz, dtype=np.float64)))
+    curve = {}
+    for duration in durations:
+        if duration <= len(values_1hz):
+            curve[duration] = float(np.max(cumulative[duration:] - cumulative[:-duration]) / duration)
+    return curve
+
+def best_efforts(np: Any, timestamps: Any, distance: Any, targets: Dict[str, float]) -> Dict[str, float]:
+    """
+    Fastest elapsed time over each target distance.
+
+    For every starting sample the first sample at least the target distance
+    further is found with a vectorized binary search.
+
+    :param np: The numpy module.
+    :param timestamps: Sample times in seconds.
+    :param distance: Cumulative distance in meters at each sample.
+    :param targets: Target distances in meters keyed by name.
+    :return: The best time in seconds per reachable target.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    distance = np.asarray(distance, dtype=np.float64)
+    # Missing samples are dropped: filling them would credit the next sample with a sudden jump
+    valid = ~np.isnan(distance)
+    timestamps, distance = timestamps[valid], np.maximum.accumulate(distance[valid])
+    efforts = {}
+    for name, target in targets.items():
+        if len(distance) == 0 or distance[-1] - distance[0] < target:
+            continue
+        ends = np.searchsorted(distance, distance + target, side='left')
+        reachable = ends < len(distance)
+        if reachable.any():
+            efforts[name] = float(np.min(timestamps[ends[reachable]] - timestamps[reachable]))
+    return efforts
+
+def heart_rate_decoupling(np: Any, timestamps: Any, heartrate: Any, output: Any) -> Optional[float]:
+    """
+    Aerobic decoupling: drift of the output-to-heart-rate ratio between the two halves of an activity.
+
+    :param np: The numpy module.
+    :param timestamps: Sample times in seconds.
+    :param heartrate: Heart rate samples.
+    :param output: Power or speed samples.
+    :return: The decoupling in percent, or None if there is not enough data.
+    """
+    heartrate_1hz = resample_1hz(np, timestamps, heartrate)
+    output_1hz = resample_1hz(np, timestamps, output)
+    length = min(len(heartrate_1hz), len(output_1hz))
+    moving = (heartrate_1hz[:length] > 0) & (output_1hz[:length] > 0)
+    heartrate_1hz, output_1hz = heartrate_1hz[:length][moving], output_1hz[:length][moving]
+    if len(heartrate_1hz) < 600:
+        return None
+    half = len(heartrate_1hz) // 2
+    first = output_1hz[:half].mean() / heartrate_1hz[:half].mean()
+    second = output_1hz[half:].mean() / heartrate_1hz[half:].mean()
+    return float((first - second) / first * 100)
+
+class AnalyticsEngine:
+    """
+    Power/pace curves, best efforts and heart-rate decoupling over the stored activity streams.
+
+    Results are computed per activity with vectorized NumPy and cached in
+    ``data/analytics_cache.json``, keyed by activity ID and the modification
+    time of its streams file. The all-time records are merged incrementally
+    from newly analyzed activities instead of being recomputed over the
+    whole history.
+    """
+    def __init__(self, stream_store: Optional[StreamStore] = None, cache_path: Optional[str] = None,
+                 durations: Optional[List[int]] = None, distances: Optional[Dict[str, float]] = None):
+        """
+        Initialize the AnalyticsEngine and load its cache.
+
+        :param stream_store: The store of activity streams. The default data directory is used if omitted.
+        :param cache_path: Path of the results cache. Defaults to ``data/analytics_cache.json``.
+        :param durations: Durations in seconds of the power and pace curves.
+        :param distances: Best-effort distances in meters keyed by name.
+        """
+        self.np = _import_numpy()
+        self.stream_store = stream_store or StreamStore()
+        self.cache_path = cache_path or os.path.join(os.path.dirname(self.stream_store.streams_dir), ANALYTICS_CACHE_FILENAME)
+        self.durations = durations or DEFAULT_DURATIONS
+        self.distances = distances or DEFAULT_DISTANCES
+        self.cache = self._empty_cache()
+        self._load_cache()
+
+    def _params(self) -> Dict[str, Any]:
+        return {'durations': self.durations, 'distances': self.distances}
+
+    def _empty_cache(self) -> Dict[str, Any]:
+        return {'version': CACHE_VERSION, 'params': self._params(), 'activities': {}, 'all_time': {}}
+
+    def _load_cache(self) -> None:
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r") as file:
+                cache = json.load(file)
+        except Exception as e:
+            logging.error("Error loading analytics cache: %s", e)
+            return
+        if cache.get('version') == CACHE_VERSION and cache.get('params') == json.loads(json.dumps(self._params())):
+            self.cache = cache
+        else:
+            logging.info("Analytics parameters changed, discarding cached results")
+
+    def save(self) -> None:
+        """Persist the results cache."""
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.cache, file)
+        os.replace(temp_path, self.cache_path)
+
+    def analyze_activity(self, activity_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Compute the analytics of a single activity from its streams.
+
+        :param activity_id: The activity ID.
+        :return: The power curve, pace curve, best efforts and decoupling, or None if no streams are stored.
+        """
+        np = self.np
+        streams = self.stream_store.read(activity_id)
+        if not streams or 'time' not in streams:
+            return None
+
+        timestamps = streams['time']
+        result: Dict[str, Any] = {'power_curve': {}, 'pace_curve': {}, 'best_efforts': {}, 'hr_decoupling': None}
+        if 'watts' in streams:
+            result['power_curve'] = mean_max(np, resample_1hz(np, timestamps, streams['watts']), self.durations)
+        if 'velocity_smooth' in streams:
+            result['pace_curve'] = mean_max(np, resample_1hz(np, timestamps, streams['velocity_smooth']), self.durations)
+        if 'distance' in streams:
+            result['best_efforts'] = best_efforts(np, timestamps, streams['distance'], self.distances)
+        if 'heartrate' in streams:
+            output = streams.get('watts', streams.get('velocity_smooth'))
+            if output is not None:
+                result['hr_decoupling'] = heart_rate_decoupling(np, timestamps, streams['heartrate'], output)
+        return result
+
+    def _merge(self, activity_id: int, result: Dict[str, Any]) -> None:
+        all_time = self.cache['all_time']
+        for curve in ('power_curve', 'pace_curve'):
+            records = all_time.setdefault(curve, {})
+            for duration, value in result[curve].items():
+                record = records.get(str(duration))
+                if record is None or value > record['value']:
+                    records[str(duration)] = {'value': value, 'activity_id': activity_id}
+        records = all_time.setdefault('best_efforts', {})
+        for name, seconds in result['best_efforts'].items():
+            record = records.get(name)
+            if record is None or seconds < record['value']:
+                records[name] = {'value': seconds, 'activity_id': activity_id}
+
+    def update(self, activity_ids: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+        """
+        Analyze activities that are new or whose streams changed, and merge them into the all-time records.
+
+        :param activity_ids: The activities to consider, e.g. ``ActivityAPIClient.activities_ids_list``.
+                             Every activity with stored streams if omitted.
+        :return: The all-time records.
+        """
+        start_time = time.time()
+        activities = self.cache['activities']
+        analyzed = 0
+        for activity_id in (activity_ids if activity_ids is not None else self.stream_store.ids()):
+            if not self.stream_store.contains(activity_id):
+                continue
+            mtime = os.path.getmtime(self.stream_store.path_for(activity_id))
+            cached = activities.get(str(activity_id))
+            if cached and cached['mtime'] == mtime:
+                continue
+            result = self.analyze_activity(activity_id)
+            if result is None:
+                continue
+            if cached:
+                # Streams were re-downloaded: records held by this activity may now be too high.
+                activities[str(activity_id)] = dict(result, mtime=mtime)
+                self.rebuild_all_time()
+            else:
+                activities[str(activity_id)] = dict(result, mtime=mtime)
+                self._merge(activity_id, result)
+            analyzed += 1
+
+        self.save()
+        logging.info(f"Analyzed {analyzed} activities in {time.time() - start_time:.2f} seconds "
+                     f"({len(activities)} activities in the all-time records)")
+        return self.cache['all_time']
+
+    def rebuild_all_time(self) -> Dict[str, Any]:
+        """
+        Recompute the all-time records from the cached per-activity results.
+
+        :return: The all-time records.
+        """
+        self.cache['all_time'] = {}
+        for activity_id, result in self.cache['activities'].items():
+            self._merge(int(activity_id), {
+                'power_curve': {int(duration): value for duration, value in result['power_curve'].items()},
+                'pace_curve': {int(duration): value for duration, value in result['pace_curve'].items()},
+                'best_efforts': result['best_efforts']
+            })
+        return self.cache['all_time']
+
+    def all_time(self) -> Dict[str, Any]:
+        """
+        Return the all-time power curve, pace curve and best efforts.
+
+        :return: Records keyed by duration or distance name, each with its value and activity ID.
+        """
+        return self.cache['all_time']
+
+    def activity_results(self, activity_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached analytics of an activity.
+
+        :param activity_id: The activity ID.
+        :return: The cached results, or None if the activity was not analyzed.
+        """
+        return self.cache['activities'].get(str(activity_id))
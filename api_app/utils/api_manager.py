@@ -1,70 +1,372 @@
 import asyncio
 import logging
+import os
+import time
+from typing import Dict, Any, List, Optional
 
-from .thinker_pop_up import create_strava_data_sections_popup, create_strava_activities_sections_popup, create_strava_clubs_sections_popup
 from .athlete_api_client import AthleteAPIClient
 from .activities_api_client import ActivityAPIClient
 from .routes_api_client import RoutesAPIClient
 from .clubs_api_client import ClubsAPIClient
+from .http_transport import HTTPTransport
+from .rate_limiter import RateLimiter
+from .retry_policy import DeadLetterQueue
+from .client_context import ClientContext
+from .journal import SyncJournal, JOURNAL_FILENAME
+from .change_detector import ChangeDetector
+from .response_cache import ResponseCache, CACHE_FILENAME
+from .write_behind import WriteBehindWriter
+from .metrics import MetricsRegistry
+from .tracing import ProfilingSession
+from .sync_state import SyncState, SYNC_STATE_FILENAME
+from .manifest import DataManifest
+from .storage import DATA_DIR, JsonFileStorage, create_storage
+from .local_store import LocalStore, DATABASE_FILENAME
+from .stream_store import StreamStore
+from .endpoint_config import StravaEndpoints
+from .pipeline_scheduler import PipelineScheduler
+from .call_planner import CallPlanner
+from .analytics import AnalyticsEngine
+from .columnar_export import ColumnarExporter
+from .zones import ZoneEngine
+
+ACTIVITIES_OPTIONS = {
+    "download_activities": "activities",
+    "download_activities_laps": "laps",
+    "download_activities_zones": "zones",
+    "download_activities_comments": "comments",
+    "download_activities_kudos": "kudos",
+    "download_activities_streams": "streams"
+}
+
+# Section names accepted by the headless CLI, mapped to the popup options they select.
+SECTION_OPTIONS = {
+    "athlete": ["download_athlete_section"],
+    "activities": ["download_activities_section", "download_activities"],
+    "laps": ["download_activities_section", "download_activities_laps"],
+    "zones": ["download_activities_section", "download_activities_zones"],
+    "comments": ["download_activities_section", "download_activities_comments"],
+    "kudos": ["download_activities_section", "download_activities_kudos"],
+    "streams": ["download_activities_section", "download_activities_streams"],
+    "routes": ["download_routes_section"],
+    "clubs": ["download_club_section", "download_clubs"],
+    "club_members": ["download_club_section", "download_club_members"],
+    "club_activities": ["download_club_section", "download_club_activities"]
+}
+
+CLUBS_OPTIONS = {
+    "download_clubs": "clubs",
+    "download_club_members": "members",
+    "download_club_activities": "activities"
+}
+
+def options_from_sections(sections: List[str]) -> Dict[str, bool]:
+    """
+    Translate section names into the options the interactive popups would return.
+
+    :param sections: Section names, e.g. ['activities', 'laps'].
+    :return: The selected popup options.
+    :raises ValueError: If a section name is unknown.
+    """
+    options = {}
+    for section in sections:
+        if section not in SECTION_OPTIONS:
+            raise ValueError(f"Invalid section: {section}. Allowed sections are: {', '.join(SECTION_OPTIONS)}")
+        options.update({option: True for option in SECTION_OPTIONS[section]})
+    return options
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class APIManager:
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: str, limit_per_host: int = 20, dns_cache_ttl: int = 300,
+                 lookback_days: float = 0, full_sync: bool = False, since: Optional[int] = None,
+                 storage_backend: str = 'json', use_local_store: bool = True, pretty_json: bool = False,
+                 data_dir: Optional[str] = None, athlete_zones: Optional[Dict[str, Any]] = None,
+                 concurrency: int = 10, detect_changes: bool = True, http_cache: bool = True, write_behind: bool = True,
+                 export_format: Optional[str] = None,
+                 rate_limiter: Optional[RateLimiter] = None, token_refresher: Optional[Any] = None,
+                 metrics: Optional[MetricsRegistry] = None, metrics_file: Optional[str] = None, metrics_port: Optional[int] = None,
+                 trace_file: Optional[str] = None, profile_file: Optional[str] = None, slow_callback_ms: Optional[float] = None,
+                 tracer: Optional[Any] = None, base_url: Optional[str] = None):
         """
         Initialize the APIManager with the access token and create API clients.
 
         :param access_token: The access token for authenticating API requests.
+        :param limit_per_host: Maximum number of pooled connections to the Strava API host.
+        :param dns_cache_ttl: Seconds a resolved DNS entry is cached by the pooled transport.
+        :param lookback_days: Days before the last synced activity to list again, to catch recent edits.
+        :param full_sync: Ignore the persisted sync state and list the full activity history.
+        :param since: Epoch timestamp to list activities from, overriding the persisted sync state.
+        :param storage_backend: Where raw API responses are saved: 'json' for one file per record, 'shards' for compressed NDJSON shards.
+        :param use_local_store: Also write fetched data to the SQLite ``LocalStore`` for querying.
+        :param pretty_json: Indent the saved JSON files instead of writing them compact.
+        :param data_dir: Root of the data directory, e.g. one per athlete. Defaults to ``api_app/data``.
+        :param athlete_zones: Heart-rate and power zone boundaries in the format of /athlete/zones. Fetched once from the API if omitted.
+        :param concurrency: Number of requests processed concurrently across all sections.
+        :param detect_changes: Fetch again the saved activity data whose listed summary changed, e.g. a renamed activity or new kudos.
+        :param http_cache: Serve athlete, stats, clubs and routes responses from the persistent ``ResponseCache`` while fresh, and revalidate the club and route listings with their ETag.
+        :param write_behind: Queue the files saved while fetching to a ``WriteBehindWriter`` thread that writes them in batches.
+        :param export_format: Export the activities, laps and segment efforts to partitioned columnar files, 'parquet' or 'arrow', after every activities sync.
+        :param rate_limiter: Rate-limit governor shared with other managers using the same application. A private one is created if omitted.
+        :param token_refresher: Optional ``TokenRefresher`` renewing the access token in the background and after a 401, for syncs that outlive the token.
+        :param metrics: Registry shared with other managers, whose owner exports it. A private one is created, summarised in ``metrics_summary.json`` after every run, if omitted.
+        :param metrics_file: Prometheus text file the private metrics are written to after every run.
+        :param metrics_port: Port of a local ``/metrics`` HTTP endpoint serving the private metrics.
+        :param trace_file: Chrome trace JSON file the spans of the requests, rate-limit waits, decoding and saves are written to when the manager is closed.
+        :param profile_file: File the ``cProfile`` statistics of the event loop runs are dumped to when the manager is closed.
+        :param slow_callback_ms: Run the event loops in debug mode and report the callbacks blocking them longer than this.
+        :param tracer: ``Tracer`` shared with other managers, whose owner writes it.
+        :param base_url: The API base URL, e.g. of the local fake server in ``benchmarks/fake_strava.py``. Defaults to the Strava API.
+        """
+        self.concurrency = concurrency
+        self.lookback_days = lookback_days
+        self.since = since
+        self.full_sync = full_sync
+        self.transport = HTTPTransport(limit_per_host=limit_per_host, dns_cache_ttl=dns_cache_ttl)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.storage = create_storage(storage_backend, data_dir=data_dir or DATA_DIR, **({'indent': 2} if pretty_json and storage_backend == JsonFileStorage.name else {}))
+        self.manifest = DataManifest(self.storage)
+        self.sync_state = SyncState(os.path.join(self.manifest.data_dir, SYNC_STATE_FILENAME))
+        self.local_store = LocalStore(os.path.join(self.manifest.data_dir, DATABASE_FILENAME)) if use_local_store else None
+        self.stream_store = StreamStore(self.manifest.data_dir)
+        self.athlete_zones = athlete_zones
+        self.dead_letters = DeadLetterQueue(self.manifest.data_dir)
+        self.journal = SyncJournal(os.path.join(self.manifest.data_dir, JOURNAL_FILENAME))
+        self.change_detector = ChangeDetector(self.manifest.data_dir) if detect_changes else None
+        self.response_cache = ResponseCache(os.path.join(self.manifest.data_dir, CACHE_FILENAME)) if http_cache else None
+        self.exporter = ColumnarExporter(self.manifest, export_format=export_format) if export_format else None
+        self.profiling = ProfilingSession(trace_file, profile_file, slow_callback_ms, tracer=tracer)
+        self.writer = WriteBehindWriter(self.storage, self.manifest, tracer=self.profiling.tracer) if write_behind else None
+        self.token_refresher = token_refresher
+        if self.token_refresher is not None:
+            self.token_refresher.start()
+        self.owns_metrics = metrics is None
+        self.metrics = metrics if metrics is not None else MetricsRegistry(self.rate_limiter)
+        self.metrics_file = metrics_file
+        if self.owns_metrics and metrics_port:
+            self.metrics.serve(metrics_port)
+        self.context = ClientContext(
+            transport=self.transport,
+            rate_limiter=self.rate_limiter,
+            storage=self.storage,
+            manifest=self.manifest,
+            local_store=self.local_store,
+            stream_store=self.stream_store,
+            dead_letters=self.dead_letters,
+            journal=self.journal,
+            change_detector=self.change_detector,
+            response_cache=self.response_cache,
+            writer=self.writer,
+            token_refresher=self.token_refresher,
+            metrics=self.metrics,
+            tracer=self.profiling.tracer,
+            base_url=base_url
+        )
+        self.athlete_client = AthleteAPIClient(access_token, self.context)
+        self.activity_client = ActivityAPIClient(access_token, self.context)
+        self.routes_client = RoutesAPIClient(access_token, self.context)
+        self.clubs_client = ClubsAPIClient(access_token, self.context)
+
+    def run_async(self, coroutine) -> Any:
+        """
+        Run a coroutine on a fresh event loop and close the pooled async session afterwards.
+
+        :param coroutine: The coroutine to run.
+        :return: The coroutine result.
+        """
+        async def _run():
+            try:
+                return await coroutine
+            finally:
+                await self.transport.close_async()
+                if self.writer is not None:
+                    await asyncio.to_thread(self.writer.flush)
+                await asyncio.to_thread(self.journal.flush)
+                self.manifest.save()
+                self.dead_letters.save()
+                if self.change_detector is not None:
+                    self.change_detector.save()
+                if self.local_store is not None:
+                    await asyncio.to_thread(self.local_store.flush)
+                self.export_metrics()
+
+        return self.profiling.run(_run())
+
+    def export_columnar(self) -> None:
+        """
+        Export the activities changed by the sync to the partitioned columnar files.
+        """
+        try:
+            self.exporter.export()
+        except Exception as e:
+            logging.error(f"Error exporting columnar files: {str(e)}")
+
+    def export_metrics(self) -> None:
+        """
+        Write the JSON summary of the metrics, and the Prometheus text file if configured.
+        """
+        if not self.owns_metrics:
+            return
+        try:
+            self.metrics.write_summary(self.manifest.data_dir)
+            if self.metrics_file:
+                self.metrics.write_prometheus(self.metrics_file)
+        except Exception as e:
+            logging.error(f"Error exporting metrics: {str(e)}")
+
+    def close(self) -> None:
+        """
+        Release the pooled connections held by the shared transport and persist the manifest.
+        """
+        self.transport.close()
+        if self.token_refresher is not None:
+            self.token_refresher.stop()
+        if self.writer is not None:
+            self.writer.close()
+        self.manifest.save()
+        self.dead_letters.save()
+        if self.change_detector is not None:
+            self.change_detector.save()
+        self.storage.close()
+        if self.local_store is not None:
+            self.local_store.close()
+        self.journal.close()
+        if self.response_cache is not None:
+            self.response_cache.log_summary()
+            self.response_cache.close()
+        if self.owns_metrics:
+            self.metrics.close()
+        self.profiling.write()
+        self.profiling.close()
+
+    def enable_local_zones(self) -> None:
+        """
+        Compute activity zones locally from streams instead of calling the paywalled zones endpoint.
+
+        The athlete zone boundaries come from the configuration, the saved
+        ``athlete_zones_data.json`` or a single /athlete/zones request.
+        """
+        athlete_zones = self.athlete_zones or self.athlete_client.load_json_from_file('athlete_zones_data.json', 'athlete')
+        if not athlete_zones:
+            athlete_zones = self.athlete_client.fetch_athlete_zone_data()
+            self.athlete_client.save_athlete_zones_data()
+        if not athlete_zones:
+            logging.warning("No athlete zones available, activity zones will be requested from the API")
+            return
+        self.activity_client.zone_engine = ZoneEngine(athlete_zones)
+
+    def _plan_activities_sync(self, data_types: List[str]) -> Optional[int]:
+        """Find where the activities listing starts and prepare the requested data types."""
+        athlete_id = (getattr(self.athlete_client, 'athlete_data', None) or {}).get('id')
+        after = self.since
+        if after is None and athlete_id and not self.full_sync:
+            after = self.sync_state.get_after(athlete_id, ['listing'] + data_types, lookback_seconds=self.lookback_days * 86400)
+        if after is not None:
+            logging.info(f"Incremental sync: listing activities after {time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(after))} UTC")
+        else:
+            logging.info("Full sync: listing the complete activity history")
+        if 'zones' in data_types and self.activity_client.zone_engine is None:
+            self.enable_local_zones()
+
+        if len(self.dead_letters):
+            self.run_async(self.activity_client.retry_dead_letters())
+        return after
+
+    def _finish_activities_sync(self, data_types: List[str], after: Optional[int]) -> None:
         """
-        self.athlete_client = AthleteAPIClient(access_token)
-        self.activity_client = ActivityAPIClient(access_token)
-        self.routes_client = RoutesAPIClient(access_token)
-        self.clubs_client = ClubsAPIClient(access_token)
+        Save the activities listing, advance the sync state and update the analytics.
+
+        The high-water marks are only advanced when the listing was walked to
+        its end, and not for the sections whose items are in the dead letters,
+        so the next run lists the missing activities again.
+        """
+        athlete_id = (getattr(self.athlete_client, 'athlete_data', None) or {}).get('id')
+        listing_complete = self.activity_client.listing_complete
+        if self.local_store is not None:
+            self.local_store.add_activity_summaries(self.activity_client.athlete_activities_data)
+        if after is not None or not listing_complete:
+            self.activity_client.merge_saved_athlete_activities_data()
+        self.activity_client.save_athlete_activities_data()
+
+        if athlete_id and self.since is None:
+            if not listing_complete:
+                logging.warning("Activities listing incomplete: the sync state is not advanced, the next run lists the activities again")
+            else:
+                failed_endpoints = self.dead_letters.endpoint_names()
+                for section in ['listing'] + data_types:
+                    if section != 'listing' and ActivityAPIClient.ENDPOINTS[section].endpoint_name in failed_endpoints:
+                        logging.warning(f"Some {section} requests failed: the {section} sync state is not advanced")
+                        continue
+                    self.sync_state.update(athlete_id, section, self.activity_client.newest_start_date)
+                self.sync_state.save()
+
+        if 'streams' in data_types:
+            AnalyticsEngine(self.stream_store).update(self.activity_client.activities_ids_list)
 
     def process_activities(self) -> None:
-        strava_data_section = create_strava_data_sections_popup()
+        """
+        Ask which sections to download through the interactive popups, then download them.
+        """
+        from .thinker_pop_up import create_strava_data_sections_popup, create_strava_activities_sections_popup, create_strava_clubs_sections_popup
+
+        options = dict(create_strava_data_sections_popup())
+        if options.get("download_activities_section"):
+            options.update(create_strava_activities_sections_popup())
+        if options.get("download_club_section"):
+            options.update(create_strava_clubs_sections_popup())
+        self.run_sections(options)
+
+    def run_sections(self, options: Dict[str, Any]) -> None:
+        """
+        Download the selected sections without any user interaction.
 
+        :param options: The selected options, as returned by the popups or ``options_from_sections``.
+        """
         ## Athlete
         self.athlete_client.fetch_athlete_data()
         self.athlete_client.save_athlete_data()
-        if strava_data_section.get("download_athlete_section"):
+        if self.journal.pending():
+            self.run_async(self.activity_client.resume_journal())
+        if options.get("download_athlete_section"):
             self.athlete_client.fetch_athlete_stats()
             self.athlete_client.save_athlete_states_data()
             # self.athlete_client.fetch_athlete_zone_data()
             # self.athlete_client.save_athlete_zones_data()
 
-        ## Activities
-        if strava_data_section.get("download_activities_section"):
-            strava_athletes_popup = create_strava_activities_sections_popup()
-            self.activity_client.fetch_athlete_activities_data()
-            self.activity_client.save_athlete_activities_data()
-
-            if strava_athletes_popup.get("download_activities"):
-                asyncio.run(self.activity_client.fetch_and_save_activities_data_async('activities'))
-            if strava_athletes_popup.get("download_activities_laps"):
-                asyncio.run(self.activity_client.fetch_and_save_activities_data_async('laps'))
-            if strava_athletes_popup.get("download_activities_zones"):
-                asyncio.run(self.activity_client.fetch_and_save_activities_data_async('zones'))
-            if strava_athletes_popup.get("download_activities_comments"):
-                asyncio.run(self.activity_client.fetch_and_save_activities_data_async('comments'))
-            if strava_athletes_popup.get("download_activities_kudos"):
-                asyncio.run(self.activity_client.fetch_and_save_activities_data_async('kudos'))
-
-        ## Routes
-        if strava_data_section.get("download_routes_section"):
-            self.routes_client.fetch_routes_data()
-            self.routes_client.save_routes_data()
-            asyncio.run(self.routes_client.fetch_and_save_routes_data_async())
-
-        ## Club
-        if strava_data_section.get("download_club_section"):
-            strava_clubs_popup = create_strava_clubs_sections_popup()
-            self.clubs_client.fetch_clubs_data()
-            self.clubs_client.save_clubs_data()
-
-            if strava_clubs_popup.get("download_clubs"):
-                asyncio.run(self.clubs_client.fetch_and_save_clubs_data_async('clubs'))
-            if strava_clubs_popup.get("download_club_members"):
-                asyncio.run(self.clubs_client.fetch_and_save_clubs_data_async('members'))
-            if strava_clubs_popup.get("download_club_activities"):
-                asyncio.run(self.clubs_client.fetch_and_save_clubs_data_async('activities'))
\ No newline at end of file
+        ## Activities, routes and clubs: one pipeline sharing the event loop and the rate budget
+        scheduler = PipelineScheduler(self.activity_client, concurrency=self.concurrency)
+        data_types = [data_type for option, data_type in ACTIVITIES_OPTIONS.items() if options.get(option)]
+        sync_activities = options.get("download_activities_section")
+        if sync_activities:
+            after = self._plan_activities_sync(data_types)
+            endpoints = [ActivityAPIClient.ENDPOINTS[data_type] for data_type in data_types]
+            self.activity_client.call_planner = CallPlanner(self.activity_client, endpoints)
+            scheduler.add_source('activities', self.activity_client.iter_listed_activities(after=after), endpoints,
+                                 planner=self.activity_client.call_planner, client=self.activity_client)
+        if options.get("download_routes_section"):
+            scheduler.add_source('routes', self.routes_client.iter_routes(), [StravaEndpoints.ROUTES], client=self.routes_client)
+        if options.get("download_club_section"):
+            scheduler.add_source('clubs', self.clubs_client.iter_clubs(),
+                                 [ClubsAPIClient.ENDPOINTS[data_type] for option, data_type in CLUBS_OPTIONS.items() if options.get(option)],
+                                 client=self.clubs_client)
+
+        self.run_async(scheduler.run())
+
+        if sync_activities:
+            self._finish_activities_sync(data_types, after)
+            if self.exporter is not None:
+                self.export_columnar()
+        if options.get("download_routes_section"):
+            if self.routes_client.listing_complete:
+                self.routes_client.save_routes_data()
+            else:
+                logging.warning("Routes listing incomplete, keeping the saved routes data")
+        if options.get("download_club_section"):
+            if self.clubs_client.listing_complete:
+                self.clubs_client.save_clubs_data()
+            else:
+                logging.warning("Clubs listing incomplete, keeping the saved clubs data")
+
+        pruned = self.journal.prune_done()
+        if pruned:
+            logging.info(f"Pruned {pruned} done items from the journal")
@@ -11,7 +11,7 @@ class AthleteAPIClient(BaseAPIClient):
         :return: The athlete data as a dictionary, or None if an error occurs.
         """
         logging.info("Fetching Athlete data")
-        athlete_url = 'https://www.strava.com/api/v3/athlete'
+        athlete_url = self.api_url('/athlete')
         self.athlete_data = self.make_request(athlete_url, 'athlete')
         return self.athlete_data
 
@@ -23,7 +23,7 @@ class AthleteAPIClient(BaseAPIClient):
         """
         logging.info("Fetching Athlete Stats data")
         athlete_id = self.athlete_data.get('id')
-        athlete_stats_url = f'https://www.strava.com/api/v3/athletes/{athlete_id}/stats'
+        athlete_stats_url = self.api_url(f'/athletes/{athlete_id}/stats')
         self.athlete_states_data = self.make_request(athlete_stats_url, 'athlete')
         return self.athlete_states_data
 
@@ -34,7 +34,7 @@ class AthleteAPIClient(BaseAPIClient):
         :return: The athlete zone data as a dictionary, or None if an error occurs.
         """
         logging.info("Fetching Athlete Zones data")
-        athlete_zones_url = 'https://www.strava.com/api/v3/athlete/zones'
+        athlete_zones_url = self.api_url('/athlete/zones')
         self.athlete_zones_data = self.make_request(athlete_zones_url, 'athlete')
         return self.athlete_zones_data
 
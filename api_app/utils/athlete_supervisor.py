@@ -0,0 +1,121 @@
+import os
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Optional
+
+from .api_manager import APIManager
+from .metrics import MetricsRegistry
+from .rate_limiter import RateLimiter
+from .storage import DATA_DIR
+from .token_refresher import TokenRefresher
+from .token_store import TokenStore
+from .tracing import Tracer
+
+ATHLETES_DIRNAME = 'athletes'
+
+class AthleteSupervisor:
+    """
+    Runs the sync of several athletes concurrently.
+
+    Each athlete is synced by its own ``APIManager`` in a worker thread, with
+    its own event loops and an isolated data root
+    (``data/athletes/<athlete_id>``) and its own ``TokenRefresher`` that
+    saves renewed tokens back to the token store. Every manager shares one
+    ``RateLimiter``: Strava counts the requests of all tokens against the
+    application's limits and reports that app-wide usage in every response,
+    so a single governor keeps the whole team within one budget. The
+    managers also share one ``MetricsRegistry``, summarised for the team in
+    ``data/athletes/metrics_summary.json``, and one ``Tracer`` when tracing.
+    """
+    def __init__(self, token_store: Optional[TokenStore] = None, data_root: Optional[str] = None, max_parallel: int = 4, rate_limiter: Optional[RateLimiter] = None, **manager_options: Any):
+        """
+        Initialize the AthleteSupervisor.
+
+        :param token_store: The tokens of the athletes. ``athlete_tokens.json`` is loaded if omitted.
+        :param data_root: Directory holding one data directory per athlete. Defaults to ``data/athletes``.
+        :param max_parallel: Maximum number of athletes synced at the same time.
+        :param rate_limiter: Rate-limit governor shared by every athlete. A new one is created if omitted.
+        :param manager_options: Keyword arguments passed to every ``APIManager``, e.g. ``lookback_days``.
+                                ``metrics_file`` and ``metrics_port`` apply to the shared metrics and
+                                ``trace_file`` to the shared tracer. ``profile_file`` is not supported,
+                                ``cProfile`` only profiles the thread it is enabled in.
+        """
+        self.token_store = token_store or TokenStore()
+        self.data_root = data_root or os.path.join(DATA_DIR, ATHLETES_DIRNAME)
+        self.max_parallel = max_parallel
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.metrics = MetricsRegistry(self.rate_limiter)
+        self.metrics_file = manager_options.pop('metrics_file', None)
+        self.metrics_port = manager_options.pop('metrics_port', None)
+        self.trace_file = manager_options.pop('trace_file', None)
+        self.tracer = Tracer() if self.trace_file else None
+        if manager_options.pop('profile_file', None):
+            logging.warning("Profiling is only available when syncing a single athlete, ignoring the profile file")
+        self.manager_options = manager_options
+
+    def data_dir(self, athlete_id: Any) -> str:
+        return os.path.join(self.data_root, str(athlete_id))
+
+    def sync_athlete(self, athlete_id: Any, options: Dict[str, Any]) -> None:
+        """
+        Sync the selected sections of one athlete.
+
+        :param athlete_id: The athlete ID.
+        :param options: The selected options, as returned by ``options_from_sections``.
+        :raises ValueError: If the athlete has no valid access token and it cannot be renewed.
+        """
+        token = self.token_store.get(athlete_id)
+        if token is None:
+            raise ValueError(f"No token for athlete {athlete_id}, authorize with `python -m api_app add-athlete`")
+        refresher = TokenRefresher(token.get('access_token'), token.get('refresh_token'), token.get('expires_at', 0),
+                                   on_refresh=lambda token_data: self.token_store.add(token_data, athlete_id))
+        if not self.token_store.is_valid(athlete_id) and refresher.refresh() is None:
+            raise ValueError(f"No valid token for athlete {athlete_id}, authorize again with `python -m api_app add-athlete`")
+        manager = APIManager(refresher.access_token, data_dir=self.data_dir(athlete_id), rate_limiter=self.rate_limiter,
+                             token_refresher=refresher, metrics=self.metrics, tracer=self.tracer, **self.manager_options)
+        try:
+            manager.run_sections(dict(options))
+        finally:
+            manager.close()
+
+    def run(self, options: Dict[str, Any], athlete_ids: Optional[Iterable[Any]] = None) -> Dict[str, Optional[str]]:
+        """
+        Sync several athletes concurrently.
+
+        :param options: The selected options, as returned by ``options_from_sections``.
+        :param athlete_ids: The athletes to sync. Every athlete of the token store if omitted.
+        :return: None for each athlete synced successfully, else the error, keyed by athlete ID.
+        """
+        athlete_ids = [str(athlete_id) for athlete_id in (athlete_ids or self.token_store.athlete_ids())]
+        results: Dict[str, Optional[str]] = {}
+        if not athlete_ids:
+            logging.warning("No athletes to sync, add one with `python -m api_app add-athlete`")
+            return results
+
+        start_time = time.time()
+        logging.info(f"Syncing {len(athlete_ids)} athletes, {min(self.max_parallel, len(athlete_ids))} at a time")
+        if self.metrics_port:
+            self.metrics.serve(self.metrics_port)
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix='athlete') as pool:
+            futures = {pool.submit(self.sync_athlete, athlete_id, options): athlete_id for athlete_id in athlete_ids}
+            for future in as_completed(futures):
+                athlete_id = futures[future]
+                try:
+                    future.result()
+                    results[athlete_id] = None
+                    logging.info(f"Athlete {athlete_id} synced")
+                except Exception as e:
+                    results[athlete_id] = str(e)
+                    logging.error(f"Sync of athlete {athlete_id} failed: {str(e)}")
+
+        self.metrics.write_summary(self.data_root)
+        if self.metrics_file:
+            self.metrics.write_prometheus(self.metrics_file)
+        self.metrics.close()
+        if self.tracer is not None:
+            self.tracer.write(self.trace_file)
+
+        failed = sum(error is not None for error in results.values())
+        logging.info(f"Synced {len(results) - failed}/{len(results)} athletes in {time.time() - start_time:.2f} seconds")
+        return results
@@ -1,251 +1,521 @@
-import aiohttp
 import asyncio
-import os
 import json
 import logging
-from typing import Dict, Any, Optional
+import time
+from functools import partial
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple
 
-from .endpoint_config import EndpointConfig
-
-import requests
+from .endpoint_config import EndpointConfig, StravaEndpoints
+from .client_context import ClientContext
+from .batch_engine import EndpointBatchEngine, BatchStats
 
 class BaseAPIClient:
     ALLOWED_MODULES = ['athlete', 'activities', 'routes', 'clubs']
 
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: str, context: Optional[ClientContext] = None,
+                 zone_engine: Optional[Any] = None):
         """
         Initialize the BaseAPIClient with an access token.
 
         :param access_token: The access token for authenticating API requests.
+        :param context: The services shared with the other clients of the sync. A private context is created if omitted.
+        :param zone_engine: Optional ``ZoneEngine`` that computes activity zones from streams instead of calling the paywalled zones endpoint.
         """
         self.access_token = access_token
-        self.headers = {
+        self.context = context or ClientContext()
+        self.transport = self.context.transport
+        self.rate_limiter = self.context.rate_limiter
+        self.manifest = self.context.manifest
+        self.storage = self.context.storage
+        self.local_store = self.context.local_store
+        self.stream_store = self.context.stream_store
+        self.zone_engine = zone_engine
+        self.retry_policy = self.context.retry_policy
+        self.dead_letters = self.context.dead_letters
+        self.journal = self.context.journal
+        self.change_detector = self.context.change_detector
+        self.response_cache = self.context.response_cache
+        self.writer = self.context.writer
+        self.token_refresher = self.context.token_refresher
+        self.metrics = self.context.metrics
+        self.tracer = self.context.tracer
+        self.base_url = self.context.base_url
+        self.call_planner: Optional[Any] = None
+        self.listing_complete = False
+        self._in_flight: Dict[Tuple[str, int], asyncio.Future] = {}
+
+    @property
+    def current_access_token(self) -> str:
+        return self.token_refresher.access_token if self.token_refresher is not None else self.access_token
+
+    def api_url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
             'accept': 'application/json',
-            'authorization': f'Bearer {self.access_token}'
+            'authorization': f'Bearer {self.current_access_token}'
         }
 
-    def make_request(self, url: str, module: str) -> Optional[Dict[str, Any]]:
+    def _can_renew(self, status: Optional[int], renewed: bool) -> bool:
+        return status == 401 and self.token_refresher is not None and not renewed
+
+    def _observe(self, endpoint: str, sent_at: Optional[float], status: Optional[int], size: int) -> None:
+        if self.metrics is not None and sent_at is not None:
+            self.metrics.observe_request(endpoint, time.perf_counter() - sent_at, status, size)
+
+    def _count_retry(self, endpoint: str) -> None:
+        if self.metrics is not None:
+            self.metrics.inc('strava_retries_total', {'endpoint': endpoint})
+
+    @staticmethod
+    def _query_params(params: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        if not params:
+            return None
+        return {key: str(value) for key, value in params.items() if value is not None}
+
+    def make_request(self, url: str, module: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """
         Make a GET HTTPS request to the specified URL and return the JSON response.
 
+        Transient failures (429, 5xx, connection errors) are retried according
+        to the retry policy. Requests that still fail are added to the dead letters.
+        Cacheable URLs are answered from the response cache while fresh. A 401
+        renews the access token once and replays the request.
+
         :param url: The URL to send the request to.
         :param module: The name of the module for logging purposes.
+        :param params: Optional query parameters. Parameters set to None are omitted.
         :return: The JSON response as a dictionary, or None if an error occurs.
         """
-        if module and module not in self.ALLOWED_MODULES:
-            raise ValueError(f"Invalid module: {module}. Allowed modules are: {', '.join(self.ALLOWED_MODULES)}")
-
-        try:
-            logging.info(f"Sending {module} request to %s", url)
-            response = requests.get(url, headers=self.headers)
-            self.rate_limit_usage = response.headers.get('x-readratelimit-usage')
-
-            if response.status_code == 429:
-                raise RateLimitExceededError()
-            if response.status_code == 200:
-                logging.info("Request successful")
-                return response.json()
-            else:
+        import requests
+
+        self._validate_module(module)
+        params = self._query_params(params)
+        cached, conditional_headers = self._cache_lookup(url, params)
+        if cached is not None:
+            return cached
+
+        attempt = 0
+        renewed = False
+        while True:
+            status, headers, reason = None, None, None
+            token = self.current_access_token
+            request_headers = dict(self.headers, **conditional_headers)
+            try:
+                self.rate_limiter.acquire_sync()
+                logging.info(f"Sending {module} request to %s", url)
+                sent_at = time.perf_counter()
+                try:
+                    response = self.transport.get(url, headers=request_headers, params=params)
+                except Exception:
+                    self.rate_limiter.release()
+                    self._observe(module, sent_at, None, 0)
+                    raise
+                self.rate_limiter.release(response.headers)
+                status, headers, reason = response.status_code, response.headers, response.reason
+                self._observe(module, sent_at, status, len(response.content))
+
+                if status == 429:
+                    self.rate_limiter.mark_exhausted(headers)
+                    raise RateLimitExceededError()
+                if status == 304 and self.response_cache is not None:
+                    return self.response_cache.revalidated(url, params)
+                if status == 200:
+                    logging.info("Request successful")
+                    self.dead_letters.remove(url)
+                    data = response.json()
+                    if self.response_cache is not None:
+                        self.response_cache.store(url, params, data, headers)
+                    return data
                 logging.warning(f"Failed to fetch {module} data")
-                logging.warning(f"Status: {response.status_code}")
-                logging.warning(f"Reason: {response.reason}")
+                logging.warning(f"Status: {status}")
+                logging.warning(f"Reason: {reason}")
+            except RateLimitExceededError as e:
+                reason = e.message
+            except requests.exceptions.RequestException as err:
+                logging.error("HTTP error occurred: %s", err)
+                reason = str(err)
+            except Exception as err:
+                logging.error("An error occurred: %s", err)
                 return None
-        except requests.exceptions.HTTPError as http_err:
-            logging.error("HTTP error occurred: %s", http_err)
-            return None
-        except Exception as err:
-            logging.error("An error occurred: %s", err)
-            return None
 
-    async def make_async_request(self, url: str, module: str) -> Optional[Dict[str, Any]]:
+            if self._can_renew(status, renewed):
+                renewed = True
+                if self.token_refresher.refresh(token):
+                    logging.info(f"Replaying {module} request with the renewed access token")
+                    continue
+            if not self.retry_policy.should_retry(attempt, status):
+                break
+            delay = self.retry_policy.delay(attempt, status, headers)
+            attempt += 1
+            self._count_retry(module)
+            logging.warning(f"Retrying {module} request in {delay:.1f} seconds (attempt {attempt + 1}/{self.retry_policy.max_attempts})")
+            time.sleep(delay)
+
+        if status is None or status in self.retry_policy.retry_statuses:
+            self.dead_letters.add(url, module, f"{status or ''} {reason}".strip(), attempt + 1)
+        return None
+
+    async def make_async_request(self, url: str, module: str, params: Optional[Dict[str, Any]] = None, item_id: Optional[int] = None, endpoint: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Make a asynchronous GET HTTPS request to the specified URL and return the JSON response.
 
+        Transient failures (429, 5xx, connection errors, timeouts) are retried
+        according to the retry policy. Requests that still fail are added to
+        the dead letters, with the item ID and endpoint so they can be queued again.
+        Cacheable URLs are answered from the response cache while fresh. A 401
+        renews the access token once and replays the request.
+
         :param url: The URL to send the request to.
         :param module: The name of the module for logging purposes.
+        :param params: Optional query parameters. Parameters set to None are omitted.
+        :param item_id: The ID the request is made for, recorded in the dead letters.
+        :param endpoint: The endpoint name, recorded in the dead letters.
         :return: The JSON response as a dictionary, or None if an error occurs.
         """
-
-        if module and module not in self.ALLOWED_MODULES:
-            raise ValueError(f"Invalid module: {module}. Allowed modules are: {', '.join(self.ALLOWED_MODULES)}")
-
-        try:
-            async with aiohttp.ClientSession() as session:
-
-                rate_limit_checker = RateLimitChecker(self.rate_limit_usage)
-
-                if not rate_limit_checker.can_proceed():
-                    logging.warning("Rate limit exceeded. Cannot proceed with the request.")
-                    return None
-
-                async with session.get(url, headers=self.headers) as response:
-                    logging.info(f"Sending {module} request to %s", url)
-                    self.rate_limit_usage = response.headers.get('x-readratelimit-usage')
-                    if response.status == 200:
-                        return await response.json()
-                    else:
+        with self.tracer.span('request', endpoint=endpoint or module, url=url):
+            return await self._make_async_request(url, module, params, item_id, endpoint)
+
+    async def _make_async_request(self, url: str, module: str, params: Optional[Dict[str, Any]], item_id: Optional[int], endpoint: Optional[str]) -> Optional[Dict[str, Any]]:
+        import aiohttp
+
+        self._validate_module(module)
+        params = self._query_params(params)
+        cached, conditional_headers = self._cache_lookup(url, params)
+        if cached is not None:
+            return cached
+
+        attempt = 0
+        renewed = False
+        while True:
+            status, headers, reason = None, None, None
+            token = self.current_access_token
+            request_headers = dict(self.headers, **conditional_headers)
+            sent_at, size = None, 0
+            try:
+                session = await self.transport.get_async_session()
+                with self.tracer.span('rate_limit_wait'):
+                    await self.rate_limiter.acquire()
+                sent_at = time.perf_counter()
+                try:
+                    async with session.get(url, headers=request_headers, params=params) as response:
+                        logging.info(f"Sending {module} request to %s", url)
+                        status, headers, reason = response.status, response.headers, response.reason
+                        if status == 429:
+                            self.rate_limiter.mark_exhausted(headers)
+                        if status == 304 and self.response_cache is not None:
+                            return await self.response_cache.revalidated_async(url, params)
+                        if status == 200:
+                            body = await response.read()
+                            size = len(body)
+                            with self.tracer.span('json_decode', bytes=size):
+                                data = json.loads(body)
+                            self.dead_letters.remove(url)
+                            if self.response_cache is not None:
+                                await self.response_cache.store_async(url, params, data, headers)
+                            return data
                         logging.warning(f"Failed to fetch {module} data")
-                        logging.warning(f"Status: {response.status}")
-                        logging.warning(f"Reason: {response.reason}")
-                        return None
-        except Exception as e:
-            logging.error(f"Error fetching {module} data: {str(e)}")
-            return None
+                        logging.warning(f"Status: {status}")
+                        logging.warning(f"Reason: {reason}")
+                finally:
+                    self.rate_limiter.release(headers)
+                    self._observe(endpoint or module, sent_at, status, size)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.error(f"Error fetching {module} data: {str(e) or type(e).__name__}")
+                reason = str(e) or type(e).__name__
+            except Exception as e:
+                logging.error(f"Error fetching {module} data: {str(e)}")
+                return None
 
-    def make_readratelimit_api_call(self):
-        try:
-            logging.info(f"Sending request to get read rate limit usage")
-            response = requests.get('https://www.strava.com/api/v3/athlete', headers=self.headers)
-            self.rate_limit_usage = response.headers.get('x-readratelimit-usage')
+            if self._can_renew(status, renewed):
+                renewed = True
+                if await asyncio.to_thread(self.token_refresher.refresh, token):
+                    logging.info(f"Replaying {module} request with the renewed access token")
+                    continue
+            if not self.retry_policy.should_retry(attempt, status):
+                break
+            delay = self.retry_policy.delay(attempt, status, headers)
+            attempt += 1
+            self._count_retry(endpoint or module)
+            logging.warning(f"Retrying {module} request in {delay:.1f} seconds (attempt {attempt + 1}/{self.retry_policy.max_attempts})")
+            with self.tracer.span('retry_wait', status=status):
+                await asyncio.sleep(delay)
+
+        if status is None or status in self.retry_policy.retry_statuses:
+            self.dead_letters.add(url, module, f"{status or ''} {reason}".strip(), attempt + 1, item_id=item_id, endpoint=endpoint)
+        return None
+
+    def _cache_lookup(self, url: str, params: Optional[Dict[str, str]]) -> Tuple[Optional[Any], Dict[str, str]]:
+        if self.response_cache is None:
+            return None, {}
+        return self.response_cache.lookup(url, params)
+
+    async def iter_pages(self, url: str, module: str, params: Optional[Dict[str, Any]] = None, per_page: int = 200) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Walk a paginated list endpoint and yield each page as soon as it arrives.
 
-            if response.status_code == 200:
-                logging.info("Request successful")
-                return response.json()
-            else:
-                logging.warning("Failed to fetch read rate limit usage data")
-                logging.warning(f"Status: {response.status_code}")
-                logging.warning(f"Reason: {response.reason}")
-                return None
-        except requests.exceptions.HTTPError as http_err:
-            logging.error("HTTP error occurred: %s", http_err)
-            return None
-        except Exception as err:
-            logging.error("An error occurred: %s", err)
-            return None
+        Pages are requested with ``page``/``per_page`` query parameters until an
+        empty page is returned. Short pages are not treated as the end, since
+        Strava may filter items out of a page. A page that cannot be fetched
+        is not the end either: the listing stops with an error, so callers
+        know the pages yielded so far are only part of it.
+
+        :param url: The URL of the list endpoint.
+        :param module: The name of the module for logging purposes.
+        :param params: Additional query parameters sent with every page.
+        :param per_page: The number of items per page.
+        :return: An async iterator over the pages.
+        :raises ListingIncompleteError: If a page request fails after every retry.
+        """
+        page = 1
+        while True:
+            page_params = dict(params or {}, page=page, per_page=per_page)
+            items = await self.make_async_request(url, module, params=page_params)
+            if items is None:
+                raise ListingIncompleteError(module, page)
+            if not items:
+                logging.info(f"Reached the end of {module} listing after {page - 1} pages")
+                return
+            yield items
+            page += 1
+
+    def _validate_module(self, module: str) -> None:
+        if module and module not in self.ALLOWED_MODULES:
+            raise ValueError(f"Invalid module: {module}. Allowed modules are: {', '.join(self.ALLOWED_MODULES)}")
 
     async def check_json_file_exists(self, filename: str, module: str) -> bool:
         """
         Check if a JSON file already exists in the specified module directory.
 
+        The check is answered from the in-memory manifest, without touching the disk.
+
         :param filename: The name of the file to check.
         :param module: The module name for validation against allowed modules.
         :return: True if the file exists, False otherwise.
         :raises ValueError: If the module is not allowed.
         """
-        if module and module not in self.ALLOWED_MODULES:
-            raise ValueError(f"Invalid module: {module}. Allowed modules are: {', '.join(self.ALLOWED_MODULES)}")
-
-        data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
-        if module and module != 'athlete':
-            data_dir = os.path.join(data_dir, module)
-
-        file_path = os.path.join(data_dir, filename)
-        exists = os.path.exists(file_path)
+        self._validate_module(module)
+        exists = self.manifest.contains(module or 'athlete', filename)
 
         if exists:
             logging.info(f"File {filename} already exists in {module} directory")
 
         return exists
 
-    def save_json_to_file(self, data: dict, filename: str, module: str) -> None:
+    def load_json_from_file(self, filename: str, module: str) -> Optional[Any]:
         """
-        Save the given data to a JSON file.
+        Load previously saved data from a JSON file.
 
-        :param data: The data to save.
-        :param filename: The name of the file to save the data to.
+        :param filename: The name of the file to load.
         :param module: The module name for validation against allowed modules.
+        :return: The loaded data, or None if the file does not exist or cannot be read.
         :raises ValueError: If the module is not allowed.
         """
-        if module and module not in self.ALLOWED_MODULES:
-            raise ValueError(f"Invalid module: {module}. Allowed modules are: {', '.join(self.ALLOWED_MODULES)}")
-
-        data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
-        if module and module != 'athlete':
-            data_dir = os.path.join(data_dir, module)
-
-        os.makedirs(data_dir, exist_ok=True)
-        file_path = os.path.join(data_dir, filename)
+        self._validate_module(module)
+        try:
+            return self.storage.read(module, filename)
+        except Exception as e:
+            logging.error(f"Error loading {filename}: {str(e)}")
+            return None
 
-        with open(file_path, 'w') as json_file:
-            json.dump(data, json_file, indent=4)
-        logging.info("Data saved to %s", os.path.basename(file_path))
+    def _write_json(self, data: Any, filename: str, module: str, item_id: Optional[int] = None, endpoint: Optional[str] = None) -> None:
+        with self.tracer.span('storage_write', filename=filename):
+            size, sha256 = self.storage.write(module, filename, data)
+        self.manifest.record(module or 'athlete', filename, size, sha256, item_id=item_id, endpoint=endpoint)
 
-    async def save_json_to_file_async(self, data: dict, filename: str, module: str) -> None:
+    def save_json_to_file(self, data: dict, filename: str, module: str, item_id: Optional[int] = None, endpoint: Optional[str] = None) -> None:
         """
-        Save the given data to a JSON file.
+        Save the given data to a JSON file through the configured storage backend.
 
         :param data: The data to save.
         :param filename: The name of the file to save the data to.
         :param module: The module name for validation against allowed modules.
+        :param item_id: The ID of the saved item, recorded in the manifest.
+        :param endpoint: The endpoint name, recorded in the manifest.
         :raises ValueError: If the module is not allowed.
         """
-        if module and module not in self.ALLOWED_MODULES:
-            raise ValueError(f"Invalid module: {module}. Allowed modules are: {', '.join(self.ALLOWED_MODULES)}")
-
-        data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
-        if module and module != 'athlete':
-            data_dir = os.path.join(data_dir, module)
+        self._validate_module(module)
+        self._write_json(data, filename, module, item_id=item_id, endpoint=endpoint)
+        logging.info("Data saved to %s", filename)
 
-        os.makedirs(data_dir, exist_ok=True)
-        file_path = os.path.join(data_dir, filename)
+    async def save_json_to_file_async(self, data: dict, filename: str, module: str, item_id: Optional[int] = None, endpoint: Optional[str] = None, on_written: Optional[Callable[[bool], None]] = None) -> None:
+        """
+        Save the given data to a JSON file through the configured storage backend.
 
-        async def _write_json():
-            def write():
-                with open(file_path, 'w') as json_file:
-                    json.dump(data, json_file, indent=4)
-            await asyncio.to_thread(write)
+        With a write-behind writer the data is only queued, and the file is
+        written (and recorded in the manifest) shortly after by the writer thread.
 
-        await _write_json()
-        logging.info(f"Data saved asynchronously to {os.path.basename(file_path)}")
+        :param data: The data to save.
+        :param filename: The name of the file to save the data to.
+        :param module: The module name for validation against allowed modules.
+        :param item_id: The ID of the saved item, recorded in the manifest.
+        :param endpoint: The endpoint name, recorded in the manifest.
+        :param on_written: Called with True once the file is written, or False if writing failed.
+        :raises ValueError: If the module is not allowed.
+        """
+        self._validate_module(module)
+        with self.tracer.span('save', filename=filename):
+            if self.writer is not None:
+                await self.writer.submit(module, filename, data, item_id=item_id, endpoint=endpoint, on_written=on_written)
+                logging.info(f"Data queued for writing to {filename}")
+                return
+            await asyncio.to_thread(self._write_json, data, filename, module, item_id, endpoint)
+        logging.info(f"Data saved asynchronously to {filename}")
+        if on_written is not None:
+            on_written(True)
 
     async def process_endpoint(self, activity_id: int, endpoint_config: EndpointConfig):
         """
         Generic method to process an activity with a specific endpoint configuration.
 
+        A call for an (endpoint, item) already being processed, e.g. the streams
+        that the zones of the same activity are computed from, waits for that
+        call instead of sending the request again.
+
         :param activity_id: The ID of the activity to process
         :param endpoint_config: The endpoint configuration to use
         :return: The processed activity data or None if an error occurs
         """
+        key = (endpoint_config.endpoint_name, activity_id)
+        running = self._in_flight.get(key)
+        if running is not None:
+            return await asyncio.shield(running)
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        result = None
+        try:
+            with self.tracer.span('process_endpoint', endpoint=endpoint_config.endpoint_name, item_id=activity_id):
+                result = await self._process_endpoint(activity_id, endpoint_config)
+            return result
+        finally:
+            del self._in_flight[key]
+            future.set_result(result)
+
+    async def _process_endpoint(self, activity_id: int, endpoint_config: EndpointConfig):
         filename = endpoint_config.filename_template(activity_id)
         section = endpoint_config.section
         try:
-            url = endpoint_config.url_template(activity_id)
+            url = endpoint_config.url(activity_id, self.base_url)
             logging.info(f"Processing {endpoint_config.endpoint_name} for activity {activity_id}")
 
-            if await self.check_json_file_exists(filename, section):
+            if endpoint_config.payload == 'streams':
+                exists = self.stream_store.contains(activity_id)
+            else:
+                exists = await self.check_json_file_exists(filename, section)
+            if exists and self.change_detector is not None and self.change_detector.is_forced(endpoint_config, activity_id):
+                logging.info(f"Refreshing {endpoint_config.endpoint_name} for activity {activity_id}: Summary changed")
+                exists = False
+            if exists:
                 logging.info(f"Skipping {endpoint_config.endpoint_name} for activity {activity_id}: File exists")
+                if self.call_planner is not None:
+                    await self.call_planner.save_derived(activity_id, endpoint_config, None)
+                self._mark_current(endpoint_config, activity_id)
                 return None
 
-            activity_data = await self.make_async_request(url, section)
-            if activity_data:
-                await self.save_json_to_file_async(activity_data, filename, section)
+            if endpoint_config.payload == 'zones' and self.zone_engine is not None:
+                activity_data = await self.compute_activity_zones(activity_id)
+            else:
+                activity_data = await self.make_async_request(url, section, item_id=activity_id, endpoint=endpoint_config.endpoint_name)
+            # An empty JSON response, e.g. an activity without kudos or zones, is a valid result and is saved like any other.
+            if activity_data is not None and (activity_data or endpoint_config.payload != 'streams'):
+                if endpoint_config.payload == 'streams':
+                    await asyncio.to_thread(self.stream_store.write, activity_id, activity_data)
+                    logging.info(f"Streams saved asynchronously to {filename}")
+                    self._mark_current(endpoint_config, activity_id)
+                else:
+                    await self.save_json_to_file_async(activity_data, filename, section, item_id=activity_id, endpoint=endpoint_config.endpoint_name,
+                                                       on_written=partial(self._write_done, endpoint_config, activity_id))
+                if self.local_store is not None and endpoint_config.payload == 'json':
+                    await self.local_store.add_async(endpoint_config.endpoint_name, activity_id, activity_data)
+                if self.call_planner is not None:
+                    await self.call_planner.save_derived(activity_id, endpoint_config, activity_data)
                 return activity_data
             else:
                 logging.warning(f"Unable to fetch {endpoint_config.endpoint_name} data for Activity ID {activity_id}")
+                self._journal_finish(endpoint_config, activity_id, False)
                 return None
         except Exception as e:
             logging.error(f"Error processing {endpoint_config.endpoint_name} for activity {activity_id}: {str(e)}")
+            self._journal_finish(endpoint_config, activity_id, False)
             return None
 
-class RateLimitChecker:
-    def __init__(self, rate_limit_usage: Optional[str]):
-        """
-        Initialize the RateLimitChecker with the remaining rate limit.
+    def _journal_finish(self, endpoint_config: EndpointConfig, item_id: int, success: bool) -> None:
+        if self.journal is not None:
+            self.journal.finish(endpoint_config.endpoint_name, item_id, success)
 
-        :param rate_limit_usage: The remaining rate limit value as a string.
+    def _mark_current(self, endpoint_config: EndpointConfig, item_id: int) -> None:
+        if self.change_detector is not None:
+            self.change_detector.commit(endpoint_config, item_id)
+        self._journal_finish(endpoint_config, item_id, True)
+
+    def _write_done(self, endpoint_config: EndpointConfig, item_id: int, success: bool) -> None:
+        if success:
+            self._mark_current(endpoint_config, item_id)
+        else:
+            self._journal_finish(endpoint_config, item_id, False)
+
+    async def compute_activity_zones(self, activity_id: int) -> Optional[List[Dict[str, Any]]]:
         """
-        self.rate_limit_remaining = int(100 - float(rate_limit_usage.replace(',', '.'))) if rate_limit_usage else 0
+        Compute the zones of an activity locally, downloading its streams first if they are not stored.
 
-    def can_proceed(self) -> bool:
+        :param activity_id: The ID of the activity.
+        :return: The zone distributions in the format of the zones endpoint, an empty list if the activity
+                 has no heart rate or power stream, or None if its streams cannot be fetched.
         """
-        Check if the API calls can proceed based on the rate limit.
+        if not self.stream_store.contains(activity_id):
+            await self.process_endpoint(activity_id, StravaEndpoints.ACTIVITIES_STREAMS)
+        streams = await asyncio.to_thread(self.stream_store.read, activity_id, ['time', 'heartrate', 'watts'])
+        return self.zone_engine.compute(streams)
 
-        :return: True if API calls can proceed, False otherwise.
+    async def retry_dead_letters(self, concurrency: int = 10) -> BatchStats:
         """
-        return self.rate_limit_remaining > 0
+        Queue again the items of previous runs that failed after every retry.
 
-    def get_rate_limit_remaining(self) -> int:
+        :param concurrency: Number of items processed concurrently.
+        :return: The statistics of the run. Items that fail again return to the dead letters.
         """
-        Check if the API calls can proceed based on the rate limit.
+        entries = self.dead_letters.pop_endpoint_items()
+        if entries:
+            logging.info(f"Retrying {len(entries)} dead-lettered items from previous runs")
+        return await self._run_endpoint_items([(entry['endpoint'], entry['item_id']) for entry in entries], concurrency)
 
-        :return: True if API calls can proceed, False otherwise.
+    async def resume_journal(self, concurrency: int = 10) -> Optional[BatchStats]:
         """
-        return self.rate_limit_remaining
+        Resume the items a previous run left queued or in flight, e.g. after a crash.
 
-class RateLimitExceededError(SystemExit):
+        :param concurrency: Number of items processed concurrently.
+        :return: The statistics of the run, or None if no journal is configured.
+        """
+        if self.journal is None:
+            return None
+        pending = self.journal.pending()
+        if pending:
+            logging.info(f"Resuming {len(pending)} items left queued or in flight by an interrupted run")
+        return await self._run_endpoint_items(pending, concurrency)
+
+    async def _run_endpoint_items(self, items: List[Tuple[str, int]], concurrency: int) -> BatchStats:
+        async def work_items():
+            for endpoint_name, item_id in items:
+                endpoint_config = StravaEndpoints.by_name(endpoint_name)
+                if endpoint_config is not None:
+                    yield item_id, endpoint_config
+
+        return await EndpointBatchEngine(self, concurrency=concurrency).run_stream(work_items())
+
+class ListingIncompleteError(Exception):
+    """Exception raised when a page of a listing cannot be fetched after every retry.
+    The items listed before it are only part of the listing."""
+    def __init__(self, module: str, page: int):
+        self.module = module
+        self.page = page
+        super().__init__(f"Unable to fetch page {page} of the {module} listing")
+
+class RateLimitExceededError(Exception):
     """Exception raised when the API returns a 429 Too Many Requests status code.
-    Inherits from SystemExit to stop the application."""
-    def __init__(self, message="Rate limit exceeded: Too many requests. Application stopped."):
+    The request is retried once the rate limit window allows it."""
+    def __init__(self, message="Rate limit exceeded: Too many requests. Waiting for the rate limit window."):
         self.message = message
-        logging.critical(self.message)
-        super().__init__()
\ No newline at end of file
+        logging.warning(self.message)
+        super().__init__(self.message)
\ No newline at end of file
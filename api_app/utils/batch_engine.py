@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Optional, Tuple
+
+from .endpoint_config import EndpointConfig
+
+@dataclass
+class BatchStats:
+    total: int = 0
+    fetched: int = 0
+    not_fetched: int = 0
+    started_at: float = field(default_factory=time.time)
+    elapsed: float = 0.0
+
+    @property
+    def items_per_second(self) -> float:
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+async def _iterate(ids: Iterable[int], endpoint_config: EndpointConfig) -> AsyncIterator[Tuple[int, EndpointConfig]]:
+    for item_id in ids:
+        yield item_id, endpoint_config
+
+class EndpointBatchEngine:
+    """
+    Runs endpoint fetches through a bounded pool of asyncio workers.
+
+    Work items are ``(id, EndpointConfig)`` pairs fed through a bounded queue,
+    so producers are throttled by the workers and the number of concurrent
+    requests never exceeds ``concurrency``. Each worker waits on the client's
+    shared rate limiter before sending, so items are released as soon as
+    rate-limit budget frees up. If the client has a journal, every item is
+    recorded as queued when it enters the queue and in flight when a worker
+    picks it up.
+    """
+    def __init__(self, client: Any, concurrency: int = 10, report_every: int = 50, clients: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the engine.
+
+        :param client: The API client whose ``process_endpoint`` handles each item.
+        :param concurrency: Number of workers processing items concurrently.
+        :param report_every: Number of completed items per throughput report.
+        :param clients: Clients handling the endpoints of other sections, keyed by section, e.g. {'routes': routes_client}.
+        """
+        self.client = client
+        self.clients = clients or {}
+        self.concurrency = max(concurrency, 1)
+        self.report_every = max(report_every, 1)
+        self.journal = getattr(client, 'journal', None)
+        self.metrics = getattr(client, 'metrics', None)
+
+    async def run(self, ids: Iterable[int], endpoint_config: EndpointConfig) -> BatchStats:
+        """
+        Fetch and save every ID of a list with the given endpoint configuration.
+
+        :param ids: The IDs to process.
+        :param endpoint_config: The endpoint configuration to use.
+        :return: The statistics of the run.
+        """
+        ids = list(ids)
+        if self.journal is not None:
+            self.journal.queue(endpoint_config.endpoint_name, ids)
+        return await self.run_stream(_iterate(ids, endpoint_config), journal_queued=True)
+
+    async def run_stream(self, items: AsyncIterable[Tuple[int, EndpointConfig]], journal_queued: bool = False) -> BatchStats:
+        """
+        Fetch and save work items as they are produced by an async iterable.
+
+        :param items: Async iterable of ``(id, EndpointConfig)`` pairs.
+        :param journal_queued: The items are already recorded as queued in the journal.
+        :return: The statistics of the run.
+        """
+        stats = BatchStats()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        batch = {'count': 0, 'started_at': time.time()}
+
+        def report(final: bool = False) -> None:
+            elapsed = time.time() - batch['started_at']
+            rate = batch['count'] / elapsed if elapsed else 0.0
+            label = "Final batch" if final else "Batch"
+            logging.info(f"{label}: {batch['count']} items in {elapsed:.2f} seconds ({rate:.1f} items/s, "
+                         f"{stats.total} done, rate limit remaining: {self.client.rate_limiter.remaining()})")
+            batch['count'] = 0
+            batch['started_at'] = time.time()
+            if self.metrics is not None:
+                self.metrics.set_gauge('strava_items_per_second', rate)
+
+        async def worker() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    queue.task_done()
+                    return
+                item_id, endpoint_config = item
+                if self.metrics is not None:
+                    self.metrics.set_gauge('strava_queue_depth', queue.qsize())
+                if self.journal is not None:
+                    self.journal.start(endpoint_config.endpoint_name, item_id)
+                try:
+                    client = self.clients.get(endpoint_config.section, self.client)
+                    result = await client.process_endpoint(item_id, endpoint_config)
+                finally:
+                    queue.task_done()
+                stats.total += 1
+                if result is not None:
+                    stats.fetched += 1
+                else:
+                    stats.not_fetched += 1
+                if self.metrics is not None:
+                    self.metrics.inc('strava_items_total', {'endpoint': endpoint_config.endpoint_name,
+                                                            'outcome': 'fetched' if result is not None else 'skipped_or_failed'})
+                batch['count'] += 1
+                if batch['count'] >= self.report_every:
+                    report()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            async for item in items:
+                if self.journal is not None and not journal_queued:
+                    self.journal.queue(item[1].endpoint_name, [item[0]])
+                await queue.put(item)
+                if self.metrics is not None:
+                    self.metrics.set_gauge('strava_queue_depth', queue.qsize())
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+        if batch['count']:
+            report(final=True)
+        stats.elapsed = time.time() - stats.started_at
+        logging.info(f"Processed {stats.total} items ({stats.fetched} fetched, {stats.not_fetched} skipped or failed) "
+                     f"in {stats.elapsed:.2f} seconds ({stats.items_per_second:.1f} items/s)")
+        return stats
@@ -0,0 +1,105 @@
+import logging
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+from .endpoint_config import EndpointConfig
+
+class CallPlanner:
+    """
+    Decides which endpoint requests are actually needed for each listed item.
+
+    Endpoints whose response is contained in another requested endpoint
+    (laps in the detailed activity, see ``EndpointConfig.derives``) are not
+    requested; their files are extracted locally once the containing response
+    is available. Endpoints whose summary count is 0 (``empty_when_zero``,
+    e.g. kudos and comments) are saved as empty lists without a request.
+    When the client has a ``ChangeDetector``, every planned endpoint is
+    checked against the listed summary so stale files are refreshed.
+    """
+    def __init__(self, client: Any, endpoints: List[EndpointConfig]):
+        """
+        Initialize the CallPlanner.
+
+        :param client: The API client used to save the files produced locally.
+        :param endpoints: The endpoints requested for every item.
+        """
+        self.client = client
+        self.endpoints = endpoints
+        self.derived: Dict[str, List[EndpointConfig]] = {}
+        requested = {endpoint.endpoint_name: endpoint for endpoint in endpoints}
+        for endpoint in endpoints:
+            targets = [requested[name] for name in endpoint.derives if name in requested and name != endpoint.endpoint_name]
+            if targets:
+                self.derived[endpoint.endpoint_name] = targets
+        self._derived_names = {target.endpoint_name for targets in self.derived.values() for target in targets}
+        self.counts = {'requested': 0, 'derived': 0, 'empty': 0}
+        self.change_detector = getattr(client, 'change_detector', None)
+
+    async def plan(self, summary: Dict[str, Any]) -> List[EndpointConfig]:
+        """
+        Return the endpoints to request for an item, saving the empty responses known from its summary.
+
+        :param summary: The listed item, e.g. an activity summary.
+        :return: The endpoints that need an API request.
+        """
+        item_id = summary['id']
+        requests = []
+        for endpoint in self.endpoints:
+            stale = self.change_detector is not None and self.change_detector.check(summary, endpoint)
+            if endpoint.endpoint_name in self._derived_names:
+                continue
+            if endpoint.empty_when_zero and summary.get(endpoint.empty_when_zero) == 0:
+                filename = endpoint.filename_template(item_id)
+                if stale or not self.client.manifest.contains(endpoint.section, filename):
+                    await self.client.save_json_to_file_async([], filename, endpoint.section, item_id=item_id, endpoint=endpoint.endpoint_name,
+                                                              on_written=partial(self._written, endpoint, item_id))
+                    self.counts['empty'] += 1
+                else:
+                    self._written(endpoint, item_id, True)
+                continue
+            requests.append(endpoint)
+        self.counts['requested'] += len(requests)
+        return requests
+
+    def derived_from(self, endpoint_config: EndpointConfig) -> List[EndpointConfig]:
+        """
+        Return the requested endpoints extracted from the response of an endpoint.
+
+        :param endpoint_config: The endpoint whose response is available.
+        :return: The endpoints to extract locally.
+        """
+        return self.derived.get(endpoint_config.endpoint_name, [])
+
+    async def save_derived(self, item_id: int, endpoint_config: EndpointConfig, data: Optional[Any]) -> None:
+        """
+        Extract and save the files derived from a response.
+
+        :param item_id: The ID of the item.
+        :param endpoint_config: The endpoint of the response.
+        :param data: The response data, or None to read the saved response.
+        """
+        for target in self.derived_from(endpoint_config):
+            filename = target.filename_template(item_id)
+            stale = self.change_detector is not None and self.change_detector.is_forced(target, item_id)
+            if not stale and self.client.manifest.contains(target.section, filename):
+                self._written(target, item_id, True)
+                continue
+            if data is None:
+                data = self.client.load_json_from_file(endpoint_config.filename_template(item_id), endpoint_config.section)
+                if data is None:
+                    return
+            derived = endpoint_config.derives[target.endpoint_name](data)
+            if derived is None:
+                continue
+            await self.client.save_json_to_file_async(derived, filename, target.section, item_id=item_id, endpoint=target.endpoint_name,
+                                                      on_written=partial(self._written, target, item_id))
+            self.counts['derived'] += 1
+
+    def _written(self, endpoint_config: EndpointConfig, item_id: int, success: bool) -> None:
+        if success and self.change_detector is not None:
+            self.change_detector.commit(endpoint_config, item_id)
+
+    def log_summary(self) -> None:
+        saved = self.counts['derived'] + self.counts['empty']
+        logging.info(f"Call planner: {self.counts['requested']} requests planned, {self.counts['derived']} files derived "
+                     f"and {self.counts['empty']} empty files written locally ({saved} API calls saved)")
@@ -0,0 +1,115 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .endpoint_config import EndpointConfig
+from .storage import DATA_DIR
+
+FINGERPRINTS_FILENAME = 'fingerprints.json'
+
+def fingerprint(summary: Dict[str, Any], fields: Tuple[str, ...]) -> str:
+    """
+    Hash the values of some fields of a summary.
+
+    :param summary: The listed item, e.g. an activity summary.
+    :param fields: The fields to hash.
+    :return: A short hex digest.
+    """
+    values = json.dumps([summary.get(name) for name in fields], separators=(',', ':'), default=str)
+    return hashlib.sha1(values.encode('utf-8')).hexdigest()[:16]
+
+class ChangeDetector:
+    """
+    Detects listed items whose saved responses are stale.
+
+    For every (endpoint, item) saved, a fingerprint of the summary fields
+    listed in ``EndpointConfig.refresh_on`` is kept in
+    ``data/fingerprints.json``. When the same item is listed again with a
+    different fingerprint (an edited name, a cropped activity, a new kudo),
+    only that endpoint is fetched again; everything else is skipped because
+    its file exists. Only items inside the listed window are checked, so
+    edits to older activities are seen when ``lookback_days`` covers them.
+    """
+    def __init__(self, data_dir: str = DATA_DIR):
+        """
+        Initialize the ChangeDetector and load the persisted fingerprints.
+
+        :param data_dir: Root of the data directory.
+        """
+        self.path = os.path.join(data_dir, FINGERPRINTS_FILENAME)
+        self.fingerprints: Dict[str, Dict[str, str]] = {}
+        self._pending: Dict[Tuple[str, int], str] = {}
+        self._forced = set()
+        self._lock = threading.Lock()
+        self.changed_count = 0
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as file:
+                    self.fingerprints = json.load(file)
+            except Exception as e:
+                logging.error("Error loading fingerprints: %s", e)
+
+    def check(self, summary: Dict[str, Any], endpoint_config: EndpointConfig) -> bool:
+        """
+        Compare a listed summary with the fingerprint of the saved response of an endpoint.
+
+        The new fingerprint is kept pending until the endpoint is saved, so a
+        refresh that fails is detected again on the next run.
+
+        :param summary: The listed item.
+        :param endpoint_config: The endpoint to check.
+        :return: True if the saved response is stale and must be fetched again.
+        """
+        if not endpoint_config.refresh_on:
+            return False
+        item_id = summary['id']
+        name = endpoint_config.endpoint_name
+        current = fingerprint(summary, endpoint_config.refresh_on)
+        with self._lock:
+            stored = self.fingerprints.get(str(item_id), {}).get(name)
+            self._pending[(name, item_id)] = current
+            changed = stored is not None and stored != current
+            if changed:
+                self._forced.add((name, item_id))
+                self.changed_count += 1
+        if changed:
+            logging.info(f"Activity {item_id} changed, refreshing its {name}")
+        return changed
+
+    def is_forced(self, endpoint_config: EndpointConfig, item_id: int) -> bool:
+        """
+        Return whether an endpoint must be fetched again even though its file exists.
+
+        :param endpoint_config: The endpoint.
+        :param item_id: The item ID.
+        :return: True if the summary changed since the file was saved.
+        """
+        return (endpoint_config.endpoint_name, item_id) in self._forced
+
+    def commit(self, endpoint_config: EndpointConfig, item_id: int) -> None:
+        """
+        Record the pending fingerprint of an endpoint once its response is saved or known to be current.
+
+        :param endpoint_config: The endpoint.
+        :param item_id: The item ID.
+        """
+        key = (endpoint_config.endpoint_name, item_id)
+        with self._lock:
+            current = self._pending.pop(key, None)
+            self._forced.discard(key)
+            if current is not None:
+                self.fingerprints.setdefault(str(item_id), {})[endpoint_config.endpoint_name] = current
+
+    def save(self) -> None:
+        """Persist the fingerprints."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(temp_path, "w") as file:
+                json.dump(self.fingerprints, file, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+        if self.changed_count:
+            logging.info(f"Change detection: {self.changed_count} stale responses queued for refresh")
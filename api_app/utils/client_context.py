@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .endpoint_config import API_BASE_URL
+from .http_transport import HTTPTransport
+from .manifest import DataManifest
+from .rate_limiter import RateLimiter
+from .retry_policy import RetryPolicy, DeadLetterQueue
+from .stream_store import StreamStore
+from .tracing import NULL_TRACER
+
+@dataclass
+class ClientContext:
+    """
+    The services shared by the API clients of one sync.
+
+    An ``APIManager`` builds one context and hands it to each of its
+    clients, so they share the connection pool, the rate-limit budget, the
+    data directory and the bookkeeping of the run. Services left unset get
+    a private default, and the optional ones stay disabled.
+
+    :param transport: Connection-pooled transport. A private one is created if omitted.
+    :param rate_limiter: Rate-limit governor. A private one is created if omitted.
+    :param storage: Storage backend used by the save methods. Defaults to the manifest's storage.
+    :param manifest: Index of the data directory. A private one is loaded if omitted.
+    :param local_store: Optional ``LocalStore`` that fetched responses are also written to.
+    :param stream_store: Binary store of activity streams. One under the manifest's data directory is used if omitted.
+    :param retry_policy: Backoff policy for transient failures. Default policy if omitted.
+    :param dead_letters: List of requests that failed after every retry. One under the manifest's data directory is used if omitted.
+    :param journal: Optional ``SyncJournal`` recording the state of every work item, so interrupted runs can be resumed.
+    :param change_detector: Optional ``ChangeDetector`` forcing a new fetch of responses whose listed summary changed.
+    :param response_cache: Optional ``ResponseCache`` serving rarely changing responses (athlete, stats, clubs, routes) without a request.
+    :param writer: Optional ``WriteBehindWriter`` the async saves are queued to instead of writing each file in its own thread.
+    :param token_refresher: Optional ``TokenRefresher`` providing the current access token and renewing it after a 401.
+    :param metrics: Optional ``MetricsRegistry`` recording the latency, size and status of every request.
+    :param tracer: Optional ``Tracer`` timing the requests, rate-limit waits, decoding and saves as spans.
+    :param base_url: The API base URL, e.g. of a local fake server. Defaults to the Strava API.
+    """
+    transport: Optional[HTTPTransport] = None
+    rate_limiter: Optional[RateLimiter] = None
+    storage: Optional[Any] = None
+    manifest: Optional[DataManifest] = None
+    local_store: Optional[Any] = None
+    stream_store: Optional[StreamStore] = None
+    retry_policy: Optional[RetryPolicy] = None
+    dead_letters: Optional[DeadLetterQueue] = None
+    journal: Optional[Any] = None
+    change_detector: Optional[Any] = None
+    response_cache: Optional[Any] = None
+    writer: Optional[Any] = None
+    token_refresher: Optional[Any] = None
+    metrics: Optional[Any] = None
+    tracer: Optional[Any] = None
+    base_url: Optional[str] = None
+
+    def __post_init__(self):
+        self.transport = self.transport or HTTPTransport()
+        self.rate_limiter = self.rate_limiter or RateLimiter()
+        if self.manifest is None:
+            self.manifest = DataManifest(self.storage)
+        self.storage = self.storage or self.manifest.storage
+        self.stream_store = self.stream_store or StreamStore(self.manifest.data_dir)
+        self.retry_policy = self.retry_policy or RetryPolicy()
+        if self.dead_letters is None:
+            self.dead_letters = DeadLetterQueue(self.manifest.data_dir)
+        self.tracer = self.tracer or NULL_TRACER
+        self.base_url = (self.base_url or API_BASE_URL).rstrip('/')
@@ -0,0 +1,243 @@
+import os
+import json
+import logging
+import time
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+
+from .endpoint_config import StravaEndpoints
+from .manifest import DataManifest
+from .sync_state import parse_strava_date
+
+EXPORT_DIRNAME = 'export'
+EXPORT_STATE_FILENAME = 'export_state.json'
+EXPORT_FORMATS = ('parquet', 'arrow')
+
+ACTIVITY_FIELDS = [
+    ('id', 'int64'), ('athlete_id', 'int64'), ('name', 'string'), ('sport_type', 'string'), ('type', 'string'), ('start_date', 'timestamp'),
+    ('start_date_local', 'timestamp'), ('timezone', 'string'), ('distance', 'float64'), ('moving_time', 'int64'),
+    ('elapsed_time', 'int64'), ('total_elevation_gain', 'float64'), ('average_speed', 'float64'), ('max_speed', 'float64'),
+    ('average_heartrate', 'float64'), ('max_heartrate', 'float64'), ('average_watts', 'float64'),
+    ('weighted_average_watts', 'float64'), ('kilojoules', 'float64'), ('average_cadence', 'float64'),
+    ('calories', 'float64'), ('kudos_count', 'int64'), ('comment_count', 'int64'), ('gear_id', 'string')
+]
+
+LAP_FIELDS = [
+    ('id', 'int64'), ('activity_id', 'int64'), ('lap_index', 'int32'), ('name', 'string'), ('start_date', 'timestamp'),
+    ('distance', 'float64'), ('moving_time', 'int64'), ('elapsed_time', 'int64'), ('total_elevation_gain', 'float64'),
+    ('average_speed', 'float64'), ('max_speed', 'float64'), ('average_heartrate', 'float64'),
+    ('max_heartrate', 'float64'), ('average_watts', 'float64'), ('average_cadence', 'float64')
+]
+
+SEGMENT_EFFORT_FIELDS = [
+    ('id', 'int64'), ('activity_id', 'int64'), ('segment_id', 'int64'), ('name', 'string'), ('start_date', 'timestamp'),
+    ('distance', 'float64'), ('moving_time', 'int64'), ('elapsed_time', 'int64'), ('average_heartrate', 'float64'),
+    ('average_watts', 'float64'), ('pr_rank', 'int32'), ('kom_rank', 'int32')
+]
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.ipc
+    except ImportError as e:
+        raise ImportError("The columnar export requires pyarrow. Install it with: pip install 'strava-api[export]'") from e
+    return pyarrow
+
+def _schema(pa: Any, fields: List[Tuple[str, str]]) -> Any:
+    types = {
+        'int32': pa.int32(),
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'string': pa.string(),
+        'timestamp': pa.timestamp('s', tz='UTC')
+    }
+    return pa.schema([pa.field(name, types[type_name]) for name, type_name in fields])
+
+def _row(record: Dict[str, Any], fields: List[Tuple[str, str]], **overrides) -> Dict[str, Any]:
+    row = {}
+    for name, type_name in fields:
+        value = overrides[name] if name in overrides else record.get(name)
+        if type_name == 'timestamp' and isinstance(value, str):
+            value = parse_strava_date(value)
+        row[name] = value
+    return row
+
+def partition_of(activity: Dict[str, Any]) -> Optional[str]:
+    """
+    Return the Hive-style partition path of an activity.
+
+    :param activity: An activity summary or detailed activity.
+    :return: The partition, e.g. 'year=2024/sport_type=Ride', or None if the activity has no start date.
+    """
+    start_date = activity.get('start_date')
+    if not start_date:
+        return None
+    sport_type = activity.get('sport_type') or activity.get('type') or 'Unknown'
+    return f"year={start_date[:4]}/sport_type={sport_type}"
+
+class ColumnarExporter:
+    """
+    Incremental export of activities, laps and segment efforts to partitioned columnar files.
+
+    Files are written per ``year=YYYY/sport_type=X`` partition under
+    ``data/export/<table>/``, as Parquet or Arrow IPC, with explicit schemas.
+    The export state records which partition every activity belongs to and
+    when its files were fetched, so a run only re-exports partitions that
+    changed since the previous one. Records are streamed from the storage
+    backend partition by partition, never holding the whole history in memory.
+    """
+    def __init__(self, manifest: Optional[DataManifest] = None, output_dir: Optional[str] = None, export_format: str = 'parquet', row_group_size: int = 10000):
+        """
+        Initialize the ColumnarExporter.
+
+        :param manifest: Index of the saved data. The default data directory is indexed if omitted.
+        :param output_dir: Root of the exported files. Defaults to ``data/export``.
+        :param export_format: 'parquet' or 'arrow'.
+        :param row_group_size: Number of rows buffered before a row group is written.
+        :raises ValueError: If the export format is unknown.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Invalid export format: {export_format}. Allowed formats are: {', '.join(EXPORT_FORMATS)}")
+        self.manifest = manifest if manifest is not None else DataManifest()
+        self.storage = self.manifest.storage
+        self.output_dir = output_dir or os.path.join(self.manifest.data_dir, EXPORT_DIRNAME)
+        self.export_format = export_format
+        self.row_group_size = row_group_size
+        self.state_path = os.path.join(self.output_dir, EXPORT_STATE_FILENAME)
+        self.state: Dict[str, Any] = {'activities': {}}
+        self._load_state()
+
+    def _load_state(self) -> None:
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r") as file:
+                    self.state = json.load(file)
+            except Exception as e:
+                logging.error("Error loading export state, exporting everything: %s", e)
+
+    def _save_state(self) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.state, file)
+        os.replace(temp_path, self.state_path)
+
+    def _fetched_at(self, filename: str) -> float:
+        entry = self.manifest.get('activities', filename)
+        return entry['fetched_at'] if entry else 0.0
+
+    def _plan(self, full: bool) -> Tuple[Set[str], Dict[str, List[int]]]:
+        """Find the partitions to re-export and the members of every partition."""
+        known = self.state.setdefault('activities', {})
+        summaries = {activity['id']: activity for activity in (self.storage.read('activities', 'athlete_activities_data.json') or [])}
+        activity_ids = set(self.manifest.ids_for(StravaEndpoints.ACTIVITIES.endpoint_name, 'activities'))
+        activity_ids |= set(self.manifest.ids_for(StravaEndpoints.ACTIVITIES_LAPS.endpoint_name, 'activities'))
+
+        dirty: Set[str] = set()
+        for activity_id in activity_ids:
+            fetched_at = max(self._fetched_at(StravaEndpoints.ACTIVITIES.filename_template(activity_id)),
+                             self._fetched_at(StravaEndpoints.ACTIVITIES_LAPS.filename_template(activity_id)))
+            previous = known.get(str(activity_id))
+            if not full and previous and previous['fetched_at'] >= fetched_at:
+                continue
+            activity = self.storage.read('activities', StravaEndpoints.ACTIVITIES.filename_template(activity_id)) or summaries.get(activity_id)
+            partition = partition_of(activity) if activity else None
+            if partition is None:
+                logging.warning(f"Skipping export of activity {activity_id}: no start date available")
+                continue
+            dirty.add(partition)
+            if previous and previous['partition'] != partition:
+                dirty.add(previous['partition'])
+            known[str(activity_id)] = {'partition': partition, 'fetched_at': fetched_at}
+
+        members: Dict[str, List[int]] = {}
+        for activity_id, entry in known.items():
+            members.setdefault(entry['partition'], []).append(int(activity_id))
+        return dirty, members
+
+    def _iter_partition(self, activity_ids: List[int]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for activity_id in sorted(activity_ids):
+            activity = self.storage.read('activities', StravaEndpoints.ACTIVITIES.filename_template(activity_id))
+            laps = self.storage.read('activities', StravaEndpoints.ACTIVITIES_LAPS.filename_template(activity_id))
+            if activity:
+                athlete_id = (activity.get('athlete') or {}).get('id')
+                yield 'activities', _row(activity, ACTIVITY_FIELDS, athlete_id=athlete_id)
+                for effort in activity.get('segment_efforts') or []:
+                    segment_id = (effort.get('segment') or {}).get('id')
+                    yield 'segment_efforts', _row(effort, SEGMENT_EFFORT_FIELDS, activity_id=activity_id, segment_id=segment_id)
+                if laps is None:
+                    laps = activity.get('laps')
+            for lap in laps or []:
+                yield 'laps', _row(lap, LAP_FIELDS, activity_id=activity_id)
+
+    def _write_partition(self, pa: Any, partition: str, activity_ids: List[int]) -> Dict[str, int]:
+        schemas = {
+            'activities': _schema(pa, ACTIVITY_FIELDS),
+            'laps': _schema(pa, LAP_FIELDS),
+            'segment_efforts': _schema(pa, SEGMENT_EFFORT_FIELDS)
+        }
+        extension = 'parquet' if self.export_format == 'parquet' else 'arrow'
+        writers: Dict[str, Any] = {}
+        buffers: Dict[str, List[Dict[str, Any]]] = {table: [] for table in schemas}
+        counts = {table: 0 for table in schemas}
+        paths = {table: os.path.join(self.output_dir, table, partition, f"part-0.{extension}") for table in schemas}
+
+        def write_rows(table: str) -> None:
+            if not buffers[table]:
+                return
+            batch = pa.Table.from_pylist(buffers[table], schema=schemas[table])
+            if table not in writers:
+                os.makedirs(os.path.dirname(paths[table]), exist_ok=True)
+                temp_path = f"{paths[table]}.tmp"
+                if self.export_format == 'parquet':
+                    writers[table] = pa.parquet.ParquetWriter(temp_path, schemas[table], compression='zstd')
+                else:
+                    writers[table] = pa.ipc.new_file(temp_path, schemas[table])
+            writers[table].write_table(batch)
+            counts[table] += len(buffers[table])
+            buffers[table] = []
+
+        for table, row in self._iter_partition(activity_ids):
+            buffers[table].append(row)
+            if len(buffers[table]) >= self.row_group_size:
+                write_rows(table)
+        for table in schemas:
+            write_rows(table)
+            if table in writers:
+                writers[table].close()
+                os.replace(f"{paths[table]}.tmp", paths[table])
+            elif os.path.exists(paths[table]):
+                os.remove(paths[table])
+        return counts
+
+    def export(self, full: bool = False) -> Dict[str, Dict[str, int]]:
+        """
+        Export the partitions that changed since the previous export.
+
+        :param full: Re-export every partition.
+        :return: The number of rows written per table, keyed by partition.
+        """
+        pa = _import_pyarrow()
+        start_time = time.time()
+        dirty, members = self._plan(full)
+        logging.info(f"Exporting {len(dirty)} changed partitions out of {len(members)} as {self.export_format}")
+
+        results = {}
+        for partition in sorted(dirty):
+            results[partition] = self._write_partition(pa, partition, members.get(partition, []))
+            logging.info(f"Exported {partition}: {results[partition]}")
+
+        self._save_state()
+        logging.info(f"Columnar export completed in {time.time() - start_time:.2f} seconds")
+        return results
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Export saved activities, laps and segment efforts to partitioned columnar files.")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='parquet', help="Columnar file format")
+    parser.add_argument('--output-dir', default=None, help="Root of the exported files")
+    parser.add_argument('--full', action='store_true', help="Re-export every partition")
+    args = parser.parse_args()
+    ColumnarExporter(output_dir=args.output_dir, export_format=args.format).export(full=args.full)
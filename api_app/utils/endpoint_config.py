@@ -1,74 +1,147 @@
-from dataclasses import dataclass
-from typing import Callable
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+API_BASE_URL = "https://www.strava.com/api/v3"
 
 @dataclass
 class EndpointConfig:
-    url_template: Callable[[int], str]
+    # Path of the endpoint for an item ID, relative to the API base URL
+    path_template: Callable[[int], str]
     filename_template: Callable[[int], str]
     endpoint_name: str
     section: str
+    payload: str = 'json'
+    # Name of the listing whose items provide the IDs of this endpoint, e.g. 'activities'
+    depends_on: Optional[str] = None
+    # Other endpoints whose response can be extracted from this one, keyed by endpoint name
+    derives: Dict[str, Callable[[Any], Any]] = field(default_factory=dict)
+    # Summary field that, when 0, means this endpoint would return an empty list
+    empty_when_zero: Optional[str] = None
+    # Summary fields whose change means the saved response is stale and must be fetched again
+    refresh_on: Tuple[str, ...] = ()
+
+    def url(self, item_id: int, base_url: str = API_BASE_URL) -> str:
+        """
+        Build the URL of the endpoint for an item.
+
+        :param item_id: The ID of the item, e.g. an activity ID.
+        :param base_url: The API base URL, e.g. of a local fake server.
+        :return: The URL.
+        """
+        return f"{base_url.rstrip('/')}{self.path_template(item_id)}"
+
+# Summary fields that change when an activity is edited or cropped
+ACTIVITY_EDIT_FIELDS = ('name', 'sport_type', 'distance', 'moving_time', 'elapsed_time', 'total_elevation_gain',
+                        'gear_id', 'private', 'commute', 'trainer', 'workout_type')
+ACTIVITY_CROP_FIELDS = ('distance', 'moving_time', 'elapsed_time')
 
 class StravaEndpoints:
     ACTIVITIES = EndpointConfig(
-        url_template=lambda aid: f"https://www.strava.com/api/v3/activities/{aid}?include_all_efforts=true",
+        path_template=lambda aid: f"/activities/{aid}?include_all_efforts=true",
         filename_template=lambda aid: f"activity_{aid}.json",
         endpoint_name="detailed activity",
-        section="activities"
+        section="activities",
+        depends_on="activities",
+        derives={"laps": lambda activity: activity.get("laps")},
+        refresh_on=ACTIVITY_EDIT_FIELDS
     )
 
     ACTIVITIES_LAPS = EndpointConfig(
-        url_template=lambda aid: f"https://www.strava.com/api/v3/activities/{aid}/laps",
+        path_template=lambda aid: f"/activities/{aid}/laps",
         filename_template=lambda aid: f"activity_{aid}_laps.json",
         endpoint_name="laps",
-        section="activities"
+        section="activities",
+        depends_on="activities",
+        refresh_on=ACTIVITY_CROP_FIELDS
     )
 
-    # 402, Payment Required
+    # 402, Payment Required: computed locally from the activity streams when a ZoneEngine is configured
     ACTIVITIES_ZONES = EndpointConfig(
-        url_template=lambda aid: f"https://www.strava.com/api/v3/activities/{aid}/zones",
+        path_template=lambda aid: f"/activities/{aid}/zones",
         filename_template=lambda aid: f"activity_{aid}_zones.json",
         endpoint_name="zones",
-        section="activities"
+        section="activities",
+        depends_on="activities",
+        payload="zones",
+        refresh_on=ACTIVITY_CROP_FIELDS
     )
 
     ACTIVITIES_COMMENTS = EndpointConfig(
-        url_template=lambda aid: f"https://www.strava.com/api/v3/activities/{aid}/comments",
+        path_template=lambda aid: f"/activities/{aid}/comments",
         filename_template=lambda aid: f"activity_{aid}_comments.json",
         endpoint_name="comments",
-        section="activities"
+        section="activities",
+        depends_on="activities",
+        empty_when_zero="comment_count",
+        refresh_on=("comment_count",)
     )
 
     ACTIVITIES_KUDOS = EndpointConfig(
-        url_template=lambda aid: f"https://www.strava.com/api/v3/activities/{aid}/kudos",
+        path_template=lambda aid: f"/activities/{aid}/kudos",
         filename_template=lambda aid: f"activity_{aid}_kudos.json",
         endpoint_name="kudos",
-        section="activities"
+        section="activities",
+        depends_on="activities",
+        empty_when_zero="kudos_count",
+        refresh_on=("kudos_count",)
+    )
+
+    ACTIVITIES_STREAMS = EndpointConfig(
+        path_template=lambda aid: f"/activities/{aid}/streams?keys=time,distance,latlng,altitude,velocity_smooth,heartrate,cadence,watts,temp,moving,grade_smooth&key_by_type=true",
+        filename_template=lambda aid: f"activity_{aid}.strm",
+        endpoint_name="streams",
+        section="activities",
+        depends_on="activities",
+        payload="streams",
+        refresh_on=ACTIVITY_CROP_FIELDS
     )
 
     ROUTES = EndpointConfig(
-        url_template=lambda rid: f"https://www.strava.com/api/v3/routes/{rid}",
+        path_template=lambda rid: f"/routes/{rid}",
         filename_template=lambda rid: f"route_{rid}.json",
         endpoint_name="route",
-        section="routes"
+        section="routes",
+        depends_on="routes"
     )
 
     CLUBS = EndpointConfig(
-        url_template=lambda cid: f"https://www.strava.com/api/v3/clubs/{cid}",
+        path_template=lambda cid: f"/clubs/{cid}",
         filename_template=lambda cid: f"club_{cid}.json",
         endpoint_name="club",
-        section="clubs"
+        section="clubs",
+        depends_on="clubs"
     )
 
     CLUB_MEMBERS = EndpointConfig(
-        url_template=lambda cid: f"https://www.strava.com/api/v3/clubs/{cid}/members",
+        path_template=lambda cid: f"/clubs/{cid}/members",
         filename_template=lambda cid: f"club_{cid}_members.json",
         endpoint_name="club members",
-        section="clubs"
+        section="clubs",
+        depends_on="clubs"
     )
 
     CLUB_ACTIVITIES = EndpointConfig(
-        url_template=lambda cid: f"https://www.strava.com/api/v3/clubs/{cid}/activities",
+        path_template=lambda cid: f"/clubs/{cid}/activities",
         filename_template=lambda cid: f"club_{cid}_activities.json",
         endpoint_name="club activities",
-        section="clubs"
-    )
\ No newline at end of file
+        section="clubs",
+        depends_on="clubs"
+    )
+    @classmethod
+    def all(cls) -> List[EndpointConfig]:
+        """
+        Return every endpoint configuration defined on this class.
+
+        :return: The list of endpoint configurations.
+        """
+        return [value for value in vars(cls).values() if isinstance(value, EndpointConfig)]
+
+    @classmethod
+    def by_name(cls, endpoint_name: str) -> Optional[EndpointConfig]:
+        """
+        Look up an endpoint configuration by its endpoint name.
+
+        :param endpoint_name: The endpoint name, e.g. 'laps'.
+        :return: The endpoint configuration, or None if no endpoint has that name.
+        """
+        return next((config for config in cls.all() if config.endpoint_name == endpoint_name), None)
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from typing import Any, Optional
+
+class HTTPTransport:
+    """
+    Connection-pooled HTTP transport shared by every API client.
+
+    Holds one long-lived ``requests.Session`` for synchronous calls and one
+    ``aiohttp.ClientSession`` per event loop for asynchronous calls, so
+    consecutive requests to the Strava API reuse their TCP + TLS connections.
+    Both libraries are imported when their first session is created.
+    """
+    def __init__(
+            self,
+            limit: int = 100,
+            limit_per_host: int = 20,
+            keepalive_timeout: float = 60.0,
+            dns_cache_ttl: int = 300,
+            timeout: float = 30.0
+    ):
+        """
+        Initialize the transport with its connection pool configuration.
+
+        :param limit: Total number of simultaneous connections in the async pool.
+        :param limit_per_host: Maximum number of simultaneous connections to a single host.
+        :param keepalive_timeout: Seconds an idle connection is kept open for reuse.
+        :param dns_cache_ttl: Seconds a resolved DNS entry is cached.
+        :param timeout: Total timeout in seconds for a single request.
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = timeout
+
+        self._session: Optional[Any] = None
+        self._async_session: Optional[Any] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def session(self) -> Any:
+        """
+        The pooled ``requests.Session``, created on first use.
+
+        :return: The shared ``requests.Session``.
+        """
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.limit_per_host, pool_maxsize=self.limit_per_host)
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
+        return self._session
+
+    def get(self, url: str, **kwargs) -> Any:
+        """
+        Send a synchronous GET request through the pooled ``requests.Session``.
+
+        :param url: The URL to send the request to.
+        :return: The ``requests.Response`` object.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    async def get_async_session(self) -> Any:
+        """
+        Return the pooled ``aiohttp.ClientSession`` bound to the running event loop.
+
+        The session is created lazily and recreated if the previous one was
+        closed or belongs to a different event loop.
+
+        :return: The shared ``aiohttp.ClientSession``.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_session is None or self._async_session.closed or self._async_loop is not loop:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True
+            )
+            self._async_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._async_loop = loop
+            logging.info(f"Opened pooled HTTP session (limit={self.limit}, limit_per_host={self.limit_per_host})")
+        return self._async_session
+
+    async def close_async(self) -> None:
+        """
+        Close the asynchronous session, if one is open on the running event loop.
+        """
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+            logging.info("Closed pooled HTTP session")
+        self._async_session = None
+        self._async_loop = None
+
+    def close(self) -> None:
+        """
+        Close the synchronous session and release pooled connections.
+        """
+        if self._session is not None:
+            self._session.close()
+            self._session = None
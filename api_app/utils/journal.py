@@ -0,0 +1,166 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .storage import DATA_DIR
+
+JOURNAL_FILENAME = 'journal.db'
+
+QUEUED = 'queued'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    endpoint TEXT NOT NULL,
+    item_id INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (endpoint, item_id)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state);
+"""
+
+class SyncJournal:
+    """
+    Write-ahead journal of the state of every (endpoint, item) work item.
+
+    Items move through queued, in_flight and then done or failed. The
+    transitions are buffered in memory, collapsed per item, and committed to
+    ``data/journal.db`` in one transaction every ``batch_size`` transitions
+    or ``flush_interval`` seconds, so the fetch pipeline does not pay for a
+    commit per transition. After a crash the items that were queued or in
+    flight can be resumed without re-planning the run from a fresh listing.
+    Transitions lost with the last batch are harmless: an item recorded as
+    queued that was in fact done finds its file and is skipped.
+    """
+    def __init__(self, path: Optional[str] = None, batch_size: int = 500, flush_interval: float = 2.0):
+        """
+        Initialize the SyncJournal and create its schema if needed.
+
+        :param path: Path of the SQLite database. Defaults to ``data/journal.db``.
+        :param batch_size: Number of buffered transitions that triggers a commit.
+        :param flush_interval: Longest time in seconds a transition stays buffered, checked on each transition.
+        """
+        self.path = path or os.path.join(DATA_DIR, JOURNAL_FILENAME)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, int], List] = {}
+        self._transitions = 0
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _set_state(self, rows: Iterable[Tuple[str, int]], state: str, count_attempt: bool = False) -> None:
+        now = time.time()
+        with self._lock:
+            for key in rows:
+                entry = self._pending.get(key)
+                if entry is None:
+                    self._pending[key] = [state, int(count_attempt), now]
+                else:
+                    entry[0] = state
+                    entry[1] += int(count_attempt)
+                    entry[2] = now
+                self._transitions += 1
+            should_flush = self._transitions >= self.batch_size or time.monotonic() - self._flushed_at >= self.flush_interval
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Commit the buffered transitions in a single transaction.
+
+        :return: The number of items written.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._transitions = 0
+            self._flushed_at = time.monotonic()
+            if not pending:
+                return 0
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT INTO jobs (endpoint, item_id, state, attempts, updated_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (endpoint, item_id) DO UPDATE SET state = excluded.state, "
+                    "attempts = attempts + excluded.attempts, updated_at = excluded.updated_at",
+                    [(endpoint, item_id, state, attempts, updated_at) for (endpoint, item_id), (state, attempts, updated_at) in pending.items()]
+                )
+        return len(pending)
+
+    def queue(self, endpoint: str, item_ids: Iterable[int]) -> None:
+        """
+        Record items as queued.
+
+        :param endpoint: The endpoint name.
+        :param item_ids: The IDs of the queued items.
+        """
+        self._set_state(((endpoint, item_id) for item_id in item_ids), QUEUED)
+
+    def start(self, endpoint: str, item_id: int) -> None:
+        """
+        Record an item as in flight.
+
+        :param endpoint: The endpoint name.
+        :param item_id: The item ID.
+        """
+        self._set_state([(endpoint, item_id)], IN_FLIGHT, count_attempt=True)
+
+    def finish(self, endpoint: str, item_id: int, success: bool = True) -> None:
+        """
+        Record an item as done or failed.
+
+        :param endpoint: The endpoint name.
+        :param item_id: The item ID.
+        :param success: Whether the item was saved or already present.
+        """
+        self._set_state([(endpoint, item_id)], DONE if success else FAILED)
+
+    def pending(self) -> List[Tuple[str, int]]:
+        """
+        Return the items left queued or in flight by an interrupted run.
+
+        :return: ``(endpoint, item_id)`` pairs, oldest first.
+        """
+        self.flush()
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT endpoint, item_id FROM jobs WHERE state IN (?, ?) ORDER BY updated_at",
+                (QUEUED, IN_FLIGHT)
+            ).fetchall()
+        return [(endpoint, item_id) for endpoint, item_id in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Return the number of items in each state.
+
+        :return: Counts keyed by state.
+        """
+        self.flush()
+        with self._lock:
+            rows = self.connection.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return dict(rows)
+
+    def prune_done(self) -> int:
+        """
+        Delete the items recorded as done, which a resumed run never needs.
+
+        :return: The number of deleted items.
+        """
+        self.flush()
+        with self._lock, self.connection:
+            deleted = self.connection.execute("DELETE FROM jobs WHERE state = ?", (DONE,)).rowcount
+        return deleted
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self.connection.close()
@@ -0,0 +1,366 @@
+import os
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from .storage import DATA_DIR
+
+DATABASE_FILENAME = 'strava.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS activities (
+    id INTEGER PRIMARY KEY,
+    athlete_id INTEGER,
+    name TEXT,
+    sport_type TEXT,
+    type TEXT,
+    start_date TEXT,
+    start_date_local TEXT,
+    distance REAL,
+    moving_time INTEGER,
+    elapsed_time INTEGER,
+    total_elevation_gain REAL,
+    average_speed REAL,
+    max_speed REAL,
+    average_heartrate REAL,
+    max_heartrate REAL,
+    average_watts REAL,
+    kudos_count INTEGER,
+    comment_count INTEGER,
+    detailed INTEGER NOT NULL DEFAULT 0,
+    raw TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_activities_athlete ON activities (athlete_id);
+CREATE INDEX IF NOT EXISTS idx_activities_start_date ON activities (start_date);
+CREATE INDEX IF NOT EXISTS idx_activities_sport_type ON activities (sport_type, start_date);
+
+CREATE TABLE IF NOT EXISTS laps (
+    id INTEGER PRIMARY KEY,
+    activity_id INTEGER NOT NULL,
+    lap_index INTEGER,
+    name TEXT,
+    start_date TEXT,
+    distance REAL,
+    moving_time INTEGER,
+    elapsed_time INTEGER,
+    average_speed REAL,
+    average_heartrate REAL,
+    average_watts REAL,
+    raw TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_laps_activity ON laps (activity_id);
+
+CREATE TABLE IF NOT EXISTS segment_efforts (
+    id INTEGER PRIMARY KEY,
+    activity_id INTEGER NOT NULL,
+    segment_id INTEGER,
+    name TEXT,
+    start_date TEXT,
+    distance REAL,
+    moving_time INTEGER,
+    elapsed_time INTEGER,
+    pr_rank INTEGER,
+    kom_rank INTEGER,
+    raw TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_segment_efforts_activity ON segment_efforts (activity_id);
+CREATE INDEX IF NOT EXISTS idx_segment_efforts_segment ON segment_efforts (segment_id, elapsed_time);
+
+CREATE TABLE IF NOT EXISTS kudos (
+    activity_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    firstname TEXT,
+    lastname TEXT,
+    raw TEXT,
+    PRIMARY KEY (activity_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,
+    activity_id INTEGER NOT NULL,
+    athlete_firstname TEXT,
+    athlete_lastname TEXT,
+    text TEXT,
+    created_at TEXT,
+    raw TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_comments_activity ON comments (activity_id);
+
+CREATE TABLE IF NOT EXISTS clubs (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    sport_type TEXT,
+    member_count INTEGER,
+    city TEXT,
+    country TEXT,
+    raw TEXT
+);
+
+CREATE TABLE IF NOT EXISTS routes (
+    id INTEGER PRIMARY KEY,
+    athlete_id INTEGER,
+    name TEXT,
+    type INTEGER,
+    sub_type INTEGER,
+    distance REAL,
+    elevation_gain REAL,
+    created_at TEXT,
+    raw TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_routes_athlete ON routes (athlete_id);
+"""
+
+ACTIVITY_COLUMNS = [
+    'id', 'athlete_id', 'name', 'sport_type', 'type', 'start_date', 'start_date_local', 'distance',
+    'moving_time', 'elapsed_time', 'total_elevation_gain', 'average_speed', 'max_speed',
+    'average_heartrate', 'max_heartrate', 'average_watts', 'kudos_count', 'comment_count'
+]
+
+def _activity_row(activity: Dict[str, Any]) -> Tuple:
+    values = dict(activity, athlete_id=(activity.get('athlete') or {}).get('id'))
+    return tuple(values.get(column) for column in ACTIVITY_COLUMNS)
+
+def _lap_rows(activity_id: int, laps: Iterable[Dict[str, Any]]) -> List[Tuple]:
+    return [
+        (lap.get('id'), activity_id, lap.get('lap_index'), lap.get('name'), lap.get('start_date'), lap.get('distance'),
+         lap.get('moving_time'), lap.get('elapsed_time'), lap.get('average_speed'), lap.get('average_heartrate'),
+         lap.get('average_watts'), json.dumps(lap))
+        for lap in laps if lap.get('id') is not None
+    ]
+
+def _segment_effort_rows(activity_id: int, efforts: Iterable[Dict[str, Any]]) -> List[Tuple]:
+    return [
+        (effort.get('id'), activity_id, (effort.get('segment') or {}).get('id'), effort.get('name'), effort.get('start_date'),
+         effort.get('distance'), effort.get('moving_time'), effort.get('elapsed_time'), effort.get('pr_rank'),
+         effort.get('kom_rank'), json.dumps(effort))
+        for effort in efforts if effort.get('id') is not None
+    ]
+
+class LocalStore:
+    """
+    Embedded SQLite store of the downloaded Strava data.
+
+    Activities, laps, segment efforts, kudos, comments, clubs and routes are
+    normalized into indexed tables. The original JSON is kept in the ``raw``
+    column. Records are buffered and written in one transaction per flush,
+    so the fetch pipeline does not pay for one commit per item. From the
+    event loop, ``add_async`` runs the flush in a worker thread.
+    """
+    def __init__(self, path: Optional[str] = None, batch_size: int = 500):
+        """
+        Initialize the LocalStore and create its schema if needed.
+
+        :param path: Path of the SQLite database. Defaults to ``data/strava.db``.
+        :param batch_size: Number of buffered records that triggers a flush.
+        """
+        self.path = path or os.path.join(DATA_DIR, DATABASE_FILENAME)
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self._pending: List[Tuple[str, Any, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, endpoint_name: str, item_id: Any, data: Any) -> None:
+        """
+        Buffer a fetched API response for the next bulk write.
+
+        :param endpoint_name: The endpoint name of the response, e.g. 'detailed activity' or 'kudos'.
+        :param item_id: The ID the response was fetched for.
+        :param data: The response data.
+        """
+        if self._buffer(endpoint_name, item_id, data):
+            self.flush()
+
+    async def add_async(self, endpoint_name: str, item_id: Any, data: Any) -> None:
+        """
+        Buffer a fetched API response from the event loop.
+
+        A full buffer is flushed in a worker thread, so the SQLite transaction does not block the loop.
+
+        :param endpoint_name: The endpoint name of the response, e.g. 'detailed activity' or 'kudos'.
+        :param item_id: The ID the response was fetched for.
+        :param data: The response data.
+        """
+        if self._buffer(endpoint_name, item_id, data):
+            await asyncio.to_thread(self.flush)
+
+    def _buffer(self, endpoint_name: str, item_id: Any, data: Any) -> bool:
+        with self._lock:
+            self._pending.append((endpoint_name, item_id, data))
+            return len(self._pending) >= self.batch_size
+
+    def add_activity_summaries(self, summaries: Iterable[Dict[str, Any]]) -> None:
+        """
+        Buffer activity summaries from the athlete activities listing.
+
+        :param summaries: The activity summaries.
+        """
+        for summary in summaries:
+            self.add('activity summary', summary.get('id'), summary)
+
+    def flush(self) -> int:
+        """
+        Write every buffered record in a single transaction.
+
+        :return: The number of records written.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+
+        rows: Dict[str, List[Tuple]] = {}
+        replaced_children: Dict[str, List[Tuple]] = {}
+        for endpoint_name, item_id, data in pending:
+            self._collect(endpoint_name, item_id, data, rows, replaced_children)
+
+        with self._lock, self.connection:
+            for statement, params in replaced_children.items():
+                self.connection.executemany(statement, params)
+            for statement, params in rows.items():
+                self.connection.executemany(statement, params)
+        logging.info(f"Wrote {len(pending)} records to the local store")
+        return len(pending)
+
+    def _collect(self, endpoint_name: str, item_id: Any, data: Any, rows: Dict[str, List[Tuple]], replaced_children: Dict[str, List[Tuple]]) -> None:
+        placeholders = ', '.join('?' for _ in ACTIVITY_COLUMNS)
+        if endpoint_name == 'activity summary':
+            updates = ', '.join(f"{column} = excluded.{column}" for column in ACTIVITY_COLUMNS[1:])
+            statement = (f"INSERT INTO activities ({', '.join(ACTIVITY_COLUMNS)}, raw) VALUES ({placeholders}, ?) "
+                         f"ON CONFLICT(id) DO UPDATE SET {updates}, raw = CASE WHEN activities.detailed THEN activities.raw ELSE excluded.raw END")
+            rows.setdefault(statement, []).append(_activity_row(data) + (json.dumps(data),))
+        elif endpoint_name == 'detailed activity':
+            statement = f"INSERT OR REPLACE INTO activities ({', '.join(ACTIVITY_COLUMNS)}, detailed, raw) VALUES ({placeholders}, 1, ?)"
+            rows.setdefault(statement, []).append(_activity_row(data) + (json.dumps(data),))
+            if data.get('laps') is not None:
+                self._collect('laps', item_id, data['laps'], rows, replaced_children)
+            if data.get('segment_efforts') is not None:
+                replaced_children.setdefault("DELETE FROM segment_efforts WHERE activity_id = ?", []).append((item_id,))
+                statement = "INSERT OR REPLACE INTO segment_efforts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                rows.setdefault(statement, []).extend(_segment_effort_rows(item_id, data['segment_efforts']))
+        elif endpoint_name == 'laps':
+            replaced_children.setdefault("DELETE FROM laps WHERE activity_id = ?", []).append((item_id,))
+            statement = "INSERT OR REPLACE INTO laps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            rows.setdefault(statement, []).extend(_lap_rows(item_id, data))
+        elif endpoint_name == 'kudos':
+            replaced_children.setdefault("DELETE FROM kudos WHERE activity_id = ?", []).append((item_id,))
+            statement = "INSERT OR REPLACE INTO kudos VALUES (?, ?, ?, ?, ?)"
+            rows.setdefault(statement, []).extend(
+                (item_id, position, athlete.get('firstname'), athlete.get('lastname'), json.dumps(athlete))
+                for position, athlete in enumerate(data)
+            )
+        elif endpoint_name == 'comments':
+            replaced_children.setdefault("DELETE FROM comments WHERE activity_id = ?", []).append((item_id,))
+            statement = "INSERT OR REPLACE INTO comments VALUES (?, ?, ?, ?, ?, ?, ?)"
+            rows.setdefault(statement, []).extend(
+                (comment.get('id'), item_id, (comment.get('athlete') or {}).get('firstname'), (comment.get('athlete') or {}).get('lastname'),
+                 comment.get('text'), comment.get('created_at'), json.dumps(comment))
+                for comment in data if comment.get('id') is not None
+            )
+        elif endpoint_name == 'club':
+            statement = "INSERT OR REPLACE INTO clubs VALUES (?, ?, ?, ?, ?, ?, ?)"
+            rows.setdefault(statement, []).append(
+                (data.get('id'), data.get('name'), data.get('sport_type'), data.get('member_count'), data.get('city'), data.get('country'), json.dumps(data))
+            )
+        elif endpoint_name == 'route':
+            statement = "INSERT OR REPLACE INTO routes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            rows.setdefault(statement, []).append(
+                (data.get('id'), (data.get('athlete') or {}).get('id'), data.get('name'), data.get('type'), data.get('sub_type'),
+                 data.get('distance'), data.get('elevation_gain'), data.get('created_at'), json.dumps(data))
+            )
+
+    def query(self, sql: str, params: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        """
+        Run a read-only SQL query against the store.
+
+        :param sql: The SQL query.
+        :param params: The query parameters.
+        :return: The rows as dictionaries.
+        """
+        self.flush()
+        with self._lock:
+            return [dict(row) for row in self.connection.execute(sql, tuple(params))]
+
+    def activities(self, athlete_id: Optional[int] = None, sport_type: Optional[str] = None, start: Optional[str] = None,
+                   end: Optional[str] = None, min_distance: Optional[float] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Query activities, newest first.
+
+        Example: all rides in 2024 over 100 km::
+
+            store.activities(sport_type='Ride', start='2024-01-01', end='2025-01-01', min_distance=100000)
+
+        :param athlete_id: Only activities of this athlete.
+        :param sport_type: Only activities of this sport type, e.g. 'Ride' or 'Run'.
+        :param start: Only activities started on or after this ISO date.
+        :param end: Only activities started before this ISO date.
+        :param min_distance: Only activities at least this long, in meters.
+        :param limit: Maximum number of activities returned.
+        :return: The activities, without their raw JSON.
+        """
+        conditions, params = [], []
+        for condition, value in (('athlete_id = ?', athlete_id), ('sport_type = ?', sport_type), ('start_date >= ?', start),
+                                 ('start_date < ?', end), ('distance >= ?', min_distance)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        sql = f"SELECT {', '.join(ACTIVITY_COLUMNS)}, detailed FROM activities"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY start_date DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self.query(sql, params)
+
+    def activity(self, activity_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Return the stored JSON of an activity.
+
+        :param activity_id: The activity ID.
+        :return: The detailed activity if fetched, otherwise its summary, or None.
+        """
+        rows = self.query("SELECT raw FROM activities WHERE id = ?", (activity_id,))
+        return json.loads(rows[0]['raw']) if rows else None
+
+    def laps(self, activity_id: int) -> List[Dict[str, Any]]:
+        """
+        Return the laps of an activity in lap order.
+
+        :param activity_id: The activity ID.
+        :return: The laps, without their raw JSON.
+        """
+        return self.query("SELECT id, activity_id, lap_index, name, start_date, distance, moving_time, elapsed_time, "
+                          "average_speed, average_heartrate, average_watts FROM laps WHERE activity_id = ? ORDER BY lap_index", (activity_id,))
+
+    def segment_efforts(self, activity_id: Optional[int] = None, segment_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return segment efforts of an activity or of a segment, fastest first for a segment.
+
+        :param activity_id: Only efforts of this activity.
+        :param segment_id: Only efforts on this segment.
+        :return: The segment efforts, without their raw JSON.
+        """
+        sql = "SELECT id, activity_id, segment_id, name, start_date, distance, moving_time, elapsed_time, pr_rank, kom_rank FROM segment_efforts"
+        if segment_id is not None:
+            return self.query(sql + " WHERE segment_id = ? ORDER BY elapsed_time", (segment_id,))
+        return self.query(sql + " WHERE activity_id = ? ORDER BY start_date", (activity_id,))
+
+    def kudos(self, activity_id: int) -> List[Dict[str, Any]]:
+        return self.query("SELECT activity_id, position, firstname, lastname FROM kudos WHERE activity_id = ? ORDER BY position", (activity_id,))
+
+    def comments(self, activity_id: int) -> List[Dict[str, Any]]:
+        return self.query("SELECT id, activity_id, athlete_firstname, athlete_lastname, text, created_at FROM comments "
+                          "WHERE activity_id = ? ORDER BY created_at", (activity_id,))
+
+    def close(self) -> None:
+        """Flush buffered records and close the database."""
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,186 @@
+import os
+import re
+import json
+import logging
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from .endpoint_config import EndpointConfig, StravaEndpoints
+from .storage import JsonFileStorage
+
+MANIFEST_FILENAME = 'manifest.json'
+
+def _filename_patterns() -> List[Tuple[re.Pattern, EndpointConfig]]:
+    patterns = []
+    for config in StravaEndpoints.all():
+        template = config.filename_template('{id}')
+        regex = re.escape(template).replace(re.escape('{id}'), r'(\d+)')
+        patterns.append((re.compile(f'^{regex}$'), config))
+    return patterns
+
+class DataManifest:
+    """
+    In-memory index of every file in the data directory.
+
+    The index is loaded once, from the persisted ``manifest.json`` or from a
+    single scan of the data directory, and kept up to date as files are
+    saved. Existence checks become set lookups instead of one ``stat`` per
+    item on the event-loop thread. Each entry records the item ID, endpoint
+    name, size, fetch time and SHA-256 of the content.
+    """
+    def __init__(self, storage: Optional[Any] = None, load: bool = True):
+        """
+        Initialize the DataManifest.
+
+        :param storage: The storage backend whose records are indexed. Loose JSON files under the default data directory if omitted.
+        :param load: Load the persisted index, or scan the storage if there is none.
+        """
+        self.storage = storage or JsonFileStorage()
+        self.data_dir = self.storage.data_dir
+        self.path = os.path.join(self.data_dir, MANIFEST_FILENAME)
+        self.entries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        self._patterns = _filename_patterns()
+        if load:
+            self.load()
+
+    def _identify(self, filename: str) -> Tuple[Optional[int], Optional[str]]:
+        for pattern, config in self._patterns:
+            match = pattern.match(filename)
+            if match:
+                return int(match.group(1)), config.endpoint_name
+        return None, None
+
+    def load(self) -> None:
+        """Load the persisted index, falling back to a storage scan if it is missing or was built for another backend."""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as file:
+                    data = json.load(file)
+                if data.get('backend') == self.storage.name:
+                    self.entries = data['entries']
+                    logging.info(f"Loaded manifest with {len(self)} entries from {MANIFEST_FILENAME}")
+                    return
+                logging.info("Manifest was built for another storage backend, rescanning")
+            except Exception as e:
+                logging.error("Error loading manifest, rescanning data directory: %s", e)
+        self.scan()
+
+    def scan(self) -> None:
+        """Rebuild the index with a single scan of the storage."""
+        start_time = time.time()
+        entries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for module, filename, size, mtime in self.storage.iter_entries():
+            item_id, endpoint = self._identify(filename)
+            entries.setdefault(module, {})[filename] = {
+                'id': item_id,
+                'endpoint': endpoint,
+                'size': size,
+                'fetched_at': mtime,
+                'sha256': None
+            }
+        with self._lock:
+            self.entries = entries
+            self.dirty = True
+        logging.info(f"Scanned data directory: {len(self)} files indexed in {time.time() - start_time:.2f} seconds")
+
+    def save(self) -> None:
+        """Persist the index if it changed since it was loaded."""
+        if not self.dirty:
+            return
+        os.makedirs(self.data_dir, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(temp_path, "w") as file:
+                json.dump({'backend': self.storage.name, 'entries': self.entries}, file)
+            self.dirty = False
+        os.replace(temp_path, self.path)
+        logging.info(f"Saved manifest with {len(self)} entries")
+
+    def __len__(self) -> int:
+        return sum(len(files) for files in self.entries.values())
+
+    def contains(self, module: str, filename: str) -> bool:
+        """
+        Check whether a file is present in the index.
+
+        :param module: The module name.
+        :param filename: The file name.
+        :return: True if the file is indexed, False otherwise.
+        """
+        return filename in self.entries.get(module, ())
+
+    def get(self, module: str, filename: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the index entry of a file.
+
+        :param module: The module name.
+        :param filename: The file name.
+        :return: The entry, or None if the file is not indexed.
+        """
+        return self.entries.get(module, {}).get(filename)
+
+    def record(self, module: str, filename: str, size: int, sha256: Optional[str] = None, item_id: Optional[int] = None, endpoint: Optional[str] = None) -> None:
+        """
+        Add or update the index entry of a saved file.
+
+        :param module: The module name.
+        :param filename: The file name.
+        :param size: The size of the saved content in bytes.
+        :param sha256: The SHA-256 hex digest of the saved content.
+        :param item_id: The ID of the saved item. Inferred from the file name if omitted.
+        :param endpoint: The endpoint name. Inferred from the file name if omitted.
+        """
+        if item_id is None or endpoint is None:
+            inferred_id, inferred_endpoint = self._identify(filename)
+            item_id = inferred_id if item_id is None else item_id
+            endpoint = endpoint or inferred_endpoint
+        with self._lock:
+            self.entries.setdefault(module, {})[filename] = {
+                'id': item_id,
+                'endpoint': endpoint,
+                'size': size,
+                'fetched_at': time.time(),
+                'sha256': sha256
+            }
+            self.dirty = True
+
+    def remove(self, module: str, filename: str) -> None:
+        """
+        Remove a file from the index.
+
+        :param module: The module name.
+        :param filename: The file name.
+        """
+        with self._lock:
+            if self.entries.get(module, {}).pop(filename, None) is not None:
+                self.dirty = True
+
+    def missing(self, ids: Iterable[int], endpoint_config: EndpointConfig) -> List[int]:
+        """
+        Return the IDs whose file for an endpoint is not in the index.
+
+        :param ids: The IDs to check.
+        :param endpoint_config: The endpoint configuration.
+        :return: The IDs that still need to be fetched, in input order.
+        """
+        module_files = self.entries.get(endpoint_config.section, {})
+        return [item_id for item_id in ids if endpoint_config.filename_template(item_id) not in module_files]
+
+    def ids_for(self, endpoint_name: str, module: Optional[str] = None) -> List[int]:
+        """
+        Return the IDs indexed for an endpoint.
+
+        :param endpoint_name: The endpoint name, e.g. 'laps'.
+        :param module: Restrict the lookup to a single module.
+        :return: The indexed IDs.
+        """
+        modules = [module] if module else list(self.entries)
+        return [
+            entry['id']
+            for module_name in modules
+            for entry in self.entries.get(module_name, {}).values()
+            if entry.get('endpoint') == endpoint_name and entry.get('id') is not None
+        ]
@@ -0,0 +1,270 @@
+import os
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Optional, Tuple
+
+METRICS_SUMMARY_FILENAME = 'metrics_summary.json'
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_HELP = {
+    'strava_request_duration_seconds': ('histogram', "Latency of API requests, from sending to the decoded body."),
+    'strava_response_bytes_total': ('counter', "Bytes of response bodies received."),
+    'strava_responses_total': ('counter', "API responses by status code ('error' for connection errors and timeouts)."),
+    'strava_retries_total': ('counter', "Requests retried after a transient failure."),
+    'strava_items_total': ('counter', "Work items processed, by outcome."),
+    'strava_rate_limit_usage': ('gauge', "Requests used in the current rate-limit window."),
+    'strava_rate_limit_limit': ('gauge', "Requests allowed in the rate-limit window."),
+    'strava_queue_depth': ('gauge', "Work items waiting for a worker."),
+    'strava_items_per_second': ('gauge', "Work items processed per second in the last batch.")
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Optional[Dict[str, Any]]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in (labels or {}).items()))
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile as the upper bound of the bucket holding it.
+
+        :param q: The quantile, between 0 and 1.
+        :return: The estimated value, or 0 without observations.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound if bound != float('inf') else self.buckets[-1]
+        return self.buckets[-1]
+
+class MetricsRegistry:
+    """
+    Counters, gauges and latency histograms of a sync.
+
+    Clients record every request (latency, bytes, status code, retries) by
+    endpoint, the batch engine records processed items and its queue depth,
+    and the rate-limit usage is read from the shared ``RateLimiter`` when the
+    metrics are exported. Metrics can be written as a Prometheus text file
+    (e.g. for the node_exporter textfile collector), served on a local
+    ``/metrics`` HTTP endpoint, or summarised as JSON at the end of a run.
+    """
+    def __init__(self, rate_limiter: Optional[Any] = None, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        """
+        Initialize the MetricsRegistry.
+
+        :param rate_limiter: The shared ``RateLimiter`` whose usage is exported.
+        :param buckets: Upper bounds in seconds of the latency histogram buckets.
+        """
+        self.rate_limiter = rate_limiter
+        self.buckets = buckets
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._server = None
+
+    def inc(self, name: str, labels: Optional[Dict[str, Any]] = None, value: float = 1) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            self.gauges.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(self.buckets)
+            series[key].observe(value)
+
+    def observe_request(self, endpoint: str, seconds: float, status: Optional[int], size: int = 0) -> None:
+        """
+        Record an API response.
+
+        :param endpoint: The endpoint or module name.
+        :param seconds: The request latency.
+        :param status: The status code, or None for connection errors and timeouts.
+        :param size: The size of the response body in bytes.
+        """
+        labels = {'endpoint': endpoint}
+        self.observe('strava_request_duration_seconds', seconds, labels)
+        self.inc('strava_responses_total', dict(labels, status=status if status is not None else 'error'))
+        if size:
+            self.inc('strava_response_bytes_total', labels, size)
+
+    def _read_rate_limiter(self) -> None:
+        if self.rate_limiter is None:
+            return
+        limiter = self.rate_limiter
+        for window, usage, limit in (('15min', limiter.short_usage, limiter.short_limit), ('daily', limiter.daily_usage, limiter.daily_limit)):
+            self.set_gauge('strava_rate_limit_usage', usage, {'window': window})
+            self.set_gauge('strava_rate_limit_limit', limit, {'window': window})
+
+    def to_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        :return: The metrics text.
+        """
+        self._read_rate_limiter()
+        lines = []
+        with self._lock:
+            for name in sorted(set(self.counters) | set(self.gauges) | set(self.histograms)):
+                metric_type, help_text = METRIC_HELP.get(name, ('untyped', name))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in self.counters.get(name, {}).items():
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                for labels, value in self.gauges.get(name, {}).items():
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                for labels, histogram in self.histograms.get(name, {}).items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarise the run by endpoint.
+
+        :return: Per-endpoint request counts, latency percentiles, bytes,
+                 status codes and retries, with the items processed per
+                 second and the rate-limit usage.
+        """
+        self._read_rate_limiter()
+        elapsed = time.time() - self.started_at
+        with self._lock:
+            endpoints: Dict[str, Dict[str, Any]] = {}
+            for labels, histogram in self.histograms.get('strava_request_duration_seconds', {}).items():
+                endpoints[dict(labels)['endpoint']] = {
+                    'requests': histogram.count,
+                    'latency_mean_s': round(histogram.sum / histogram.count, 4) if histogram.count else 0.0,
+                    'latency_p50_s': histogram.quantile(0.5),
+                    'latency_p95_s': histogram.quantile(0.95),
+                    'time_in_requests_s': round(histogram.sum, 3),
+                    'bytes': 0,
+                    'statuses': {},
+                    'retries': 0
+                }
+            for labels, value in self.counters.get('strava_responses_total', {}).items():
+                labels = dict(labels)
+                entry = endpoints.setdefault(labels['endpoint'], {'statuses': {}})
+                entry['statuses'][labels['status']] = int(value)
+            for name, field in (('strava_response_bytes_total', 'bytes'), ('strava_retries_total', 'retries')):
+                for labels, value in self.counters.get(name, {}).items():
+                    endpoints.setdefault(dict(labels)['endpoint'], {})[field] = int(value)
+            items: Dict[str, int] = {}
+            for labels, value in self.counters.get('strava_items_total', {}).items():
+                outcome = dict(labels)['outcome']
+                items[outcome] = items.get(outcome, 0) + int(value)
+            rate_limit = {dict(labels)['window']: value for labels, value in self.gauges.get('strava_rate_limit_usage', {}).items()}
+        total_items = sum(items.values())
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'items': items,
+            'items_per_second': round(total_items / elapsed, 2) if elapsed else 0.0,
+            'rate_limit_usage': rate_limit,
+            'endpoints': endpoints
+        }
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Write the metrics to a Prometheus text file atomically.
+
+        :param path: The output file, e.g. in a node_exporter textfile directory.
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as file:
+            file.write(self.to_prometheus())
+        os.replace(temp_path, path)
+
+    def write_summary(self, data_dir: str) -> Dict[str, Any]:
+        """
+        Write the JSON summary of the run to ``metrics_summary.json`` and log it.
+
+        :param data_dir: Root of the data directory.
+        :return: The summary.
+        """
+        summary = self.summary()
+        os.makedirs(data_dir, exist_ok=True)
+        path = os.path.join(data_dir, METRICS_SUMMARY_FILENAME)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(summary, file, indent=4)
+        os.replace(temp_path, path)
+        for endpoint, entry in sorted(summary['endpoints'].items()):
+            logging.info(f"Metrics {endpoint}: {entry.get('requests', 0)} requests, p50 {entry.get('latency_p50_s', 0)}s, "
+                         f"p95 {entry.get('latency_p95_s', 0)}s, {entry.get('bytes', 0)} bytes, statuses {entry.get('statuses', {})}, "
+                         f"{entry.get('retries', 0)} retries")
+        logging.info(f"Metrics summary saved to {path} ({summary['items_per_second']} items/s)")
+        return summary
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> None:
+        """
+        Serve the metrics on ``http://host:port/metrics`` from a background thread.
+
+        :param port: The port to listen on.
+        :param host: The interface to listen on.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = registry.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True).start()
+        logging.info(f"Serving metrics on http://{host}:{port}/metrics")
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
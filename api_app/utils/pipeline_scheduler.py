@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterable, Dict, List, Optional, Tuple
+
+from .endpoint_config import EndpointConfig
+from .batch_engine import EndpointBatchEngine, BatchStats
+from .base_api_client import ListingIncompleteError
+
+_LISTING_DONE = object()
+
+class PipelineScheduler:
+    """
+    Runs every section of a sync in one event loop, driven by endpoint dependencies.
+
+    Each listing (activities, routes, clubs) is a source of items, and every
+    endpoint declares through ``depends_on`` the listing that provides its
+    IDs. All listings are walked concurrently, each by its own producer
+    task, and every item they yield is immediately queued for its dependent
+    endpoints on a single ``EndpointBatchEngine``, whose workers hand it to
+    the client of its listing. Listing pages and detail requests share one
+    rate limiter, so the wall time of a sync is bounded by the API quota
+    instead of the sum of the sections.
+    """
+    def __init__(self, client: Any, concurrency: int = 10):
+        """
+        Initialize the PipelineScheduler.
+
+        :param client: The API client handling the items of sources registered without their own client.
+        :param concurrency: Number of items processed concurrently across all sections.
+        """
+        self.client = client
+        self.concurrency = max(concurrency, 1)
+        self._sources: List[Tuple[str, AsyncIterable[Dict[str, Any]], List[EndpointConfig], Optional[Any]]] = []
+        self._clients: Dict[str, Any] = {}
+
+    def add_source(self, name: str, items: AsyncIterable[Dict[str, Any]], endpoints: List[EndpointConfig], planner: Optional[Any] = None, client: Optional[Any] = None) -> None:
+        """
+        Register a listing and the endpoints fetched for each of its items.
+
+        :param name: The listing name, e.g. 'activities'.
+        :param items: Async iterable of the listed items. Each item must have an ``id``.
+        :param endpoints: The endpoints fetched for every item.
+        :param planner: Optional ``CallPlanner`` choosing which of the endpoints each item actually needs.
+        :param client: The API client whose ``process_endpoint`` handles the items, e.g. the routes client. Defaults to the scheduler's client.
+        :raises ValueError: If an endpoint does not depend on this listing.
+        """
+        for endpoint in endpoints:
+            if endpoint.depends_on != name:
+                raise ValueError(f"Endpoint {endpoint.endpoint_name} depends on {endpoint.depends_on}, not on {name}")
+            if client is not None:
+                self._clients[endpoint.section] = client
+        self._sources.append((name, items, endpoints, planner))
+
+    async def run(self) -> BatchStats:
+        """
+        Walk every registered listing and fetch the dependent endpoints of each item as soon as it is listed.
+
+        :return: The statistics of the run.
+        """
+        start_time = time.time()
+        merged: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        logging.info(f"Scheduling {', '.join(source[0] for source in self._sources) or 'no'} listings in one pipeline")
+
+        async def produce(name: str, items: AsyncIterable[Dict[str, Any]], endpoints: List[EndpointConfig], planner: Optional[Any]) -> None:
+            count = 0
+            try:
+                async for item in items:
+                    count += 1
+                    for endpoint in (await planner.plan(item) if planner is not None else endpoints):
+                        await merged.put((item['id'], endpoint))
+            except ListingIncompleteError as e:
+                logging.error(f"{str(e)}: the {name} listing is incomplete, {count} {name} listed")
+            except Exception as e:
+                logging.error(f"Error listing {name}: {str(e)}")
+            finally:
+                await merged.put(_LISTING_DONE)
+            logging.info(f"Listed {count} {name} in {time.time() - start_time:.2f} seconds")
+
+        producers = [asyncio.create_task(produce(*source)) for source in self._sources]
+
+        async def work_items():
+            remaining = len(producers)
+            while remaining:
+                item = await merged.get()
+                if item is _LISTING_DONE:
+                    remaining -= 1
+                    continue
+                yield item
+
+        try:
+            stats = await EndpointBatchEngine(self.client, concurrency=self.concurrency, clients=self._clients).run_stream(work_items())
+        finally:
+            for task in producers:
+                task.cancel()
+        for _, _, _, planner in self._sources:
+            if planner is not None:
+                planner.log_summary()
+        logging.info(f"Pipeline completed in {time.time() - start_time:.2f} seconds")
+        return stats
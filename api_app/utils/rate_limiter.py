@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Mapping, Optional, Set, Tuple
+
+SHORT_WINDOW_SECONDS = 15 * 60
+DAILY_WINDOW_SECONDS = 24 * 60 * 60
+SHORT_WINDOW = 'short'
+DAILY_WINDOW = 'daily'
+
+class RateLimiter:
+    """
+    Rate-limit governor shared by every API client.
+
+    Strava enforces two fixed windows on read requests: one that resets every
+    quarter hour and one that resets at midnight UTC. Each window is tracked as
+    a bucket of tokens that refills completely when the window rolls over. The
+    bucket levels are re-synchronised from the ``x-readratelimit-limit`` and
+    ``x-readratelimit-usage`` headers of every response, and requests that are
+    still in flight are counted against both budgets so concurrent callers
+    cannot overspend together.
+    """
+    def __init__(self, short_limit: int = 100, daily_limit: int = 1000, safety_margin: int = 0):
+        """
+        Initialize the RateLimiter with the default Strava read limits.
+
+        :param short_limit: Requests allowed per 15-minute window until the headers say otherwise.
+        :param daily_limit: Requests allowed per day until the headers say otherwise.
+        :param safety_margin: Requests kept in reserve in each window.
+        """
+        self.short_limit = short_limit
+        self.daily_limit = daily_limit
+        self.safety_margin = safety_margin
+        self.short_usage = 0
+        self.daily_usage = 0
+        self.in_flight = 0
+        self.synced = False
+        self._lock = threading.Lock()
+        self._short_window, self._daily_window = self._windows(time.time())
+
+    @staticmethod
+    def _windows(now: float) -> Tuple[int, int]:
+        return int(now // SHORT_WINDOW_SECONDS), int(now // DAILY_WINDOW_SECONDS)
+
+    @staticmethod
+    def _parse_pair(value: Optional[str]) -> Optional[Tuple[int, int]]:
+        if not value:
+            return None
+        try:
+            short, daily = (int(part.strip()) for part in value.split(','))
+        except ValueError:
+            logging.warning(f"Unable to parse rate limit header value: {value}")
+            return None
+        return short, daily
+
+    def _roll_windows(self, now: float) -> None:
+        short_window, daily_window = self._windows(now)
+        if short_window != self._short_window:
+            self._short_window = short_window
+            self.short_usage = 0
+        if daily_window != self._daily_window:
+            self._daily_window = daily_window
+            self.daily_usage = 0
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Synchronise both buckets with the rate limit headers of a response.
+
+        :param headers: The response headers.
+        """
+        limit = self._parse_pair(headers.get('x-readratelimit-limit'))
+        usage = self._parse_pair(headers.get('x-readratelimit-usage'))
+        with self._lock:
+            self._roll_windows(time.time())
+            if limit:
+                self.short_limit, self.daily_limit = limit
+            if usage:
+                self.short_usage = max(self.short_usage, usage[0])
+                self.daily_usage = max(self.daily_usage, usage[1])
+                self.synced = True
+
+    def release(self, headers: Optional[Mapping[str, str]] = None) -> None:
+        """
+        Release a token reserved by ``acquire`` once its response has arrived.
+
+        When no usable headers are available the request is assumed to have
+        been counted by the server.
+
+        :param headers: The response headers, or None if the request failed.
+        """
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            if not headers or 'x-readratelimit-usage' not in headers:
+                self._roll_windows(time.time())
+                self.short_usage += 1
+                self.daily_usage += 1
+        if headers:
+            self.update_from_headers(headers)
+
+    def mark_exhausted(self, headers: Optional[Mapping[str, str]] = None, window: Optional[str] = None) -> None:
+        """
+        Mark a window as spent, e.g. after a 429 response, so no request is sent until it resets.
+
+        Without an explicit window, the windows whose usage reached their limit
+        in the rate limit headers are marked. The 15-minute window is marked if
+        the headers are missing or show budget left in both windows.
+
+        :param headers: The headers of the 429 response, if any.
+        :param window: 'short' or 'daily' to mark that window regardless of the headers.
+        :raises ValueError: If the window is unknown.
+        """
+        if window is not None and window not in (SHORT_WINDOW, DAILY_WINDOW):
+            raise ValueError(f"Invalid window: {window}. Allowed windows are: {SHORT_WINDOW}, {DAILY_WINDOW}")
+        windows = {window} if window else self._spent_windows(headers)
+        with self._lock:
+            if SHORT_WINDOW in windows:
+                self.short_usage = max(self.short_usage, self.short_limit)
+            if DAILY_WINDOW in windows:
+                self.daily_usage = max(self.daily_usage, self.daily_limit)
+        if DAILY_WINDOW in windows:
+            logging.warning("Daily rate limit spent: no requests until the daily window resets at midnight UTC")
+
+    def _spent_windows(self, headers: Optional[Mapping[str, str]]) -> Set[str]:
+        usage = self._parse_pair((headers or {}).get('x-readratelimit-usage'))
+        if usage is None:
+            return {SHORT_WINDOW}
+        short_limit, daily_limit = self._parse_pair(headers.get('x-readratelimit-limit')) or (self.short_limit, self.daily_limit)
+        windows = set()
+        if usage[0] >= short_limit:
+            windows.add(SHORT_WINDOW)
+        if usage[1] >= daily_limit:
+            windows.add(DAILY_WINDOW)
+        return windows or {SHORT_WINDOW}
+
+    def seconds_until_reset(self) -> float:
+        """
+        Seconds until the budget that is currently blocking requests refills.
+
+        :return: Seconds until the daily window resets if the daily budget is spent,
+                 otherwise seconds until the next 15-minute window.
+        """
+        now = time.time()
+        with self._lock:
+            self._roll_windows(now)
+            daily_spent = self.daily_usage + self.in_flight >= self.daily_limit - self.safety_margin
+        window = DAILY_WINDOW_SECONDS if daily_spent else SHORT_WINDOW_SECONDS
+        return window - (now % window)
+
+    def remaining(self) -> int:
+        """
+        Number of requests that can still be sent before either budget is spent.
+
+        :return: The smaller of the remaining 15-minute and daily budgets.
+        """
+        with self._lock:
+            self._roll_windows(time.time())
+            short_remaining = self.short_limit - self.safety_margin - self.short_usage - self.in_flight
+            daily_remaining = self.daily_limit - self.safety_margin - self.daily_usage - self.in_flight
+        return max(min(short_remaining, daily_remaining), 0)
+
+    def try_acquire(self) -> float:
+        """
+        Reserve a token in both buckets if budget is available.
+
+        Until the first response headers are seen only one request is allowed
+        in flight, so the real usage is learnt without a separate probe call.
+
+        :return: 0 if a token was reserved, otherwise the number of seconds to wait.
+        """
+        with self._lock:
+            self._roll_windows(time.time())
+            if not self.synced and self.in_flight > 0:
+                return 0.1
+            short_spent = self.short_usage + self.in_flight >= self.short_limit - self.safety_margin
+            daily_spent = self.daily_usage + self.in_flight >= self.daily_limit - self.safety_margin
+            if not short_spent and not daily_spent:
+                self.in_flight += 1
+                return 0
+            if self.in_flight > 0:
+                return 0.5
+        return self.seconds_until_reset()
+
+    async def acquire(self) -> None:
+        """
+        Wait asynchronously until a token is available and reserve it.
+        """
+        while True:
+            wait_seconds = self.try_acquire()
+            if not wait_seconds:
+                return
+            if wait_seconds > 1:
+                logging.warning(f"Rate limit budget spent: waiting {wait_seconds:.0f} seconds until the next window")
+            await asyncio.sleep(wait_seconds)
+
+    def acquire_sync(self) -> None:
+        """
+        Block the calling thread until a token is available and reserve it.
+        """
+        while True:
+            wait_seconds = self.try_acquire()
+            if not wait_seconds:
+                return
+            if wait_seconds > 1:
+                logging.warning(f"Rate limit budget spent: waiting {wait_seconds:.0f} seconds until the next window")
+            time.sleep(wait_seconds)
@@ -0,0 +1,231 @@
+import os
+import re
+import asyncio
+import json
+import sqlite3
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from .storage import DATA_DIR
+
+CACHE_FILENAME = 'http_cache.db'
+
+# Seconds a response stays fresh, by URL path. Paths not listed (activities, club feeds) are never cached.
+# Paginated listings have no TTL: every page is revalidated with its ETag, so added items are never missed.
+DEFAULT_TTLS = {
+    r'/athlete$': 6 * 3600,
+    r'/athlete/zones$': 24 * 3600,
+    r'/athletes/\d+/stats$': 3600,
+    r'/athlete/clubs$': 0,
+    r'/athletes/\d+/routes$': 0,
+    r'/routes/\d+$': 24 * 3600,
+    r'/clubs/\d+$': 24 * 3600,
+    r'/clubs/\d+/members$': 0
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL
+);
+"""
+
+class CacheEntry:
+    def __init__(self, body: str, etag: Optional[str], last_modified: Optional[str], stored_at: float):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    def data(self) -> Any:
+        return json.loads(self.body)
+
+class ResponseCache:
+    """
+    Persistent cache of GET responses for data that rarely changes.
+
+    Responses are kept in ``data/http_cache.db`` keyed by URL and query
+    parameters, behind an in-memory LRU bounded by the total size of the
+    cached bodies. A response younger than the TTL of its path is served
+    without a request. An older one is revalidated with ``If-None-Match`` or
+    ``If-Modified-Since`` when the server sent an ETag or Last-Modified, so a
+    ``304 Not Modified`` answers from the cache instead of re-downloading.
+    The event loop writes through ``store_async`` and ``revalidated_async``,
+    which run the SQLite transaction in a worker thread.
+    """
+    def __init__(self, path: Optional[str] = None, ttls: Optional[Mapping[str, float]] = None, max_memory_bytes: int = 8 * 1024 * 1024):
+        """
+        Initialize the ResponseCache and create its schema if needed.
+
+        :param path: Path of the SQLite database. Defaults to ``data/http_cache.db``.
+        :param ttls: Seconds a response stays fresh, keyed by a regular expression matched against the URL path.
+        :param max_memory_bytes: Total size of the response bodies kept in memory.
+        """
+        self.path = path or os.path.join(DATA_DIR, CACHE_FILENAME)
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (DEFAULT_TTLS if ttls is None else ttls).items()]
+        self.max_memory_bytes = max_memory_bytes
+        self.memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.memory_bytes = 0
+        self.counts = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str, params: Optional[Mapping[str, Any]] = None) -> str:
+        if not params:
+            return url
+        return f"{url}?{urlencode(sorted(params.items()))}"
+
+    def ttl_for(self, url: str) -> Optional[float]:
+        """
+        Return how long a response of a URL stays fresh.
+
+        :param url: The request URL.
+        :return: The TTL in seconds, 0 if the response is revalidated on every request, or None if the URL is not cacheable.
+        """
+        path = urlsplit(url).path.rstrip('/')
+        for pattern, ttl in self.ttls:
+            if pattern.search(path):
+                return ttl
+        return None
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        previous = self.memory.pop(key, None)
+        if previous is not None:
+            self.memory_bytes -= len(previous.body)
+        self.memory[key] = entry
+        self.memory_bytes += len(entry.body)
+        while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted.body)
+
+    def _lookup(self, key: str) -> Optional[CacheEntry]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory.move_to_end(key)
+            return entry
+        row = self.connection.execute(
+            "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        entry = CacheEntry(*row)
+        self._remember(key, entry)
+        return entry
+
+    def lookup(self, url: str, params: Optional[Mapping[str, Any]] = None) -> Tuple[Optional[Any], Dict[str, str]]:
+        """
+        Look up a cacheable request before it is sent.
+
+        :param url: The request URL.
+        :param params: The query parameters.
+        :return: The cached data if it is still fresh (else None), and the
+                 conditional headers to send with the request.
+        """
+        ttl = self.ttl_for(url)
+        if ttl is None:
+            return None, {}
+        key = self.key(url, params)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None and time.time() - entry.stored_at < ttl:
+                self.counts['hits'] += 1
+                logging.info(f"Serving {url} from the response cache")
+                return entry.data(), {}
+            self.counts['misses'] += 1
+        headers = {}
+        if entry is not None and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return None, headers
+
+    def revalidated(self, url: str, params: Optional[Mapping[str, Any]] = None) -> Optional[Any]:
+        """
+        Renew a cached response after a ``304 Not Modified``.
+
+        :param url: The request URL.
+        :param params: The query parameters.
+        :return: The cached data, or None if it is no longer cached.
+        """
+        key = self.key(url, params)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return None
+            entry.stored_at = time.time()
+            with self.connection:
+                self.connection.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (entry.stored_at, key))
+            self.counts['revalidated'] += 1
+        logging.info(f"{url} not modified, renewed in the response cache")
+        return entry.data()
+
+    async def revalidated_async(self, url: str, params: Optional[Mapping[str, Any]] = None) -> Optional[Any]:
+        """
+        Renew a cached response after a ``304 Not Modified`` from the event loop.
+
+        :param url: The request URL.
+        :param params: The query parameters.
+        :return: The cached data, or None if it is no longer cached.
+        """
+        return await asyncio.to_thread(self.revalidated, url, params)
+
+    def store(self, url: str, params: Optional[Mapping[str, Any]], data: Any, headers: Optional[Mapping[str, str]] = None) -> None:
+        """
+        Store the response of a cacheable request.
+
+        :param url: The request URL.
+        :param params: The query parameters.
+        :param data: The decoded JSON response.
+        :param headers: The response headers, read for ETag and Last-Modified.
+        """
+        if self.ttl_for(url) is None:
+            return
+        headers = headers or {}
+        key = self.key(url, params)
+        entry = CacheEntry(json.dumps(data, separators=(',', ':')), headers.get('ETag'), headers.get('Last-Modified'), time.time())
+        with self._lock:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, body, etag, last_modified, stored_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, entry.body, entry.etag, entry.last_modified, entry.stored_at)
+                )
+            self._remember(key, entry)
+            self.counts['stored'] += 1
+
+    async def store_async(self, url: str, params: Optional[Mapping[str, Any]], data: Any, headers: Optional[Mapping[str, str]] = None) -> None:
+        """
+        Store the response of a cacheable request from the event loop, without blocking it on the SQLite write.
+
+        :param url: The request URL.
+        :param params: The query parameters.
+        :param data: The decoded JSON response.
+        :param headers: The response headers, read for ETag and Last-Modified.
+        """
+        if self.ttl_for(url) is not None:
+            await asyncio.to_thread(self.store, url, params, data, headers)
+
+    def clear(self) -> None:
+        with self._lock:
+            with self.connection:
+                self.connection.execute("DELETE FROM responses")
+            self.memory.clear()
+            self.memory_bytes = 0
+
+    def log_summary(self) -> None:
+        logging.info(f"Response cache: {self.counts['hits']} hits, {self.counts['misses']} misses, "
+                     f"{self.counts['revalidated']} revalidated and {self.counts['stored']} stored")
+
+    def close(self) -> None:
+        with self._lock:
+            self.connection.close()
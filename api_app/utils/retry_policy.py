@@ -0,0 +1,152 @@
+import os
+import json
+import logging
+import random
+import threading
+import time
+from typing import Dict, Any, List, Mapping, Optional, Set
+
+from .storage import DATA_DIR
+
+DEAD_LETTER_FILENAME = 'dead_letters.json'
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+# A Retry-After longer than a day is treated as malformed.
+MAX_RETRY_AFTER = 86400.0
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter for transient request failures.
+
+    5xx responses and connection errors or timeouts are retried after a
+    random delay of up to ``base_delay * 2 ** attempt`` seconds. 429
+    responses wait for the ``Retry-After`` header; the shared rate limiter
+    additionally holds every request until the exhausted window resets.
+    Each request gets at most ``max_attempts`` attempts.
+    """
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0, retry_statuses: tuple = RETRYABLE_STATUSES):
+        """
+        Initialize the RetryPolicy.
+
+        :param max_attempts: Attempts per request, including the first one.
+        :param base_delay: Upper bound in seconds of the first backoff delay.
+        :param max_delay: Upper bound in seconds of any backoff delay.
+        :param retry_statuses: HTTP status codes that are retried.
+        """
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+
+    def should_retry(self, attempt: int, status: Optional[int] = None) -> bool:
+        """
+        Decide whether a failed attempt is retried.
+
+        :param attempt: The number of the failed attempt, starting at 0.
+        :param status: The HTTP status code, or None if the request raised an error.
+        :return: True if another attempt is allowed.
+        """
+        if attempt + 1 >= self.max_attempts:
+            return False
+        return status is None or status in self.retry_statuses
+
+    def delay(self, attempt: int, status: Optional[int] = None, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Seconds to wait before the next attempt.
+
+        :param attempt: The number of the failed attempt, starting at 0.
+        :param status: The HTTP status code, or None if the request raised an error.
+        :param headers: The response headers, if any.
+        :return: The ``Retry-After`` value of a 429 response, otherwise a jittered exponential backoff.
+        """
+        if status == 429:
+            retry_after = (headers or {}).get('Retry-After')
+            try:
+                return min(float(retry_after), MAX_RETRY_AFTER) if retry_after else 0.0
+            except ValueError:
+                return 0.0
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+class DeadLetterQueue:
+    """
+    Persisted list of requests that failed after every retry.
+
+    Entries are kept in ``data/dead_letters.json`` with the endpoint name and
+    item ID when known, so a later run can queue them again instead of
+    relying on a new listing to rediscover them.
+    """
+    def __init__(self, data_dir: str = DATA_DIR):
+        """
+        Initialize the DeadLetterQueue and load the persisted entries.
+
+        :param data_dir: Root of the data directory.
+        """
+        self.path = os.path.join(data_dir, DEAD_LETTER_FILENAME)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as file:
+                    self.entries = {entry['url']: entry for entry in json.load(file)}
+            except Exception as e:
+                logging.error("Error loading dead letters: %s", e)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, url: str, module: str, reason: str, attempts: int, item_id: Optional[int] = None, endpoint: Optional[str] = None) -> None:
+        """
+        Record a request that failed after every retry.
+
+        :param url: The request URL.
+        :param module: The module name.
+        :param reason: The last status code or error.
+        :param attempts: The number of attempts made.
+        :param item_id: The ID the request was made for, if any.
+        :param endpoint: The endpoint name, if any.
+        """
+        with self._lock:
+            self.entries[url] = {
+                'url': url,
+                'module': module,
+                'item_id': item_id,
+                'endpoint': endpoint,
+                'reason': reason,
+                'attempts': attempts,
+                'failed_at': time.time()
+            }
+        logging.error(f"Giving up on {url} after {attempts} attempts ({reason}), added to dead letters")
+
+    def remove(self, url: str) -> None:
+        """
+        Remove the entry of a request, e.g. after it succeeded.
+
+        :param url: The request URL.
+        """
+        with self._lock:
+            self.entries.pop(url, None)
+
+    def endpoint_names(self) -> Set[str]:
+        with self._lock:
+            return {entry['endpoint'] for entry in self.entries.values() if entry.get('endpoint')}
+
+    def pop_endpoint_items(self) -> List[Dict[str, Any]]:
+        """
+        Remove and return the entries that can be queued again by endpoint and item ID.
+
+        :return: The removed entries.
+        """
+        with self._lock:
+            items = [entry for entry in self.entries.values() if entry.get('endpoint') and entry.get('item_id') is not None]
+            for entry in items:
+                del self.entries[entry['url']]
+        return items
+
+    def save(self) -> None:
+        """Persist the entries."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(temp_path, "w") as file:
+                json.dump(list(self.entries.values()), file, indent=4)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,332 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+INTERNAL_FILES = {'manifest.json', 'sync_state.json', 'dead_letters.json', 'analytics_cache.json', 'fingerprints.json', 'metrics_summary.json',
+                  'export_state.json'}
+SHARDS_DIRNAME = 'shards'
+SHARD_INDEX_FILENAME = 'index.ndjson'
+
+@lru_cache(maxsize=None)
+def _load_orjson() -> Optional[Any]:
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+def encode_json(data: Any, indent: Optional[int] = None) -> bytes:
+    """
+    Serialize data to UTF-8 JSON, with orjson when it is installed.
+
+    :param data: The data to serialize.
+    :param indent: Indentation of pretty output, or None for compact output.
+                   orjson only indents by 2; other widths use the json module.
+    :return: The encoded bytes.
+    """
+    orjson = _load_orjson()
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(data, option=option)
+        except TypeError:
+            pass
+    separators = (',', ':') if indent is None else None
+    return json.dumps(data, indent=indent, separators=separators, ensure_ascii=False).encode('utf-8')
+
+class JsonFileStorage:
+    """
+    Storage backend writing one JSON file per record, compact unless an indent is given.
+
+    Athlete files are stored at the root of the data directory and every
+    other module in its own sub-directory, e.g. ``data/activities/activity_1.json``.
+    """
+    name = 'json'
+
+    def __init__(self, data_dir: str = DATA_DIR, indent: Optional[int] = None):
+        """
+        Initialize the JsonFileStorage.
+
+        :param data_dir: Root of the data directory.
+        :param indent: JSON indentation, or None for compact output.
+        """
+        self.data_dir = data_dir
+        self.indent = indent
+
+    def module_dir(self, module: str) -> str:
+        """
+        Return the directory holding the files of a module.
+
+        :param module: The module name.
+        :return: The directory path.
+        """
+        if module and module != 'athlete':
+            return os.path.join(self.data_dir, module)
+        return self.data_dir
+
+    def path_for(self, module: str, filename: str) -> str:
+        return os.path.join(self.module_dir(module), filename)
+
+    def write(self, module: str, filename: str, data: Any) -> Tuple[int, str]:
+        """
+        Serialize and write a record atomically through a temporary file, so a crash never leaves a half-written file.
+
+        :param module: The module name.
+        :param filename: The record file name.
+        :param data: The record data.
+        :return: The size in bytes and SHA-256 hex digest of the written content.
+        """
+        data_dir = self.module_dir(module)
+        os.makedirs(data_dir, exist_ok=True)
+        payload = encode_json(data, self.indent)
+        path = os.path.join(data_dir, filename)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as json_file:
+            json_file.write(payload)
+        os.replace(temp_path, path)
+        return len(payload), hashlib.sha256(payload).hexdigest()
+
+    def write_many(self, records: List[Tuple[str, str, Any]]) -> List[Tuple[int, str]]:
+        """
+        Write several records.
+
+        :param records: ``(module, filename, data)`` tuples.
+        :return: The size and SHA-256 hex digest of each record, in order.
+        """
+        return [self.write(module, filename, data) for module, filename, data in records]
+
+    def read(self, module: str, filename: str) -> Optional[Any]:
+        """
+        Read a record.
+
+        :param module: The module name.
+        :param filename: The record file name.
+        :return: The record data, or None if it does not exist.
+        """
+        file_path = self.path_for(module, filename)
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, 'r') as json_file:
+            return json.load(json_file)
+
+    def exists(self, module: str, filename: str) -> bool:
+        return os.path.exists(self.path_for(module, filename))
+
+    def iter_entries(self) -> Iterator[Tuple[str, str, int, float]]:
+        """
+        Walk the data directory once.
+
+        :return: An iterator of ``(module, filename, size, mtime)`` tuples.
+        """
+        if not os.path.isdir(self.data_dir):
+            return
+        for entry in os.scandir(self.data_dir):
+            if entry.is_dir():
+                module = entry.name
+                files = [sub_entry for sub_entry in os.scandir(entry.path) if sub_entry.is_file()]
+            elif entry.is_file() and entry.name not in INTERNAL_FILES:
+                module = 'athlete'
+                files = [entry]
+            else:
+                continue
+            for file_entry in files:
+                if file_entry.name.endswith('.json') and file_entry.name not in INTERNAL_FILES:
+                    stat = file_entry.stat()
+                    yield module, file_entry.name, stat.st_size, stat.st_mtime
+
+    def close(self) -> None:
+        pass
+
+class ShardStorage:
+    """
+    Storage backend appending records to compressed NDJSON shards.
+
+    Each module gets a ``shards`` directory of ``shard_NNNNN.ndjson.gz`` files.
+    Every record is compressed as its own gzip member, so a shard remains a
+    valid gzip stream (``zcat`` prints one JSON line per record) while a
+    single record can still be read back by seeking to its offset. Offsets are
+    kept in an append-only ``index.ndjson`` per module; a later entry for the
+    same file name supersedes earlier ones.
+    """
+    name = 'shards'
+
+    def __init__(self, data_dir: str = DATA_DIR, max_shard_bytes: int = 64 * 1024 * 1024, compresslevel: int = 6):
+        """
+        Initialize the ShardStorage.
+
+        :param data_dir: Root of the data directory.
+        :param max_shard_bytes: Size after which a new shard is started.
+        :param compresslevel: gzip compression level of each record.
+        """
+        self.data_dir = data_dir
+        self.max_shard_bytes = max_shard_bytes
+        self.compresslevel = compresslevel
+        self._indexes: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self._lock = threading.Lock()
+
+    def shards_dir(self, module: str) -> str:
+        return os.path.join(self.data_dir, module or 'athlete', SHARDS_DIRNAME)
+
+    def _shard_path(self, module: str, shard: int) -> str:
+        return os.path.join(self.shards_dir(module), f"shard_{shard:05d}.ndjson.gz")
+
+    def _index(self, module: str) -> Dict[str, Dict[str, int]]:
+        module = module or 'athlete'
+        if module not in self._indexes:
+            index = {}
+            index_path = os.path.join(self.shards_dir(module), SHARD_INDEX_FILENAME)
+            if os.path.exists(index_path):
+                with open(index_path, 'r') as index_file:
+                    for line in index_file:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            logging.warning(f"Ignoring truncated entry in {module} shard index")
+                            continue
+                        index[entry.pop('key')] = entry
+            self._indexes[module] = index
+        return self._indexes[module]
+
+    def write(self, module: str, filename: str, data: Any) -> Tuple[int, str]:
+        """
+        Serialize a record and append it to the current shard of its module.
+
+        :param module: The module name.
+        :param filename: The record file name, used as the record key.
+        :param data: The record data.
+        :return: The size in bytes and SHA-256 hex digest of the uncompressed record.
+        """
+        return self.write_many([(module, filename, data)])[0]
+
+    def write_many(self, records: List[Tuple[str, str, Any]]) -> List[Tuple[int, str]]:
+        """
+        Append several records, opening each shard and index file once per module.
+
+        :param records: ``(module, filename, data)`` tuples.
+        :return: The size in bytes and SHA-256 hex digest of each uncompressed record, in order.
+        """
+        by_module: Dict[str, List[Tuple[str, bytes]]] = {}
+        results: List[Tuple[int, str]] = []
+        for module, filename, data in records:
+            line = encode_json({'key': filename, 'data': data}) + b'\n'
+            by_module.setdefault(module or 'athlete', []).append((filename, line))
+            results.append((len(line), hashlib.sha256(line).hexdigest()))
+
+        with self._lock:
+            for module, lines in by_module.items():
+                index = self._index(module)
+                os.makedirs(self.shards_dir(module), exist_ok=True)
+                shard = max((entry['shard'] for entry in index.values()), default=0)
+                shard_path = self._shard_path(module, shard)
+                if os.path.exists(shard_path) and os.path.getsize(shard_path) >= self.max_shard_bytes:
+                    shard += 1
+                    shard_path = self._shard_path(module, shard)
+
+                entries = []
+                with open(shard_path, 'ab') as shard_file:
+                    for filename, line in lines:
+                        member = gzip.compress(line, compresslevel=self.compresslevel)
+                        offset = shard_file.tell()
+                        shard_file.write(member)
+                        entries.append((filename, {'shard': shard, 'offset': offset, 'length': len(member), 'size': len(line)}))
+
+                with open(os.path.join(self.shards_dir(module), SHARD_INDEX_FILENAME), 'a') as index_file:
+                    index_file.write(''.join(json.dumps(dict(entry, key=filename)) + '\n' for filename, entry in entries))
+                index.update(entries)
+
+        return results
+
+    def read(self, module: str, filename: str) -> Optional[Any]:
+        """
+        Read a single record by seeking to its offset.
+
+        :param module: The module name.
+        :param filename: The record file name.
+        :return: The record data, or None if it does not exist.
+        """
+        entry = self._index(module).get(filename)
+        if entry is None:
+            return None
+        with open(self._shard_path(module, entry['shard']), 'rb') as shard_file:
+            shard_file.seek(entry['offset'])
+            member = shard_file.read(entry['length'])
+        return json.loads(gzip.decompress(member))['data']
+
+    def exists(self, module: str, filename: str) -> bool:
+        return filename in self._index(module)
+
+    def iter_entries(self) -> Iterator[Tuple[str, str, int, float]]:
+        """
+        Walk the shard indexes of every module.
+
+        :return: An iterator of ``(module, filename, size, mtime)`` tuples.
+        """
+        if not os.path.isdir(self.data_dir):
+            return
+        for entry in os.scandir(self.data_dir):
+            if not entry.is_dir() or not os.path.isdir(os.path.join(entry.path, SHARDS_DIRNAME)):
+                continue
+            index_path = os.path.join(entry.path, SHARDS_DIRNAME, SHARD_INDEX_FILENAME)
+            mtime = os.path.getmtime(index_path) if os.path.exists(index_path) else 0.0
+            for filename, record in self._index(entry.name).items():
+                yield entry.name, filename, record['size'], mtime
+
+    def close(self) -> None:
+        pass
+
+STORAGE_BACKENDS = {
+    JsonFileStorage.name: JsonFileStorage,
+    ShardStorage.name: ShardStorage
+}
+
+def create_storage(backend: str = 'json', data_dir: str = DATA_DIR, **kwargs) -> Any:
+    """
+    Create a storage backend by name.
+
+    :param backend: The backend name ('json' or 'shards').
+    :param data_dir: Root of the data directory.
+    :return: The storage backend.
+    :raises ValueError: If the backend is unknown.
+    """
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Invalid storage backend: {backend}. Allowed backends are: {', '.join(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[backend](data_dir=data_dir, **kwargs)
+
+def migrate_json_to_shards(data_dir: str = DATA_DIR, remove_source: bool = False) -> int:
+    """
+    Copy every loose JSON file of a data directory into compressed shards.
+
+    Files already present in the shard index are skipped, so the migration can
+    be re-run after an interruption.
+
+    :param data_dir: Root of the data directory.
+    :param remove_source: Delete each JSON file once it has been written to a shard.
+    :return: The number of migrated records.
+    """
+    source = JsonFileStorage(data_dir)
+    target = ShardStorage(data_dir)
+    migrated = 0
+    for module, filename, _, _ in list(source.iter_entries()):
+        if not target.exists(module, filename):
+            target.write(module, filename, source.read(module, filename))
+            migrated += 1
+        if remove_source:
+            os.remove(source.path_for(module, filename))
+    logging.info(f"Migrated {migrated} JSON files to shards in {data_dir}")
+    return migrated
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Migrate a data directory of JSON files to compressed shards.")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Root of the data directory")
+    parser.add_argument('--remove-source', action='store_true', help="Delete JSON files once migrated")
+    args = parser.parse_args()
+    migrate_json_to_shards(args.data_dir, remove_source=args.remove_source)
@@ -0,0 +1,102 @@
+import os
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterable, Optional
+
+from .storage import DATA_DIR
+
+SYNC_STATE_FILENAME = 'sync_state.json'
+SYNC_STATE_FILE = os.path.join(DATA_DIR, SYNC_STATE_FILENAME)
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+def parse_strava_date(value: str) -> datetime:
+    """
+    Parse a Strava ``start_date`` string into a timezone-aware datetime.
+
+    :param value: The date string, e.g. '2024-05-01T07:30:00Z'.
+    :return: The parsed datetime in UTC.
+    """
+    return datetime.strptime(value, DATE_FORMAT).replace(tzinfo=timezone.utc)
+
+class SyncState:
+    """
+    Persisted incremental sync state, keyed by athlete and section.
+
+    For each section the newest activity ``start_date`` seen (the high-water
+    mark) and the time of the last successful run are stored, so later runs
+    only need to list activities started after the mark.
+    """
+    def __init__(self, path: str = SYNC_STATE_FILE):
+        """
+        Initialize the SyncState and load it from disk if available.
+
+        :param path: Path of the JSON file holding the sync state.
+        """
+        self.path = path
+        self.state: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Load the sync state from disk if available."""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as file:
+                    self.state = json.load(file)
+            except Exception as e:
+                logging.error("Error loading sync state: %s", e)
+                self.state = {}
+
+    def save(self) -> None:
+        """Save the sync state to disk atomically."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w") as file:
+                json.dump(self.state, file, indent=4)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logging.error("Error saving sync state: %s", e)
+
+    def get_high_water_mark(self, athlete_id: Any, section: str) -> Optional[str]:
+        """
+        Return the newest ``start_date`` synced for an athlete section.
+
+        :param athlete_id: The athlete ID.
+        :param section: The section name, e.g. 'activities' or 'laps'.
+        :return: The high-water mark, or None if the section was never synced.
+        """
+        return self.state.get(str(athlete_id), {}).get(section, {}).get('high_water_mark')
+
+    def get_after(self, athlete_id: Any, sections: Iterable[str], lookback_seconds: float = 0) -> Optional[int]:
+        """
+        Compute the ``after`` epoch timestamp to list only activities not yet synced for every section.
+
+        :param athlete_id: The athlete ID.
+        :param sections: The sections that will be synced.
+        :param lookback_seconds: Seconds subtracted from the high-water mark to catch recent edits.
+        :return: The epoch timestamp, or None if any section needs a full history scan.
+        """
+        marks = [self.get_high_water_mark(athlete_id, section) for section in sections]
+        if not marks or any(mark is None for mark in marks):
+            return None
+        oldest_mark = parse_strava_date(min(marks))
+        return max(int(oldest_mark.timestamp() - lookback_seconds), 0)
+
+    def update(self, athlete_id: Any, section: str, newest_start_date: Optional[str]) -> None:
+        """
+        Record a successful run for an athlete section and advance its high-water mark.
+
+        Only call it once the listing was walked to its end and the items of
+        the section were fetched: activities older than the mark are not
+        listed again, so a mark advanced past missing activities loses them.
+
+        :param athlete_id: The athlete ID.
+        :param section: The section name.
+        :param newest_start_date: The newest ``start_date`` seen during the run, if any.
+        """
+        entry = self.state.setdefault(str(athlete_id), {}).setdefault(section, {})
+        current_mark = entry.get('high_water_mark')
+        if newest_start_date and (current_mark is None or newest_start_date > current_mark):
+            entry['high_water_mark'] = newest_start_date
+        entry['last_success'] = datetime.now(timezone.utc).strftime(DATE_FORMAT)
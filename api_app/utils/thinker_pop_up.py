@@ -242,7 +242,7 @@ def create_strava_activities_sections_popup() -> Dict[str, Any]:
     popup = ThinkerPopup(
         root,
         title="Strava Activities Download Settings",
-        geometry="500x320"
+        geometry="500x360"
     )
 
     popup.add_label("Select the Activities to Download:", row=0)
@@ -251,8 +251,9 @@ def create_strava_activities_sections_popup() -> Dict[str, Any]:
     popup.add_checkbutton("download_activities_zones", "Download Activities Zones (Payment)", row=3)
     popup.add_checkbutton("download_activities_comments", "Download Activities Comments", row=4)
     popup.add_checkbutton("download_activities_kudos", "Download Activities Kudos", row=5)
+    popup.add_checkbutton("download_activities_streams", "Download Activities Streams", row=6)
 
-    popup.add_button("Save Settings", lambda: popup.destroy(), row=6)
+    popup.add_button("Save Settings", lambda: popup.destroy(), row=7)
 
     root.wait_window(popup)
     results = popup.get_results()
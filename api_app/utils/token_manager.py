@@ -1,12 +1,10 @@
 import os
-import requests
-import webbrowser
 import sys
 import time
 import logging
 import json
 import threading
-from typing import Optional
+from typing import Any, Optional
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from urllib.parse import urlparse, parse_qs
 
@@ -21,6 +19,31 @@ API_URL = "https://www.strava.com/oauth/token"
 TOKEN_FILE = "token_cache.json"
 
 
+def refresh_access_token(client_id: Optional[str], client_secret: Optional[str], refresh_token: str) -> dict:
+    """Exchange a refresh token for a new access token.
+
+    Strava returns a new access token only when the current one expires
+    within an hour; otherwise the current token is returned again.
+
+    :param client_id: The application client ID.
+    :param client_secret: The application client secret.
+    :param refresh_token: The refresh token of the athlete.
+    :return: The token data with ``access_token``, ``refresh_token`` and ``expires_at``.
+    :raises requests.HTTPError: If the refresh token was rejected.
+    """
+    import requests
+
+    response = requests.post(
+        url=API_URL,
+        data={'client_id': client_id,
+            'client_secret': client_secret,
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token},
+        timeout=30
+    )
+    response.raise_for_status()
+    return response.json()
+
 class StravaAuthHandler(BaseHTTPRequestHandler):
     """A simple handler to capture the authorization code from the redirect URL."""
     def do_GET(self):
@@ -103,9 +126,43 @@ class TokenManager():
 
         logging.info("The Tokens are not valid")
 
+        if self.refresh_token:
+            try:
+                token_json = refresh_access_token(self.client_id, self.client_secret, self.refresh_token)
+                logging.info("Tokens renewed with the refresh token")
+                self.save_token(token_json)
+                self.load_token()
+                return token_json
+            except Exception as e:
+                logging.warning("Unable to renew the tokens with the refresh token, authorizing again: %s", e)
+
+        token_json = self.authorize()
+        if token_json is None:
+            return None
+
+        self.save_token(token_json)
+        self.load_token()
+        return token_json
+
+    def refresher(self) -> Any:
+        """Create a ``TokenRefresher`` renewing the cached token and saving every renewal to the cache.
+
+        :return: The token refresher, not started.
+        """
+        from .token_refresher import TokenRefresher
+
+        return TokenRefresher(self.access_token, self.refresh_token, self.expires_at, self.client_id, self.client_secret,
+                              on_refresh=self.save_token)
+
+    def authorize(self) -> Optional[dict]:
+        """Run the browser authorization-code flow and exchange the code for tokens.
+
+        :return: The token data as a dictionary, including the authorized athlete, or None if no code was received.
+        """
         client_id = self.client_id
         client_secret = self.client_secret
-        global REDIRECT_PORT
+        global REDIRECT_PORT, AUTH_CODE
+        AUTH_CODE = None
 
         redirect_uri = f'http://{SERVER_HOST}:{REDIRECT_PORT}'
 
@@ -116,6 +173,8 @@ class TokenManager():
             f'&scope=profile:read_all,activity:read_all'
         )
 
+        import webbrowser
+
         logging.info("Opening browser for Strava authorization...")
         webbrowser.open(request_url)
 
@@ -131,6 +190,8 @@ class TokenManager():
             logging.info("Authorization failed or code was not received.")
             return None
 
+        import requests
+
         token = requests.post(
             url='https://www.strava.com/api/v3/oauth/token',
             data={'client_id': client_id,
@@ -138,8 +199,5 @@ class TokenManager():
                 'code': code,
                 'grant_type': 'authorization_code'}
         )
-        token_json = token.json()
-
-        self.save_token(token_json)
-        return token_json
+        return token.json()
 
@@ -0,0 +1,104 @@
+import os
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from .token_manager import refresh_access_token
+
+# Strava only issues a new access token once the current one expires within the hour.
+REFRESH_MARGIN_SECONDS = 30 * 60
+RETRY_SECONDS = 60
+
+class TokenRefresher:
+    """
+    Keeps the access token of a long-running sync valid.
+
+    A background thread renews the token with the refresh token
+    (``grant_type=refresh_token``) ahead of its expiry, so requests keep
+    using a valid token through backfills that wait out several rate-limit
+    windows. Clients also call ``refresh`` when a request is answered with
+    401. Renewals are serialized by a lock and skipped when another caller
+    already replaced the rejected token, so concurrent 401s cause a single
+    refresh and every request is replayed with the new token.
+    """
+    def __init__(self, access_token: str, refresh_token: Optional[str], expires_at: float, client_id: Optional[str] = None, client_secret: Optional[str] = None,
+                 on_refresh: Optional[Callable[[dict], None]] = None, margin: float = REFRESH_MARGIN_SECONDS):
+        """
+        Initialize the TokenRefresher.
+
+        :param access_token: The current access token.
+        :param refresh_token: The refresh token. Without it the token is never renewed.
+        :param expires_at: Epoch timestamp at which the access token expires.
+        :param client_id: The application client ID. Read from the ``CLIENT_ID`` environment variable if omitted.
+        :param client_secret: The application client secret. Read from ``CLIENT_SECRET`` if omitted.
+        :param on_refresh: Called with the token data after every renewal, e.g. to persist it.
+        :param margin: Seconds before expiry at which the background thread renews the token.
+        """
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at or 0
+        self.client_id = client_id or os.getenv("CLIENT_ID")
+        self.client_secret = client_secret or os.getenv("CLIENT_SECRET")
+        self.on_refresh = on_refresh
+        self.margin = margin
+        self.refresh_count = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def seconds_until_refresh(self) -> float:
+        return self.expires_at - self.margin - time.time()
+
+    def refresh(self, rejected_token: Optional[str] = None) -> Optional[str]:
+        """
+        Renew the access token.
+
+        :param rejected_token: The token a request was rejected with. If the
+                               token was already replaced meanwhile, the
+                               current one is returned without a renewal.
+        :return: The valid access token, or None if the renewal failed.
+        """
+        with self._lock:
+            if rejected_token is not None and rejected_token != self.access_token:
+                return self.access_token
+            if not self.refresh_token:
+                logging.error("Unable to renew the access token: no refresh token")
+                return None
+            try:
+                token_data = refresh_access_token(self.client_id, self.client_secret, self.refresh_token)
+            except Exception as e:
+                logging.error(f"Unable to renew the access token: {str(e)}")
+                return None
+            self.access_token = token_data['access_token']
+            self.refresh_token = token_data.get('refresh_token', self.refresh_token)
+            self.expires_at = token_data.get('expires_at', time.time() + token_data.get('expires_in', 0))
+            self.refresh_count += 1
+            access_token = self.access_token
+        logging.info(f"Access token renewed, valid until {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.expires_at))}")
+        if self.on_refresh is not None:
+            try:
+                self.on_refresh(token_data)
+            except Exception as e:
+                logging.error(f"Error saving the renewed token: {str(e)}")
+        return access_token
+
+    def start(self) -> None:
+        """Start renewing the token in the background."""
+        if self._thread is None and self.refresh_token:
+            self._thread = threading.Thread(target=self._run, name='token-refresher', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            wait_seconds = self.seconds_until_refresh()
+            if wait_seconds <= 0:
+                self.refresh()
+                wait_seconds = max(self.seconds_until_refresh(), RETRY_SECONDS)
+            self._stop.wait(wait_seconds)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
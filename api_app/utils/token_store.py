@@ -0,0 +1,84 @@
+import os
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+TOKEN_STORE_FILE = "athlete_tokens.json"
+
+class TokenStore:
+    """
+    Tokens of several athletes authorized with the same Strava application.
+
+    Entries are keyed by athlete ID in ``athlete_tokens.json`` and hold the
+    access token, refresh token, expiry and the athlete name, so a team can
+    be synced from one place instead of one ``token_cache.json`` per person.
+    """
+    def __init__(self, path: str = TOKEN_STORE_FILE):
+        """
+        Initialize the TokenStore and load the persisted tokens.
+
+        :param path: Path of the JSON file holding the tokens.
+        """
+        self.path = path
+        self.tokens: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as file:
+                    self.tokens = json.load(file)
+            except Exception as e:
+                logging.error("Error loading athlete tokens: %s", e)
+
+    def athlete_ids(self) -> List[str]:
+        return list(self.tokens)
+
+    def get(self, athlete_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Return the token data of an athlete.
+
+        :param athlete_id: The athlete ID.
+        :return: The token data, or None if the athlete was never authorized.
+        """
+        return self.tokens.get(str(athlete_id))
+
+    def is_valid(self, athlete_id: Any) -> bool:
+        token = self.get(athlete_id)
+        return bool(token and token.get('access_token') and time.time() < token.get('expires_at', 0))
+
+    def add(self, token_data: Dict[str, Any], athlete_id: Optional[Any] = None) -> str:
+        """
+        Add or update the tokens of an athlete and persist the store.
+
+        :param token_data: The token response of the Strava OAuth endpoint.
+        :param athlete_id: The athlete ID. Read from the ``athlete`` of the token response if omitted.
+        :return: The athlete ID.
+        :raises ValueError: If the athlete ID is not given and not in the token response.
+        """
+        athlete = token_data.get('athlete') or {}
+        athlete_id = athlete_id if athlete_id is not None else athlete.get('id')
+        if athlete_id is None:
+            raise ValueError("The token response has no athlete, pass the athlete ID explicitly")
+        athlete_id = str(athlete_id)
+        with self._lock:
+            entry = self.tokens.setdefault(athlete_id, {})
+            entry.update({key: token_data[key] for key in ('access_token', 'refresh_token', 'expires_at') if key in token_data})
+            if athlete:
+                entry['name'] = f"{athlete.get('firstname', '')} {athlete.get('lastname', '')}".strip()
+        self.save()
+        logging.info(f"Stored tokens of athlete {athlete_id}")
+        return athlete_id
+
+    def remove(self, athlete_id: Any) -> None:
+        with self._lock:
+            self.tokens.pop(str(athlete_id), None)
+        self.save()
+
+    def save(self) -> None:
+        """Persist the tokens."""
+        temp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(temp_path, "w") as file:
+                json.dump(self.tokens, file, indent=4)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,244 @@
+import os
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any, Coroutine, Dict, List, Optional, Tuple
+
+PROFILE_TOP_FUNCTIONS = 25
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'started_at')
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.tracer.record(self.name, self.started_at, time.perf_counter(), self.args, error=exc_type)
+        return False
+
+class Tracer:
+    """
+    Records timed spans of the fetch pipeline as a Chrome trace.
+
+    Spans are recorded per asyncio task (or per thread outside the event
+    loop), so each batch worker and the write-behind thread get their own row
+    in ``chrome://tracing`` or https://ui.perfetto.dev, and the time spent on
+    the network, decoding, rate-limit waits and writing shows up next to each
+    other. A disabled tracer returns a shared no-op span, so the hooks cost a
+    method call when tracing is off.
+    """
+    def __init__(self, enabled: bool = True):
+        """
+        Initialize the Tracer.
+
+        :param enabled: Record spans. A disabled tracer records nothing.
+        """
+        self.enabled = enabled
+        self.events: List[Dict[str, Any]] = []
+        self.started_at = time.perf_counter()
+        self._tracks: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **args: Any):
+        """
+        Time a block of code.
+
+        :param name: The span name, e.g. 'request'.
+        :param args: Values shown with the span, e.g. the endpoint.
+        :return: A context manager recording the span when it exits.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def instant(self, name: str, **args: Any) -> None:
+        """
+        Record an event without duration, e.g. a slow callback warning.
+
+        :param name: The event name.
+        :param args: Values shown with the event.
+        """
+        if self.enabled:
+            self._append({'name': name, 'ph': 'i', 's': 't', 'ts': self._micros(time.perf_counter()), 'args': args})
+
+    def record(self, name: str, started_at: float, ended_at: float, args: Optional[Dict[str, Any]] = None, error: Optional[type] = None) -> None:
+        args = dict(args or {})
+        if error is not None:
+            args['error'] = error.__name__
+        self._append({'name': name, 'ph': 'X', 'ts': self._micros(started_at), 'dur': round((ended_at - started_at) * 1e6, 1), 'args': args})
+
+    def _micros(self, timestamp: float) -> float:
+        return round((timestamp - self.started_at) * 1e6, 1)
+
+    def _track(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = ('task', id(task)) if task is not None else ('thread', threading.get_ident())
+        track = self._tracks.get(key)
+        if track is None:
+            with self._lock:
+                track = self._tracks[key] = len(self._tracks) + 1
+            name = task.get_name() if task is not None else threading.current_thread().name
+            self._append({'name': 'thread_name', 'ph': 'M', 'args': {'name': name}}, track)
+        return track
+
+    def _append(self, event: Dict[str, Any], track: Optional[int] = None) -> None:
+        event['pid'] = os.getpid()
+        event['tid'] = track if track is not None else self._track()
+        with self._lock:
+            self.events.append(event)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Total the recorded spans by name.
+
+        :return: The count, total and mean duration in seconds of each span
+                 name. Concurrent spans overlap, so totals can exceed the run time.
+        """
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for event in self.events:
+                if event['ph'] != 'X':
+                    continue
+                entry = totals.setdefault(event['name'], {'count': 0, 'total_s': 0.0})
+                entry['count'] += 1
+                entry['total_s'] += event['dur'] / 1e6
+        for entry in totals.values():
+            entry['total_s'] = round(entry['total_s'], 3)
+            entry['mean_s'] = round(entry['total_s'] / entry['count'], 4)
+        return totals
+
+    def write(self, path: str) -> None:
+        """
+        Write the recorded events in the Chrome trace event format.
+
+        :param path: The trace file, to open in chrome://tracing or Perfetto.
+        """
+        with self._lock:
+            trace = {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(trace, file)
+        os.replace(temp_path, path)
+        for name, entry in sorted(self.summary().items(), key=lambda item: -item[1]['total_s']):
+            logging.info(f"Trace {name}: {int(entry['count'])} spans, {entry['total_s']}s total, {entry['mean_s']}s mean")
+        logging.info(f"Trace with {len(trace['traceEvents'])} events saved to {path}")
+
+NULL_TRACER = Tracer(enabled=False)
+
+class _SlowCallbackHandler(logging.Handler):
+    """Collects the slow callback warnings asyncio logs in debug mode."""
+    def __init__(self, session: "ProfilingSession"):
+        super().__init__(logging.WARNING)
+        self.session = session
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.thread in self.session.loop_threads and ' took ' in record.getMessage():
+            self.session.slow_callbacks.append(record.getMessage())
+            self.session.tracer.instant('slow_callback', message=record.getMessage())
+
+class ProfilingSession:
+    """
+    Opt-in diagnostics of the event loops run by an ``APIManager``.
+
+    Combines three tools, each enabled by its own option:
+
+    * a ``Tracer`` whose spans are written as a Chrome trace,
+    * ``cProfile`` over every event loop run, dumped in the ``pstats`` format
+      with the most expensive functions logged,
+    * asyncio debug mode reporting the callbacks that block the event loop
+      longer than a threshold, e.g. synchronous disk or JSON work.
+
+    The fetch pipeline runs in a single thread per event loop, so profiling
+    the thread running the loop covers the requests, decoding and saving.
+    """
+    def __init__(self, trace_file: Optional[str] = None, profile_file: Optional[str] = None, slow_callback_ms: Optional[float] = None, tracer: Optional[Tracer] = None):
+        """
+        Initialize the ProfilingSession.
+
+        :param trace_file: Chrome trace JSON file the spans are written to.
+        :param profile_file: File the ``cProfile`` statistics are dumped to.
+        :param slow_callback_ms: Report callbacks blocking the event loop longer than this.
+        :param tracer: Tracer shared with other sessions, whose owner writes it. A private one is created if ``trace_file`` is set.
+        """
+        self.trace_file = trace_file
+        self.profile_file = profile_file
+        self.slow_callback_ms = slow_callback_ms
+        self.tracer = tracer or (Tracer() if trace_file else NULL_TRACER)
+        self.slow_callbacks: List[str] = []
+        self.loop_threads = set()
+        self._profiler = None
+        if profile_file:
+            import cProfile
+            self._profiler = cProfile.Profile()
+        self._handler = None
+        if slow_callback_ms:
+            self._handler = _SlowCallbackHandler(self)
+            logging.getLogger('asyncio').addHandler(self._handler)
+
+    def run(self, coroutine: Coroutine) -> Any:
+        """
+        Run a coroutine on a fresh event loop with the enabled diagnostics.
+
+        :param coroutine: The coroutine to run.
+        :return: The coroutine result.
+        """
+        if not self.slow_callback_ms and self._profiler is None:
+            return asyncio.run(coroutine)
+
+        async def _run():
+            if self.slow_callback_ms:
+                asyncio.get_running_loop().slow_callback_duration = self.slow_callback_ms / 1000
+            return await coroutine
+
+        thread_id = threading.get_ident()
+        self.loop_threads.add(thread_id)
+        if self._profiler is not None:
+            self._profiler.enable()
+        try:
+            return asyncio.run(_run(), debug=bool(self.slow_callback_ms))
+        finally:
+            if self._profiler is not None:
+                self._profiler.disable()
+            self.loop_threads.discard(thread_id)
+
+    def write(self) -> None:
+        """
+        Write the trace and the profile, and report the slow callbacks.
+        """
+        if self.trace_file:
+            self.tracer.write(self.trace_file)
+        if self._profiler is not None:
+            import io
+            import pstats
+
+            self._profiler.dump_stats(self.profile_file)
+            report = io.StringIO()
+            pstats.Stats(self._profiler, stream=report).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+            logging.info(f"Profile saved to {self.profile_file}, most expensive functions:\n{report.getvalue()}")
+        if self._handler is not None:
+            logging.info(f"{len(self.slow_callbacks)} callbacks blocked the event loop for more than {self.slow_callback_ms:g} ms")
+
+    def close(self) -> None:
+        if self._handler is not None:
+            logging.getLogger('asyncio').removeHandler(self._handler)
+            self._handler = None
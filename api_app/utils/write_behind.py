@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import queue
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+from .tracing import NULL_TRACER
+
+_STOP = object()
+
+WriteRecord = Tuple[str, str, Any, Optional[int], Optional[str], Optional[Callable[[bool], None]]]
+
+class WriteBehindWriter:
+    """
+    Single writer thread persisting the records queued by the fetchers.
+
+    ``submit`` returns as soon as the record is queued, so a fetcher goes
+    back to the network instead of waiting for its file. The thread drains
+    the queue in batches of up to ``batch_size`` records, written with one
+    ``storage.write_many`` call. The queue is bounded: when the disk falls
+    behind, ``submit`` waits for room, which slows the fetchers down instead
+    of buffering responses without limit.
+    """
+    def __init__(self, storage: Any, manifest: Any, max_pending: int = 1000, batch_size: int = 64, tracer: Optional[Any] = None):
+        """
+        Initialize the WriteBehindWriter and start its thread.
+
+        :param storage: The storage backend the records are written to.
+        :param manifest: The manifest recording every written file.
+        :param max_pending: Maximum number of queued records before ``submit`` waits.
+        :param batch_size: Maximum number of records written together.
+        :param tracer: Optional ``Tracer`` timing every batch written.
+        """
+        self.storage = storage
+        self.manifest = manifest
+        self.batch_size = batch_size
+        self.tracer = tracer or NULL_TRACER
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self.counts = {'written': 0, 'failed': 0, 'batches': 0, 'waits': 0}
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+
+    async def submit(self, module: str, filename: str, data: Any, item_id: Optional[int] = None, endpoint: Optional[str] = None, on_written: Optional[Callable[[bool], None]] = None) -> None:
+        """
+        Queue a record, waiting for room if the queue is full.
+
+        :param module: The module name.
+        :param filename: The record file name.
+        :param data: The record data.
+        :param item_id: The ID of the record, recorded in the manifest.
+        :param endpoint: The endpoint name, recorded in the manifest.
+        :param on_written: Called from the writer thread with True once the record is written, or False if writing failed.
+        """
+        record = (module, filename, data, item_id, endpoint, on_written)
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.counts['waits'] += 1
+            await asyncio.to_thread(self.queue.put, record)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            record = self.queue.get()
+            if record is _STOP:
+                self.queue.task_done()
+                break
+            batch = [record]
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    self.queue.task_done()
+                    stopping = True
+                    break
+                batch.append(record)
+            with self.tracer.span('write_batch', records=len(batch)):
+                self._write_batch(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    def _write_batch(self, batch: List[WriteRecord]) -> None:
+        try:
+            results = self.storage.write_many([(module, filename, data) for module, filename, data, _, _, _ in batch])
+        except Exception as e:
+            logging.error(f"Error writing a batch of {len(batch)} records, writing them one by one: {str(e)}")
+            results = []
+            for module, filename, data, _, _, _ in batch:
+                try:
+                    results.append(self.storage.write(module, filename, data))
+                except Exception as e:
+                    logging.error(f"Error writing {filename}: {str(e)}")
+                    results.append(None)
+        self.counts['batches'] += 1
+
+        for (module, filename, _, item_id, endpoint, on_written), result in zip(batch, results):
+            if result is not None:
+                size, sha256 = result
+                self.manifest.record(module or 'athlete', filename, size, sha256, item_id=item_id, endpoint=endpoint)
+                self.counts['written'] += 1
+            else:
+                self.counts['failed'] += 1
+            if on_written is not None:
+                try:
+                    on_written(result is not None)
+                except Exception as e:
+                    logging.error(f"Error after writing {filename}: {str(e)}")
+
+    def flush(self) -> None:
+        """Wait until every queued record is written."""
+        self.queue.join()
+
+    def close(self) -> None:
+        """Write the queued records and stop the thread."""
+        if self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join()
+        logging.info(f"Write-behind: {self.counts['written']} records written in {self.counts['batches']} batches, "
+                     f"{self.counts['failed']} failed, fetchers waited for the disk {self.counts['waits']} times")
@@ -0,0 +1,88 @@
+import logging
+from typing import Dict, Any, List, Optional
+
+from .stream_store import _import_numpy
+
+# Streams binned per zone type of /athlete/zones.
+ZONE_STREAMS = {
+    'heart_rate': ('heartrate', 'heartrate'),
+    'power': ('watts', 'power')
+}
+
+def time_in_zones(np: Any, timestamps: Any, values: Any, zones: List[Dict[str, int]], max_gap: int = 10) -> List[float]:
+    """
+    Seconds spent in each zone, binning every sample with the time until the next one.
+
+    Samples followed by a gap longer than ``max_gap`` (auto-pause) and missing
+    samples (stored as -1) do not count.
+
+    :param np: The numpy module.
+    :param timestamps: Sample times in seconds.
+    :param values: Heart rate or power samples.
+    :param zones: Zone boundaries as returned by /athlete/zones, e.g. [{'min': 0, 'max': 115}, ...].
+    :param max_gap: Longest time in seconds a single sample is credited with.
+    :return: The time in seconds per zone.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(timestamps) < 2:
+        return [0.0] * len(zones)
+    durations = np.diff(timestamps)
+    values = values[:-1]
+    counted = (durations <= max_gap) & (values >= 0)
+    edges = np.asarray([zone['min'] for zone in zones[1:]], dtype=np.float64)
+    buckets = np.digitize(values[counted], edges)
+    return np.bincount(buckets, weights=durations[counted], minlength=len(zones)).tolist()
+
+class ZoneEngine:
+    """
+    Local replacement for /activities/{id}/zones, which requires a Strava subscription (402 Payment Required).
+
+    Time in heart-rate and power zones is computed from the stored activity
+    streams with vectorized binning, using the athlete zone boundaries fetched
+    once from /athlete/zones or given in the configuration. The result has
+    the same shape as the zones endpoint response.
+    """
+    def __init__(self, athlete_zones: Dict[str, Any], max_gap: int = 10):
+        """
+        Initialize the ZoneEngine.
+
+        :param athlete_zones: The /athlete/zones response, e.g. {'heart_rate': {'custom_zones': False, 'zones': [...]}, 'power': {'zones': [...]}}.
+        :param max_gap: Longest time in seconds a single sample is credited with.
+        """
+        self.np = _import_numpy()
+        self.athlete_zones = athlete_zones
+        self.max_gap = max_gap
+
+    def compute(self, streams: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Compute the zones of an activity from its streams.
+
+        :param streams: The activity streams keyed by type, as returned by ``StreamStore.read``.
+        :return: The zone distributions in the format of /activities/{id}/zones, or None if the streams are not stored.
+                 An activity without a time, heart rate or power stream has no zones, so the result is an empty list.
+        """
+        if streams is None:
+            return None
+        if 'time' not in streams:
+            return []
+
+        activity_zones = []
+        for zone_type, (stream_name, response_type) in ZONE_STREAMS.items():
+            zone_config = self.athlete_zones.get(zone_type) or {}
+            zones = zone_config.get('zones')
+            if not zones or stream_name not in streams:
+                continue
+            times = time_in_zones(self.np, streams['time'], streams[stream_name], zones, self.max_gap)
+            activity_zones.append({
+                'type': response_type,
+                'sensor_based': True,
+                'custom_zones': zone_config.get('custom_zones', False),
+                'resource_state': 3,
+                'distribution_buckets': [
+                    {'min': zone['min'], 'max': zone['max'], 'time': seconds}
+                    for zone, seconds in zip(zones, times)
+                ]
+            })
+        logging.debug(f"Computed {len(activity_zones)} zone distributions locally")
+        return activity_zones
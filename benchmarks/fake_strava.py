@@ -0,0 +1,520 @@
+"""
+Local stand-in for the Strava API, for offline and deterministic benchmarks.
+
+Serves synthetic data under the same paths as https://www.strava.com/api/v3:
+the athlete, stats and zones, the activities listing and every
+``StravaEndpoints`` URL (detailed activity, laps, zones, comments, kudos,
+streams, routes, clubs, club members and activities). The data is derived
+from the seed and the item IDs, so every run sees the same activities.
+
+Like Strava, every response carries ``x-ratelimit-*`` and
+``x-readratelimit-usage``/``-limit`` headers counted in quarter-hour and daily
+windows, requests beyond the read limits are answered with 429, and
+``If-None-Match`` is answered with 304 while the ETag is unchanged. Latency,
+429 and 5xx responses can be injected. Any access token is accepted.
+
+Usage:
+    python benchmarks/fake_strava.py [--port 8765] [--activities 1000] [--latency-ms 50] [--error-rate 0.01] [--throttle-rate 0.01]
+    python -m api_app sync --base-url http://127.0.0.1:8765/api/v3 --sections activities,laps,kudos
+"""
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+API_PREFIX = '/api/v3'
+# Strava's default read limits: 100 requests every 15 minutes, 1,000 a day
+READ_LIMITS = (100, 1000)
+SHORT_WINDOW_SECONDS = 15 * 60
+DAILY_WINDOW_SECONDS = 24 * 3600
+
+ACTIVITY_ID_BASE = 10_000_000_000
+ROUTE_ID_BASE = 3_000_000_000_000_000_000
+CLUB_ID_BASE = 1_000_000
+# Start of the newest activity, the others are spread every 12 hours before it
+NEWEST_START = 1_735_689_600
+ACTIVITY_INTERVAL_SECONDS = 12 * 3600
+SPORT_TYPES = ('Run', 'Ride', 'Swim', 'Walk', 'Hike', 'VirtualRide')
+STREAM_KEYS = ('time', 'distance', 'latlng', 'altitude', 'velocity_smooth', 'heartrate', 'cadence', 'watts', 'temp', 'moving', 'grade_smooth')
+HEART_RATE_ZONES = [{'min': 0, 'max': 123}, {'min': 123, 'max': 153}, {'min': 153, 'max': 169}, {'min': 169, 'max': 184}, {'min': 184, 'max': -1}]
+POWER_ZONES = [{'min': 0, 'max': 138}, {'min': 138, 'max': 188}, {'min': 188, 'max': 225}, {'min': 225, 'max': 263},
+               {'min': 263, 'max': 300}, {'min': 300, 'max': 375}, {'min': 375, 'max': -1}]
+FIRST_NAMES = ('Ana', 'Ben', 'Carla', 'David', 'Elena', 'Femi', 'Greta', 'Hugo', 'Iris', 'Jon')
+LAST_NAMES = ('A.', 'B.', 'C.', 'D.', 'E.', 'F.', 'G.', 'H.')
+
+def iso_date(epoch: float) -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(epoch))
+
+class FakeStrava:
+    """
+    aiohttp application serving synthetic Strava data at a configurable scale.
+
+    Run it inside an event loop with ``start``/``stop``, or in a background
+    thread with ``start_in_thread``/``stop_thread`` when the code under test
+    runs its own event loops, e.g. ``APIManager``.
+    """
+    def __init__(self, activities: int = 200, routes: int = 5, clubs: int = 3, club_members: int = 40, stream_points: int = 1000, athlete_id: int = 1,
+                 seed: int = 0, latency_ms: float = 0, jitter_ms: float = 0, throttle_rate: float = 0, error_rate: float = 0,
+                 read_limits: Tuple[int, int] = READ_LIMITS):
+        """
+        Initialize the FakeStrava server.
+
+        :param activities: Number of activities of the athlete.
+        :param routes: Number of routes of the athlete.
+        :param clubs: Number of clubs the athlete is a member of.
+        :param club_members: Number of members of each club.
+        :param stream_points: Maximum number of samples of each activity stream.
+        :param athlete_id: ID of the authenticated athlete.
+        :param seed: Seed of the synthetic data and of the injected faults.
+        :param latency_ms: Delay added to every response.
+        :param jitter_ms: Random extra delay, up to this value, added to every response.
+        :param throttle_rate: Share of the requests answered with 429 regardless of the usage.
+        :param error_rate: Share of the requests answered with 500, 502 or 503.
+        :param read_limits: Read limits of the 15-minute and daily windows.
+        """
+        self.activities = activities
+        self.routes = routes
+        self.clubs = clubs
+        self.club_members = club_members
+        self.stream_points = stream_points
+        self.athlete_id = athlete_id
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.read_limits = read_limits
+        self.random = random.Random(seed)
+        self.statuses: Counter = Counter()
+        self.requests: Counter = Counter()
+        self._usage = [0, 0]
+        self._windows = self._current_windows()
+        self._runner: Optional[web.AppRunner] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # Synthetic data
+
+    def _rng(self, kind: str, item_id: int) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{item_id}")
+
+    def _person(self, rng: random.Random) -> Dict[str, Any]:
+        return {'resource_state': 2, 'firstname': rng.choice(FIRST_NAMES), 'lastname': rng.choice(LAST_NAMES)}
+
+    def activity_ids(self) -> List[int]:
+        return [ACTIVITY_ID_BASE + index for index in range(self.activities)]
+
+    def activity_summary(self, activity_id: int) -> Dict[str, Any]:
+        index = activity_id - ACTIVITY_ID_BASE
+        rng = self._rng('activity', activity_id)
+        sport_type = rng.choice(SPORT_TYPES)
+        moving_time = rng.randint(900, 3 * 3600)
+        speed = {'Run': 3.2, 'Ride': 8.0, 'VirtualRide': 9.0, 'Swim': 0.9}.get(sport_type, 1.4) * rng.uniform(0.8, 1.2)
+        start = NEWEST_START - (self.activities - 1 - index) * ACTIVITY_INTERVAL_SECONDS
+        has_heartrate = rng.random() < 0.8
+        return {
+            'resource_state': 2,
+            'athlete': {'id': self.athlete_id, 'resource_state': 1},
+            'name': f"{'Morning' if index % 2 else 'Evening'} {sport_type}",
+            'distance': round(moving_time * speed, 1),
+            'moving_time': moving_time,
+            'elapsed_time': moving_time + rng.randint(0, 600),
+            'total_elevation_gain': round(rng.uniform(0, 800), 1),
+            'type': sport_type,
+            'sport_type': sport_type,
+            'workout_type': None,
+            'id': activity_id,
+            'start_date': iso_date(start),
+            'start_date_local': iso_date(start + 3600),
+            'timezone': '(GMT+01:00) Europe/Madrid',
+            'achievement_count': rng.randint(0, 5),
+            'kudos_count': rng.choice((0, 0, rng.randint(1, 30))),
+            'comment_count': rng.choice((0, 0, 0, rng.randint(1, 5))),
+            'athlete_count': rng.randint(1, 4),
+            'trainer': sport_type == 'VirtualRide',
+            'commute': False,
+            'private': False,
+            'gear_id': f"g{rng.randint(1, 3)}",
+            'average_speed': round(speed, 3),
+            'max_speed': round(speed * rng.uniform(1.2, 2.0), 3),
+            'has_heartrate': has_heartrate,
+            'average_heartrate': round(rng.uniform(120, 165), 1) if has_heartrate else None,
+            'max_heartrate': rng.randint(166, 195) if has_heartrate else None,
+            'map': {'id': f"a{activity_id}", 'summary_polyline': 'u{~vFvyys@fS]', 'resource_state': 2}
+        }
+
+    def activity_laps(self, activity_id: int) -> List[Dict[str, Any]]:
+        summary = self.activity_summary(activity_id)
+        count = min(max(int(math.ceil(summary['distance'] / 1000)), 1), 50)
+        return [{
+            'id': activity_id * 100 + lap,
+            'resource_state': 2,
+            'name': f"Lap {lap + 1}",
+            'activity': {'id': activity_id, 'resource_state': 1},
+            'elapsed_time': summary['elapsed_time'] // count,
+            'moving_time': summary['moving_time'] // count,
+            'distance': round(summary['distance'] / count, 1),
+            'lap_index': lap + 1,
+            'split': lap + 1,
+            'average_speed': summary['average_speed']
+        } for lap in range(count)]
+
+    def activity_detail(self, activity_id: int) -> Dict[str, Any]:
+        detail = self.activity_summary(activity_id)
+        rng = self._rng('detail', activity_id)
+        detail.update({
+            'resource_state': 3,
+            'description': "Synthetic activity served by the fake Strava server",
+            'calories': round(detail['moving_time'] * rng.uniform(0.15, 0.3), 1),
+            'device_name': 'Garmin Forerunner',
+            'laps': self.activity_laps(activity_id),
+            'splits_metric': [{'distance': 1000.0, 'elapsed_time': rng.randint(240, 420), 'split': split + 1} for split in range(min(int(detail['distance'] // 1000), 50))],
+            'segment_efforts': []
+        })
+        return detail
+
+    def activity_kudos(self, activity_id: int) -> List[Dict[str, Any]]:
+        rng = self._rng('kudos', activity_id)
+        return [self._person(rng) for _ in range(self.activity_summary(activity_id)['kudos_count'])]
+
+    def activity_comments(self, activity_id: int) -> List[Dict[str, Any]]:
+        rng = self._rng('comments', activity_id)
+        return [{'id': activity_id * 10 + index, 'activity_id': activity_id, 'text': "Nice one!", 'athlete': self._person(rng), 'created_at': self.activity_summary(activity_id)['start_date']}
+                for index in range(self.activity_summary(activity_id)['comment_count'])]
+
+    def activity_zones(self, activity_id: int) -> List[Dict[str, Any]]:
+        moving_time = self.activity_summary(activity_id)['moving_time']
+        rng = self._rng('zones', activity_id)
+        zones = []
+        for zone_type, boundaries in (('heartrate', HEART_RATE_ZONES), ('power', POWER_ZONES)):
+            weights = [rng.random() for _ in boundaries]
+            zones.append({'type': zone_type, 'sensor_based': True, 'distribution_buckets': [
+                {'min': bucket['min'], 'max': bucket['max'], 'time': round(moving_time * weight / sum(weights))} for bucket, weight in zip(boundaries, weights)]})
+        return zones
+
+    def activity_streams(self, activity_id: int, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        summary = self.activity_summary(activity_id)
+        points = min(summary['moving_time'], self.stream_points)
+        rng = self._rng('streams', activity_id)
+        step = summary['moving_time'] / points
+        speed = summary['average_speed']
+        samples = {
+            'time': [round(index * step) for index in range(points)],
+            'distance': [round(index * step * speed, 1) for index in range(points)],
+            'latlng': [[round(41.38 + index * 1e-5, 6), round(2.17 + index * 1e-5, 6)] for index in range(points)],
+            'altitude': [round(100 + 20 * math.sin(index / 50), 1) for index in range(points)],
+            'velocity_smooth': [round(speed * rng.uniform(0.9, 1.1), 2) for _ in range(points)],
+            'heartrate': [rng.randint(110, 180) for _ in range(points)],
+            'cadence': [rng.randint(80, 95) for _ in range(points)],
+            'watts': [rng.randint(100, 320) for _ in range(points)],
+            'temp': [21] * points,
+            'moving': [True] * points,
+            'grade_smooth': [round(rng.uniform(-5, 5), 1) for _ in range(points)]
+        }
+        streams = {}
+        for key in ['time', 'distance'] + [key for key in keys if key not in ('time', 'distance')]:
+            if key in samples and (key != 'heartrate' or summary['has_heartrate']):
+                streams[key] = {'data': samples[key], 'series_type': 'distance', 'original_size': points, 'resolution': 'high'}
+        return streams
+
+    def athlete(self) -> Dict[str, Any]:
+        return {
+            'id': self.athlete_id, 'resource_state': 3, 'username': 'fake_athlete', 'firstname': 'Fake', 'lastname': 'Athlete',
+            'city': 'Barcelona', 'country': 'Spain', 'sex': 'F', 'premium': True, 'summit': True,
+            'created_at': '2015-03-01T10:00:00Z', 'updated_at': iso_date(NEWEST_START), 'weight': 62.0, 'ftp': 250
+        }
+
+    def athlete_stats(self) -> Dict[str, Any]:
+        totals: Dict[str, Dict[str, float]] = {}
+        for activity_id in self.activity_ids():
+            summary = self.activity_summary(activity_id)
+            kind = 'ride' if 'Ride' in summary['sport_type'] else 'swim' if summary['sport_type'] == 'Swim' else 'run'
+            entry = totals.setdefault(kind, {'count': 0, 'distance': 0.0, 'moving_time': 0, 'elapsed_time': 0, 'elevation_gain': 0.0})
+            entry['count'] += 1
+            entry['distance'] += summary['distance']
+            entry['moving_time'] += summary['moving_time']
+            entry['elapsed_time'] += summary['elapsed_time']
+            entry['elevation_gain'] += summary['total_elevation_gain']
+        stats: Dict[str, Any] = {'biggest_ride_distance': 0.0, 'biggest_climb_elevation_gain': 0.0}
+        for kind in ('ride', 'run', 'swim'):
+            stats[f'all_{kind}_totals'] = totals.get(kind, {'count': 0, 'distance': 0.0, 'moving_time': 0, 'elapsed_time': 0, 'elevation_gain': 0.0})
+        return stats
+
+    def route(self, route_id: int) -> Dict[str, Any]:
+        rng = self._rng('route', route_id)
+        return {
+            'id': route_id, 'id_str': str(route_id), 'resource_state': 3, 'name': f"Route {route_id - ROUTE_ID_BASE + 1}",
+            'athlete': {'id': self.athlete_id, 'resource_state': 2}, 'distance': round(rng.uniform(5000, 100000), 1),
+            'elevation_gain': round(rng.uniform(0, 1500), 1), 'type': rng.choice((1, 2)), 'sub_type': 1, 'private': False, 'starred': False,
+            'map': {'id': f"r{route_id}", 'summary_polyline': 'u{~vFvyys@fS]', 'resource_state': 3}, 'segments': []
+        }
+
+    def club(self, club_id: int) -> Dict[str, Any]:
+        return {
+            'id': club_id, 'resource_state': 3, 'name': f"Club {club_id - CLUB_ID_BASE + 1}", 'sport_type': 'running',
+            'city': 'Barcelona', 'country': 'Spain', 'private': False, 'member_count': self.club_members, 'membership': 'member'
+        }
+
+    def club_member_list(self, club_id: int) -> List[Dict[str, Any]]:
+        rng = self._rng('members', club_id)
+        return [dict(self._person(rng), membership='member', admin=False, owner=False) for _ in range(self.club_members)]
+
+    def club_activity_list(self, club_id: int) -> List[Dict[str, Any]]:
+        rng = self._rng('club activities', club_id)
+        return [{'resource_state': 2, 'athlete': self._person(rng), 'name': "Club run", 'distance': round(rng.uniform(3000, 30000), 1),
+                 'moving_time': rng.randint(900, 7200), 'elapsed_time': rng.randint(900, 8000), 'total_elevation_gain': round(rng.uniform(0, 300), 1),
+                 'type': 'Run', 'sport_type': 'Run', 'workout_type': None} for _ in range(min(self.club_members, 50))]
+
+    # HTTP
+
+    @staticmethod
+    def _page(items: List[Any], request: web.Request) -> List[Any]:
+        page = max(int(request.query.get('page', 1)), 1)
+        per_page = min(max(int(request.query.get('per_page', 30)), 1), 200)
+        return items[(page - 1) * per_page:page * per_page]
+
+    @staticmethod
+    def _not_found(resource: str) -> web.Response:
+        return web.json_response({'message': 'Resource Not Found', 'errors': [{'resource': resource, 'field': 'id', 'code': 'not found'}]}, status=404)
+
+    async def handle_athlete(self, request: web.Request) -> web.Response:
+        return web.json_response(self.athlete())
+
+    async def handle_athlete_zones(self, request: web.Request) -> web.Response:
+        return web.json_response({'heart_rate': {'custom_zones': False, 'zones': HEART_RATE_ZONES}, 'power': {'zones': POWER_ZONES}})
+
+    async def handle_athlete_stats(self, request: web.Request) -> web.Response:
+        if int(request.match_info['athlete_id']) != self.athlete_id:
+            return self._not_found('Athlete')
+        return web.json_response(self.athlete_stats())
+
+    async def handle_activities(self, request: web.Request) -> web.Response:
+        before = request.query.get('before')
+        after = request.query.get('after')
+        summaries = [self.activity_summary(activity_id) for activity_id in self.activity_ids()]
+        starts = {summary['id']: NEWEST_START - (self.activities - 1 - (summary['id'] - ACTIVITY_ID_BASE)) * ACTIVITY_INTERVAL_SECONDS for summary in summaries}
+        if before:
+            summaries = [summary for summary in summaries if starts[summary['id']] < int(before)]
+        if after:
+            summaries = [summary for summary in summaries if starts[summary['id']] > int(after)]
+        # Newest first, oldest first when listing after a date without an upper bound
+        if not after or before:
+            summaries.reverse()
+        return web.json_response(self._page(summaries, request))
+
+    async def handle_activity(self, request: web.Request) -> web.Response:
+        activity_id = int(request.match_info['activity_id'])
+        if activity_id not in range(ACTIVITY_ID_BASE, ACTIVITY_ID_BASE + self.activities):
+            return self._not_found('Activity')
+        kind = request.match_info.get('kind')
+        if kind is None:
+            return web.json_response(self.activity_detail(activity_id))
+        if kind == 'laps':
+            return web.json_response(self.activity_laps(activity_id))
+        if kind == 'zones':
+            return web.json_response(self.activity_zones(activity_id))
+        if kind == 'comments':
+            return web.json_response(self.activity_comments(activity_id))
+        if kind == 'kudos':
+            return web.json_response(self._page(self.activity_kudos(activity_id), request))
+        if kind == 'streams':
+            keys = request.query.get('keys', ','.join(STREAM_KEYS)).split(',')
+            streams = self.activity_streams(activity_id, keys)
+            return web.json_response(streams if request.query.get('key_by_type') == 'true' else [dict(stream, type=key) for key, stream in streams.items()])
+        return self._not_found('Activity')
+
+    async def handle_athlete_routes(self, request: web.Request) -> web.Response:
+        if int(request.match_info['athlete_id']) != self.athlete_id:
+            return self._not_found('Athlete')
+        return web.json_response(self._page([self.route(ROUTE_ID_BASE + index) for index in range(self.routes)], request))
+
+    async def handle_route(self, request: web.Request) -> web.Response:
+        route_id = int(request.match_info['route_id'])
+        if route_id not in range(ROUTE_ID_BASE, ROUTE_ID_BASE + self.routes):
+            return self._not_found('Route')
+        return web.json_response(self.route(route_id))
+
+    async def handle_athlete_clubs(self, request: web.Request) -> web.Response:
+        return web.json_response(self._page([self.club(CLUB_ID_BASE + index) for index in range(self.clubs)], request))
+
+    async def handle_club(self, request: web.Request) -> web.Response:
+        club_id = int(request.match_info['club_id'])
+        if club_id not in range(CLUB_ID_BASE, CLUB_ID_BASE + self.clubs):
+            return self._not_found('Club')
+        kind = request.match_info.get('kind')
+        if kind is None:
+            return web.json_response(self.club(club_id))
+        if kind == 'members':
+            return web.json_response(self._page(self.club_member_list(club_id), request))
+        if kind == 'activities':
+            return web.json_response(self._page(self.club_activity_list(club_id), request))
+        return self._not_found('Club')
+
+    def _current_windows(self) -> Tuple[int, int]:
+        now = time.time()
+        return int(now // SHORT_WINDOW_SECONDS), int(now // DAILY_WINDOW_SECONDS)
+
+    def _count_usage(self) -> None:
+        windows = self._current_windows()
+        if windows[0] != self._windows[0]:
+            self._usage[0] = 0
+        if windows[1] != self._windows[1]:
+            self._usage[1] = 0
+        self._windows = windows
+        self._usage[0] += 1
+        self._usage[1] += 1
+
+    def _rate_limit_headers(self) -> Dict[str, str]:
+        usage = f"{self._usage[0]},{self._usage[1]}"
+        return {
+            'X-RateLimit-Limit': f"{self.read_limits[0] * 2},{self.read_limits[1] * 2}",
+            'X-RateLimit-Usage': usage,
+            'X-ReadRateLimit-Limit': f"{self.read_limits[0]},{self.read_limits[1]}",
+            'X-ReadRateLimit-Usage': usage
+        }
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource is not None else 'unknown'
+        self.requests[route] += 1
+        response = await self._respond(request, handler)
+        response.headers.update(self._rate_limit_headers())
+        self.statuses[response.status] += 1
+        return response
+
+    async def _respond(self, request: web.Request, handler) -> web.StreamResponse:
+        if not request.headers.get('Authorization', '').startswith('Bearer '):
+            return web.json_response({'message': 'Authorization Error', 'errors': [{'resource': 'Athlete', 'field': 'access_token', 'code': 'invalid'}]}, status=401)
+        self._count_usage()
+        if self._usage[0] > self.read_limits[0] or self._usage[1] > self.read_limits[1]:
+            return web.json_response({'message': 'Rate Limit Exceeded', 'errors': [{'resource': 'Application', 'field': 'rate limit', 'code': 'exceeded'}]}, status=429)
+        delay_ms = self.latency_ms + (self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+        draw = self.random.random()
+        if draw < self.throttle_rate:
+            return web.json_response({'message': 'Rate Limit Exceeded', 'errors': []}, status=429)
+        if draw < self.throttle_rate + self.error_rate:
+            return web.json_response({'message': 'Internal Server Error', 'errors': []}, status=self.random.choice((500, 502, 503)))
+
+        response = await handler(request)
+        if response.status == 200 and isinstance(response, web.Response) and response.body is not None:
+            etag = f'"{hashlib.sha1(response.body).hexdigest()}"'
+            if request.headers.get('If-None-Match') == etag:
+                return web.Response(status=304, headers={'ETag': etag})
+            response.headers['ETag'] = etag
+        return response
+
+    def app(self) -> web.Application:
+        """
+        Build the aiohttp application.
+
+        :return: The application, with every route under ``/api/v3``.
+        """
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get(f'{API_PREFIX}/athlete', self.handle_athlete)
+        app.router.add_get(f'{API_PREFIX}/athlete/zones', self.handle_athlete_zones)
+        app.router.add_get(f'{API_PREFIX}/athlete/activities', self.handle_activities)
+        app.router.add_get(f'{API_PREFIX}/athlete/clubs', self.handle_athlete_clubs)
+        app.router.add_get(f'{API_PREFIX}/athletes/{{athlete_id:\\d+}}/stats', self.handle_athlete_stats)
+        app.router.add_get(f'{API_PREFIX}/athletes/{{athlete_id:\\d+}}/routes', self.handle_athlete_routes)
+        app.router.add_get(f'{API_PREFIX}/activities/{{activity_id:\\d+}}', self.handle_activity)
+        app.router.add_get(f'{API_PREFIX}/activities/{{activity_id:\\d+}}/{{kind}}', self.handle_activity)
+        app.router.add_get(f'{API_PREFIX}/routes/{{route_id:\\d+}}', self.handle_route)
+        app.router.add_get(f'{API_PREFIX}/clubs/{{club_id:\\d+}}', self.handle_club)
+        app.router.add_get(f'{API_PREFIX}/clubs/{{club_id:\\d+}}/{{kind}}', self.handle_club)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """
+        Start serving on the running event loop.
+
+        :param host: The interface to listen on.
+        :param port: The port to listen on. A free port is picked if 0.
+        :return: The API base URL to pass to the clients, e.g. http://127.0.0.1:8765/api/v3.
+        """
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """
+        Start serving from an event loop in a background thread.
+
+        :param host: The interface to listen on.
+        :param port: The port to listen on. A free port is picked if 0.
+        :return: The API base URL to pass to the clients.
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='fake-strava', daemon=True)
+        self._thread.start()
+        return asyncio.run_coroutine_threadsafe(self.start(host, port), self._loop).result()
+
+    def stop_thread(self) -> None:
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop, self._thread = None, None
+
+    def report(self) -> str:
+        statuses = ', '.join(f"{status}: {count}" for status, count in sorted(self.statuses.items()))
+        return f"{sum(self.requests.values())} requests ({statuses})"
+
+def parse_limits(value: str) -> Tuple[int, int]:
+    short, daily = (int(part) for part in value.split(','))
+    return short, daily
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic Strava data locally.")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on")
+    parser.add_argument('--port', type=int, default=8765, help="Port to listen on")
+    parser.add_argument('--activities', type=int, default=200, help="Number of activities")
+    parser.add_argument('--routes', type=int, default=5, help="Number of routes")
+    parser.add_argument('--clubs', type=int, default=3, help="Number of clubs")
+    parser.add_argument('--club-members', type=int, default=40, help="Number of members of each club")
+    parser.add_argument('--stream-points', type=int, default=1000, help="Maximum samples of each activity stream")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the data and the injected faults")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Delay added to every response")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Random extra delay, up to this value")
+    parser.add_argument('--throttle-rate', type=float, default=0, help="Share of requests answered with 429")
+    parser.add_argument('--error-rate', type=float, default=0, help="Share of requests answered with 500, 502 or 503")
+    parser.add_argument('--read-limits', type=parse_limits, default=READ_LIMITS, help="15-minute and daily read limits, e.g. 100,1000")
+    args = parser.parse_args()
+
+    server = FakeStrava(activities=args.activities, routes=args.routes, clubs=args.clubs, club_members=args.club_members, stream_points=args.stream_points,
+                        seed=args.seed, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, throttle_rate=args.throttle_rate,
+                        error_rate=args.error_rate, read_limits=args.read_limits)
+
+    async def serve():
+        base_url = await server.start(args.host, args.port)
+        print(f"Fake Strava API on {base_url} ({args.activities} activities), Ctrl+C to stop")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print(f"Served {server.report()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Measure the startup cost of the command-line entry point.
+
+Runs ``python -m api_app --help`` and the package imports in fresh
+interpreters and reports the median wall time, plus the slowest modules
+reported by ``python -X importtime``. With ``--max-ms`` the script exits
+with status 1 when the median exceeds the budget, so it can guard against
+heavy imports creeping back into the startup path.
+
+Usage:
+    python benchmarks/startup_time.py [--runs 10] [--max-ms 150]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    'cli --help': [sys.executable, '-m', 'api_app', '--help'],
+    'import api_app.utils': [sys.executable, '-c', 'import api_app.utils'],
+    'import api_manager': [sys.executable, '-c', 'import api_app.utils.api_manager']
+}
+
+HEAVY_MODULES = ('tkinter', 'aiohttp', 'requests', 'numpy', 'pyarrow')
+
+def time_command(command, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def import_profile(command, top):
+    result = subprocess.run(command[:1] + ['-X', 'importtime'] + command[1:], cwd=ROOT, capture_output=True, text=True)
+    modules, imported = [], set()
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)', line)
+        if not match:
+            continue
+        imported.add(match.group(3).split('.')[0])
+        if len(match.group(2)) <= 2:
+            modules.append((int(match.group(1)) / 1000, match.group(3)))
+    heavy = sorted(imported.intersection(HEAVY_MODULES))
+    return sorted(modules, reverse=True)[:top], heavy
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the startup cost of the command-line entry point.")
+    parser.add_argument('--runs', type=int, default=10, help="Interpreter launches per target")
+    parser.add_argument('--top', type=int, default=5, help="Slowest top-level imports to show")
+    parser.add_argument('--max-ms', type=float, default=None, help="Fail if the median 'cli --help' time exceeds this budget")
+    args = parser.parse_args()
+
+    baseline = time_command([sys.executable, '-c', 'pass'], args.runs)
+    print(f"{'bare interpreter':<24} {baseline:8.1f} ms")
+    results = {}
+    for name, command in TARGETS.items():
+        results[name] = time_command(command, args.runs)
+        modules, heavy = import_profile(command, args.top)
+        print(f"{name:<24} {results[name]:8.1f} ms  (+{results[name] - baseline:.1f} ms, heavy imports: {', '.join(heavy) or 'none'})")
+        for cumulative_ms, module in modules:
+            print(f"    {cumulative_ms:8.1f} ms  {module}")
+
+    if args.max_ms is not None and results['cli --help'] > args.max_ms:
+        print(f"Startup budget exceeded: {results['cli --help']:.1f} ms > {args.max_ms:.1f} ms")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
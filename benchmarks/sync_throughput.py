@@ -0,0 +1,90 @@
+"""
+Measure the throughput of a full sync against the local fake Strava server.
+
+Starts ``benchmarks/fake_strava.py`` in a background thread and runs
+``APIManager.run_sections`` into a fresh temporary data directory, so
+changes to the fetch pipeline can be compared without network or rate-limit
+quota. Each run reports the wall time, the requests served and the items
+processed per second from the metrics summary; ``--resync`` also times a
+second sync of the same data directory, which should only list activities.
+
+Usage:
+    python benchmarks/sync_throughput.py [--activities 500] [--sections activities,laps,kudos,comments] [--latency-ms 20] [--concurrency 10] [--runs 3]
+"""
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_strava import FakeStrava, parse_limits  # noqa: E402
+
+def run_sync(base_url, data_dir, sections, args):
+    from api_app.utils.api_manager import APIManager, options_from_sections
+
+    manager = APIManager('benchmark', base_url=base_url, data_dir=data_dir, concurrency=args.concurrency, storage_backend=args.storage,
+                         use_local_store=not args.no_local_store, write_behind=not args.no_write_behind, http_cache=False)
+    start = time.perf_counter()
+    try:
+        manager.run_sections(options_from_sections(sections))
+    finally:
+        manager.close()
+    return time.perf_counter() - start, manager.metrics.summary()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the throughput of a full sync against the local fake Strava server.")
+    parser.add_argument('--activities', type=int, default=500, help="Number of activities served")
+    parser.add_argument('--sections', default='activities,laps,kudos,comments', help="Comma-separated sections to sync")
+    parser.add_argument('--latency-ms', type=float, default=20, help="Delay added to every response")
+    parser.add_argument('--jitter-ms', type=float, default=10, help="Random extra delay, up to this value")
+    parser.add_argument('--error-rate', type=float, default=0, help="Share of requests answered with 500, 502 or 503")
+    parser.add_argument('--throttle-rate', type=float, default=0, help="Share of requests answered with 429")
+    parser.add_argument('--read-limits', type=parse_limits, default=(100000, 1000000), help="15-minute and daily read limits of the server")
+    parser.add_argument('--concurrency', type=int, default=10, help="Requests processed concurrently")
+    parser.add_argument('--storage', choices=['json', 'shards'], default='json', help="Storage backend")
+    parser.add_argument('--no-local-store', action='store_true', help="Do not write the SQLite store")
+    parser.add_argument('--no-write-behind', action='store_true', help="Write every file from its own thread")
+    parser.add_argument('--runs', type=int, default=3, help="Number of cold syncs")
+    parser.add_argument('--resync', action='store_true', help="Also time a second sync of the same data directory")
+    parser.add_argument('--verbose', action='store_true', help="Show the sync logs")
+    args = parser.parse_args()
+
+    sections = [section.strip() for section in args.sections.split(',') if section.strip()]
+    server = FakeStrava(activities=args.activities, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                        throttle_rate=args.throttle_rate, read_limits=args.read_limits)
+    base_url = server.start_in_thread()
+    import api_app.utils.api_manager  # noqa: F401 configures the root logger
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"Fake Strava API on {base_url}: {args.activities} activities, {args.latency_ms:g}+{args.jitter_ms:g} ms latency, sections {', '.join(sections)}")
+    timings = []
+    try:
+        for run in range(args.runs):
+            data_dir = tempfile.mkdtemp(prefix='strava_bench_')
+            try:
+                served = sum(server.requests.values())
+                elapsed, summary = run_sync(base_url, data_dir, sections, args)
+                timings.append(elapsed)
+                requests = sum(server.requests.values()) - served
+                print(f"run {run + 1}: {elapsed:7.2f} s  {requests:6d} requests  {requests / elapsed:8.1f} req/s  "
+                      f"{summary['items_per_second']:8.1f} items/s  items {summary['items']}")
+                if args.resync:
+                    served = sum(server.requests.values())
+                    elapsed, _ = run_sync(base_url, data_dir, sections, args)
+                    print(f"  resync: {elapsed:7.2f} s  {sum(server.requests.values()) - served:6d} requests")
+            finally:
+                shutil.rmtree(data_dir, ignore_errors=True)
+    finally:
+        server.stop_thread()
+
+    print(f"median {statistics.median(timings):.2f} s over {len(timings)} runs, server: {server.report()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fake_strava import FakeStrava  # noqa: E402
+from api_app.utils.base_api_client import BaseAPIClient  # noqa: E402
+from api_app.utils.client_context import ClientContext  # noqa: E402
+from api_app.utils.manifest import DataManifest  # noqa: E402
+from api_app.utils.retry_policy import RetryPolicy  # noqa: E402
+from api_app.utils.storage import JsonFileStorage  # noqa: E402
+
+# Large enough that no test waits for the rate limiter
+READ_LIMITS = (100000, 1000000)
+
+@pytest.fixture
+def fake_strava():
+    """
+    Start a local fake Strava server in a background thread.
+
+    :return: A function taking the server class and its options, returning the server and its base URL.
+    """
+    servers = []
+
+    def start(server_class=FakeStrava, **options):
+        server = server_class(read_limits=READ_LIMITS, **options)
+        servers.append(server)
+        return server, server.start_in_thread()
+
+    yield start
+    for server in servers:
+        server.stop_thread()
+
+@pytest.fixture
+def make_client(tmp_path):
+    """
+    Build an API client writing to a temporary data directory, with retries that do not wait.
+
+    :return: A function taking the client class and the context options, returning the client.
+    """
+    def make(client_class=BaseAPIClient, **context):
+        context.setdefault('manifest', DataManifest(JsonFileStorage(str(tmp_path))))
+        context.setdefault('retry_policy', RetryPolicy(max_attempts=2, base_delay=0))
+        return client_class('test-token', ClientContext(**context))
+
+    return make
+
+def run(client, coroutine):
+    """
+    Run a coroutine of a client on a fresh event loop and close its pooled session afterwards.
+
+    :param client: The API client.
+    :param coroutine: The coroutine to run.
+    :return: The coroutine result.
+    """
+    async def _run():
+        try:
+            return await coroutine
+        finally:
+            await client.transport.close_async()
+
+    return asyncio.run(_run())
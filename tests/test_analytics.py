@@ -0,0 +1,54 @@
+import pytest
+
+from api_app.utils.analytics import AnalyticsEngine, resample_1hz, mean_max, best_efforts, heart_rate_decoupling
+from api_app.utils.stream_store import StreamStore
+
+np = pytest.importorskip('numpy')
+
+def test_resample_interpolates_and_drops_missing_samples():
+    assert resample_1hz(np, [0, 2, 4], [0, 10, 20]).tolist() == [0, 5, 10, 15, 20]
+    assert resample_1hz(np, [0, 1, 2, 3], [100, float('nan'), -1, 400]).tolist() == [100, 200, 300, 400]
+    assert resample_1hz(np, [0, 1], [float('nan'), 100]).tolist() == [100]
+
+def test_resample_zeroes_long_gaps_only():
+    assert resample_1hz(np, [0, 1, 10, 11], [1, 1, 1, 1]).tolist() == [1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1]
+    assert resample_1hz(np, [0, 1, 10, 11], [1, 1, 1, 1], max_gap=9).tolist() == [1] * 12
+
+def test_mean_max_omits_windows_longer_than_the_series():
+    assert mean_max(np, np.array([1, 2, 3, 4, 5]), [1, 2, 5, 6]) == {1: 5.0, 2: 4.5, 5: 3.0}
+    assert mean_max(np, np.array([]), [1, 5]) == {}
+
+def test_best_efforts_over_known_splits():
+    timestamps = [0, 10, 20, 30, 40, 50]
+    distance = [0, 100, 250, 400, 500, 600]
+
+    assert best_efforts(np, timestamps, distance, {'300m': 300, '100m': 100, '1k': 1000}) == {'300m': 20.0, '100m': 10.0}
+    assert best_efforts(np, timestamps, [0, 100, float('nan'), 400, 500, 600], {'300m': 300}) == {'300m': 20.0}
+    assert best_efforts(np, [], [], {'300m': 300}) == {}
+
+def test_decoupling_of_constant_and_drifting_ratios():
+    timestamps = np.arange(1200)
+    heartrate = np.full(1200, 140)
+
+    assert heart_rate_decoupling(np, timestamps, heartrate, np.full(1200, 200)) == pytest.approx(0.0)
+    assert heart_rate_decoupling(np, timestamps, heartrate, np.repeat([200, 180], 600)) == pytest.approx(10.0)
+
+def test_decoupling_needs_ten_moving_minutes():
+    assert heart_rate_decoupling(np, np.arange(599), np.full(599, 140), np.full(599, 200)) is None
+    assert heart_rate_decoupling(np, np.arange(1200), np.full(1200, 140), np.full(1200, -1)) is None
+
+def test_activity_without_power(tmp_path):
+    store = StreamStore(str(tmp_path / 'streams'))
+    seconds = list(range(0, 1200, 2))
+    store.write(1, {
+        'time': {'data': seconds},
+        'heartrate': {'data': [140] * len(seconds)},
+        'watts': {'data': [None] * len(seconds)},
+        'distance': {'data': [second * 5.0 for second in seconds]}
+    })
+    store.write(2, {'heartrate': {'data': [140, 141]}})
+    engine = AnalyticsEngine(store, cache_path=str(tmp_path / 'analytics_cache.json'), durations=[1, 60], distances={'1k': 1000.0})
+
+    assert engine.analyze_activity(1) == {'power_curve': {}, 'pace_curve': {}, 'best_efforts': {'1k': 200.0}, 'hr_decoupling': None}
+    assert engine.analyze_activity(2) is None
+    assert engine.analyze_activity(3) is None
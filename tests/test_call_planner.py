@@ -0,0 +1,43 @@
+from conftest import run
+from api_app.utils.activities_api_client import ActivityAPIClient
+from api_app.utils.call_planner import CallPlanner
+from api_app.utils.endpoint_config import StravaEndpoints
+
+DETAIL = StravaEndpoints.ACTIVITIES
+LAPS = StravaEndpoints.ACTIVITIES_LAPS
+KUDOS = StravaEndpoints.ACTIVITIES_KUDOS
+COMMENTS = StravaEndpoints.ACTIVITIES_COMMENTS
+
+def names(endpoints):
+    return [endpoint.endpoint_name for endpoint in endpoints]
+
+def test_laps_are_derived_from_the_detailed_activity(make_client):
+    client = make_client(ActivityAPIClient)
+    planner = CallPlanner(client, [DETAIL, LAPS])
+
+    assert names(run(client, planner.plan({'id': 1}))) == ['detailed activity']
+    assert planner.derived_from(DETAIL) == [LAPS]
+
+def test_laps_are_requested_without_the_detailed_activity(make_client):
+    client = make_client(ActivityAPIClient)
+    planner = CallPlanner(client, [LAPS])
+
+    assert names(run(client, planner.plan({'id': 1}))) == ['laps']
+
+def test_zero_counts_are_saved_as_empty_lists_without_a_request(make_client):
+    client = make_client(ActivityAPIClient)
+    planner = CallPlanner(client, [KUDOS, COMMENTS])
+
+    planned = run(client, planner.plan({'id': 1, 'kudos_count': 0, 'comment_count': 2}))
+
+    assert names(planned) == ['comments']
+    assert client.load_json_from_file(KUDOS.filename_template(1), KUDOS.section) == []
+    assert planner.counts == {'requested': 1, 'derived': 0, 'empty': 1}
+
+def test_saved_empty_lists_are_not_written_again(make_client):
+    client = make_client(ActivityAPIClient)
+    planner = CallPlanner(client, [KUDOS])
+    run(client, planner.plan({'id': 1, 'kudos_count': 0}))
+
+    assert run(client, planner.plan({'id': 1, 'kudos_count': 0})) == []
+    assert planner.counts['empty'] == 1
@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from api_app.__main__ import build_parser, load_sync_config
+
+def load(tmp_path, config, *flags):
+    path = tmp_path / 'sync.json'
+    path.write_text(json.dumps(config))
+    parser = build_parser()
+    return load_sync_config(parser.parse_args(['sync', '--config', str(path), *flags]), parser)
+
+def test_flags_override_the_config_file(tmp_path):
+    config = load(tmp_path, {'sections': 'activities,kudos', 'concurrency': 4, 'since': '2024-01-01'}, '--sections', 'routes')
+
+    assert config == {'sections': ['routes'], 'concurrency': 4, 'since': 1704067200}
+
+def test_unknown_config_keys_are_rejected(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        load(tmp_path, {'sections': 'activities', 'concurency': 4})
+
+    assert exit_info.value.code == 2
+    assert 'Unknown keys in --config' in capsys.readouterr().err
+
+def test_unknown_sections_are_rejected(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        load(tmp_path, {}, '--sections', 'activities,bogus')
+
+    assert exit_info.value.code == 2
+    assert 'Invalid section: bogus' in capsys.readouterr().err
+
+@pytest.mark.parametrize('sections', [None, '', ' , '])
+def test_sync_needs_a_section(tmp_path, capsys, sections):
+    with pytest.raises(SystemExit) as exit_info:
+        load(tmp_path, {} if sections is None else {'sections': sections})
+
+    assert exit_info.value.code == 2
+    assert 'at least one section' in capsys.readouterr().err
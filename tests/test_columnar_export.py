@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+from api_app.utils.api_manager import APIManager, options_from_sections
+from api_app.utils.manifest import DataManifest
+from api_app.utils.storage import JsonFileStorage
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.parquet  # noqa: E402
+
+def test_sync_exports_the_activities(fake_strava, tmp_path):
+    server, base_url = fake_strava(activities=20)
+    data_dir = str(tmp_path)
+
+    manager = APIManager('test-token', base_url=base_url, data_dir=data_dir, http_cache=False, use_local_store=False, export_format='parquet')
+    try:
+        manager.run_sections(options_from_sections(['activities']))
+    finally:
+        manager.close()
+
+    table = pyarrow.parquet.read_table(os.path.join(data_dir, 'export', 'activities'), partitioning=None)
+    assert table.num_rows == 20
+    assert sorted(table.column('sport_type').to_pylist()) == sorted(server.activity_summary(activity_id)['sport_type'] for activity_id in server.activity_ids())
+    manifest = DataManifest(JsonFileStorage(data_dir), load=False)
+    manifest.scan()
+    assert not manifest.contains('export', 'export_state.json')
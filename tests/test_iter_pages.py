@@ -0,0 +1,58 @@
+import pytest
+from aiohttp import web
+
+from conftest import run
+from fake_strava import FakeStrava
+from api_app.utils.base_api_client import ListingIncompleteError
+from api_app.utils.activities_api_client import ActivityAPIClient
+
+class FailingPageStrava(FakeStrava):
+    """Fake server answering the second page of the activities listing with a 500."""
+    async def handle_activities(self, request: web.Request) -> web.Response:
+        if request.query.get('page') == '2':
+            return web.json_response({'message': 'Internal Server Error'}, status=500)
+        return await super().handle_activities(request)
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+def test_iter_pages_stops_at_the_first_empty_page(fake_strava, make_client):
+    _, base_url = fake_strava(activities=450)
+    client = make_client(base_url=base_url)
+
+    pages = run(client, collect(client.iter_pages(client.api_url('/athlete/activities'), 'activities')))
+
+    assert [len(page) for page in pages] == [200, 200, 50]
+
+def test_iter_pages_raises_when_a_page_fails(fake_strava, make_client):
+    _, base_url = fake_strava(FailingPageStrava, activities=450)
+    client = make_client(base_url=base_url)
+    pages = []
+
+    async def walk():
+        async for page in client.iter_pages(client.api_url('/athlete/activities'), 'activities'):
+            pages.append(page)
+
+    with pytest.raises(ListingIncompleteError) as error:
+        run(client, walk())
+
+    assert error.value.page == 2
+    assert [len(page) for page in pages] == [200]
+
+def test_listing_is_complete_only_after_the_last_page(fake_strava, make_client):
+    _, base_url = fake_strava(activities=250)
+    client = make_client(ActivityAPIClient, base_url=base_url)
+
+    listed = run(client, collect(client.iter_listed_activities()))
+
+    assert len(listed) == 250
+    assert client.listing_complete
+
+def test_failed_listing_is_incomplete(fake_strava, make_client):
+    _, base_url = fake_strava(FailingPageStrava, activities=250)
+    client = make_client(ActivityAPIClient, base_url=base_url)
+
+    with pytest.raises(ListingIncompleteError):
+        run(client, collect(client.iter_listed_activities()))
+
+    assert not client.listing_complete
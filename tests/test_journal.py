@@ -0,0 +1,43 @@
+from conftest import run
+from api_app.utils.activities_api_client import ActivityAPIClient
+from api_app.utils.batch_engine import EndpointBatchEngine
+from api_app.utils.endpoint_config import StravaEndpoints
+from api_app.utils.journal import SyncJournal, JOURNAL_FILENAME
+
+KUDOS = StravaEndpoints.ACTIVITIES_KUDOS
+KUDOS_ROUTE = '/api/v3/activities/{activity_id}/{kind}'
+
+def test_transitions_are_buffered_until_flushed(tmp_path):
+    journal = SyncJournal(str(tmp_path / JOURNAL_FILENAME), batch_size=100, flush_interval=3600)
+    journal.queue('kudos', [1, 2])
+    journal.start('kudos', 1)
+
+    assert SyncJournal(str(tmp_path / JOURNAL_FILENAME)).pending() == []
+    assert journal.flush() == 2
+    assert sorted(journal.pending()) == [('kudos', 1), ('kudos', 2)]
+
+def test_resume_requeues_only_unfinished_items(fake_strava, make_client, tmp_path):
+    server, base_url = fake_strava(activities=6)
+    activity_ids = server.activity_ids()
+    path = str(tmp_path / JOURNAL_FILENAME)
+
+    journal = SyncJournal(path)
+    client = make_client(ActivityAPIClient, base_url=base_url, journal=journal)
+    journal.queue(KUDOS.endpoint_name, activity_ids)
+    run(client, EndpointBatchEngine(client).run(activity_ids[:3], KUDOS))
+    journal.start(KUDOS.endpoint_name, activity_ids[3])
+    # The run is interrupted with three items done, one in flight and two queued
+    journal.close()
+    assert server.requests[KUDOS_ROUTE] == 3
+
+    journal = SyncJournal(path)
+    client = make_client(ActivityAPIClient, base_url=base_url, journal=journal)
+    assert sorted(item_id for _, item_id in journal.pending()) == activity_ids[3:]
+    stats = run(client, client.resume_journal())
+
+    assert stats.fetched == 3
+    assert server.requests[KUDOS_ROUTE] == 6
+    assert journal.pending() == []
+    assert journal.counts() == {'done': 6}
+    for activity_id in activity_ids:
+        assert client.load_json_from_file(KUDOS.filename_template(activity_id), KUDOS.section) == server.activity_kudos(activity_id)
@@ -0,0 +1,39 @@
+import time
+
+import pytest
+
+from api_app.utils.rate_limiter import RateLimiter, DAILY_WINDOW_SECONDS
+
+def headers(short_usage, daily_usage):
+    return {'x-readratelimit-limit': '100,1000', 'x-readratelimit-usage': f'{short_usage},{daily_usage}'}
+
+def test_429_in_the_short_window_marks_the_short_window():
+    limiter = RateLimiter()
+    limiter.mark_exhausted(headers(100, 400))
+
+    assert limiter.short_usage == 100
+    assert limiter.daily_usage == 0
+    assert limiter.remaining() == 0
+
+def test_429_in_the_daily_window_marks_the_daily_window():
+    limiter = RateLimiter()
+    limiter.mark_exhausted(headers(30, 1000))
+
+    assert limiter.short_usage == 0
+    assert limiter.daily_usage == 1000
+    assert abs(limiter.seconds_until_reset() - (DAILY_WINDOW_SECONDS - time.time() % DAILY_WINDOW_SECONDS)) < 1
+    assert limiter.try_acquire() > 0
+
+def test_429_without_headers_marks_the_short_window():
+    limiter = RateLimiter()
+    limiter.mark_exhausted()
+
+    assert (limiter.short_usage, limiter.daily_usage) == (100, 0)
+
+def test_explicit_window():
+    limiter = RateLimiter()
+    limiter.mark_exhausted(headers(0, 0), window='daily')
+
+    assert (limiter.short_usage, limiter.daily_usage) == (0, 1000)
+    with pytest.raises(ValueError):
+        limiter.mark_exhausted(window='hourly')
@@ -0,0 +1,45 @@
+import asyncio
+
+from conftest import run
+from api_app.utils.response_cache import ResponseCache
+
+def collect(client, path):
+    async def pages():
+        return [item async for page in client.iter_pages(client.api_url(path), 'clubs') for item in page]
+    return run(client, pages())
+
+def test_fresh_responses_are_served_and_listings_revalidated(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'http_cache.db'))
+    cache.store('https://example.test/api/v3/athlete', None, {'id': 1}, {'ETag': '"a"'})
+    cache.store('https://example.test/api/v3/athlete/clubs', {'page': 1}, [{'id': 2}], {'ETag': '"b"'})
+
+    assert cache.lookup('https://example.test/api/v3/athlete') == ({'id': 1}, {})
+    assert cache.lookup('https://example.test/api/v3/athlete/clubs', {'page': 1}) == (None, {'If-None-Match': '"b"'})
+    assert cache.lookup('https://example.test/api/v3/athlete/activities') == (None, {})
+
+def test_async_writes_persist(tmp_path):
+    path = str(tmp_path / 'http_cache.db')
+    cache = ResponseCache(path)
+
+    async def write():
+        await cache.store_async('https://example.test/api/v3/athlete/clubs', None, [{'id': 2}], {'ETag': '"b"'})
+        await cache.store_async('https://example.test/api/v3/athlete/activities', None, [{'id': 3}], {'ETag': '"c"'})
+        return await cache.revalidated_async('https://example.test/api/v3/athlete/clubs')
+
+    assert asyncio.run(write()) == [{'id': 2}]
+    cache.close()
+    reloaded = ResponseCache(path)
+    assert reloaded.revalidated('https://example.test/api/v3/athlete/clubs') == [{'id': 2}]
+    assert reloaded.revalidated('https://example.test/api/v3/athlete/activities') is None
+
+def test_listings_pick_up_new_items(fake_strava, make_client, tmp_path):
+    server, base_url = fake_strava(clubs=3)
+    cache = ResponseCache(str(tmp_path / 'http_cache.db'))
+
+    assert len(collect(make_client(base_url=base_url, response_cache=cache), '/athlete/clubs')) == 3
+    server.clubs = 4
+    assert len(collect(make_client(base_url=base_url, response_cache=cache), '/athlete/clubs')) == 4
+    not_modified = server.statuses[304]
+    assert len(collect(make_client(base_url=base_url, response_cache=cache), '/athlete/clubs')) == 4
+    # The full page and the empty last page are both answered with 304
+    assert server.statuses[304] == not_modified + 2
@@ -0,0 +1,69 @@
+from aiohttp import web
+
+from conftest import run
+from fake_strava import FakeStrava
+from api_app.utils.activities_api_client import ActivityAPIClient
+from api_app.utils.endpoint_config import StravaEndpoints
+from api_app.utils.retry_policy import RetryPolicy, DeadLetterQueue
+
+class FailingKudosStrava(FakeStrava):
+    """Fake server answering every kudos request with a 503 while ``failing`` is set."""
+    failing = True
+
+    async def handle_activity(self, request: web.Request) -> web.Response:
+        if self.failing and request.match_info.get('kind') == 'kudos':
+            return web.json_response({'message': 'Service Unavailable'}, status=503)
+        return await super().handle_activity(request)
+
+def test_transient_failures_are_retried_until_the_last_attempt():
+    policy = RetryPolicy(max_attempts=3)
+
+    assert policy.should_retry(0, 503)
+    assert policy.should_retry(1, None)
+    assert not policy.should_retry(2, 503)
+    assert not policy.should_retry(0, 404)
+
+def test_delay_follows_retry_after_or_backs_off():
+    policy = RetryPolicy(base_delay=1, max_delay=4)
+
+    assert policy.delay(0, 429, {'Retry-After': '12'}) == 12
+    assert policy.delay(0, 429, {'Retry-After': 'soon'}) == 0
+    assert all(0 <= policy.delay(attempt, 503) <= 4 for attempt in range(10))
+
+def test_dead_letters_persist(tmp_path):
+    dead_letters = DeadLetterQueue(str(tmp_path))
+    dead_letters.add('https://example.test/a', 'activities', '503', 5, item_id=1, endpoint='kudos')
+    dead_letters.add('https://example.test/b', 'activities', '503', 5)
+    dead_letters.save()
+
+    reloaded = DeadLetterQueue(str(tmp_path))
+    assert len(reloaded) == 2
+    assert reloaded.endpoint_names() == {'kudos'}
+    assert [entry['item_id'] for entry in reloaded.pop_endpoint_items()] == [1]
+    assert len(reloaded) == 1
+
+def test_failed_items_are_requeued_from_the_dead_letters(fake_strava, make_client):
+    server, base_url = fake_strava(FailingKudosStrava, activities=5)
+    client = make_client(ActivityAPIClient, base_url=base_url)
+    activity_id = server.activity_ids()[0]
+    endpoint = StravaEndpoints.ACTIVITIES_KUDOS
+
+    assert run(client, client.process_endpoint(activity_id, endpoint)) is None
+    assert client.dead_letters.endpoint_names() == {'kudos'}
+
+    server.failing = False
+    stats = run(client, client.retry_dead_letters())
+
+    assert stats.fetched == 1
+    assert len(client.dead_letters) == 0
+    assert client.load_json_from_file(endpoint.filename_template(activity_id), endpoint.section) == server.activity_kudos(activity_id)
+
+def test_items_failing_again_return_to_the_dead_letters(fake_strava, make_client):
+    server, base_url = fake_strava(FailingKudosStrava, activities=5)
+    client = make_client(ActivityAPIClient, base_url=base_url)
+    run(client, client.process_endpoint(server.activity_ids()[0], StravaEndpoints.ACTIVITIES_KUDOS))
+
+    stats = run(client, client.retry_dead_letters())
+
+    assert stats.not_fetched == 1
+    assert client.dead_letters.endpoint_names() == {'kudos'}
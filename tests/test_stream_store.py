@@ -0,0 +1,93 @@
+import os
+import threading
+
+import pytest
+
+from api_app.utils.stream_store import StreamStore, ALIGNMENT, DIRECTORY_ENTRY, HEADER
+
+np = pytest.importorskip('numpy')
+
+STREAMS = {
+    'time': {'data': [0, 1, 2, 5, 6]},
+    'heartrate': {'data': [120, None, 131, 140, 150]},
+    'latlng': {'data': [[41.38, 2.17], [41.39, 2.18], None, [41.40, 2.19], [41.41, 2.20]]},
+    'altitude': {'data': [10.5, 11.0, None, 12.25, 13.0]},
+    'moving': {'data': [False, True, True, True, False]},
+    'power_meter': {'data': [1, 2, 3, 4, 5]}
+}
+
+def test_streams_read_back_with_their_dtype_and_length(tmp_path):
+    store = StreamStore(str(tmp_path))
+    size = store.write(7, STREAMS)
+
+    streams = store.read(7)
+
+    assert os.path.getsize(store.path_for(7)) == size
+    assert set(streams) == {'time', 'heartrate', 'latlng', 'altitude', 'moving'}
+    assert isinstance(streams['time'], np.memmap)
+    assert streams['time'].dtype == np.dtype('<u4') and streams['time'].tolist() == [0, 1, 2, 5, 6]
+    assert streams['heartrate'].dtype == np.dtype('<i2') and streams['heartrate'].tolist() == [120, -1, 131, 140, 150]
+    assert streams['latlng'].shape == (5, 2)
+    assert np.isnan(streams['latlng'][2]).all()
+    assert streams['latlng'][4].tolist() == pytest.approx([41.41, 2.20])
+    assert streams['altitude'].dtype == np.dtype('<f4') and np.isnan(streams['altitude'][2])
+    assert streams['moving'].tolist() == [0, 1, 1, 1, 0]
+
+def test_arrays_are_aligned(tmp_path):
+    store = StreamStore(str(tmp_path))
+    store.write(7, STREAMS)
+
+    with open(store.path_for(7), 'rb') as file:
+        data = file.read()
+    _, _, count, max_length = HEADER.unpack_from(data, 0)
+    offsets = [DIRECTORY_ENTRY.unpack_from(data, HEADER.size + index * DIRECTORY_ENTRY.size)[5] for index in range(count)]
+
+    assert (count, max_length) == (5, 5)
+    assert all(offset % ALIGNMENT == 0 for offset in offsets)
+
+def test_read_a_subset_of_streams(tmp_path):
+    store = StreamStore(str(tmp_path))
+    store.write(7, STREAMS)
+
+    streams = store.read(7, ['time', 'watts'])
+
+    assert list(streams) == ['time']
+
+def test_missing_activity_and_contains(tmp_path):
+    store = StreamStore(str(tmp_path))
+    store.write(7, [dict(stream, type=name) for name, stream in STREAMS.items()])
+
+    assert store.contains(7)
+    assert not store.contains(8)
+    assert store.read(8) is None
+    assert StreamStore(str(tmp_path)).ids() == [7]
+
+def test_invalid_file_is_rejected(tmp_path):
+    store = StreamStore(str(tmp_path))
+    store.write(7, STREAMS)
+    with open(store.path_for(7), 'r+b') as file:
+        file.write(b'JUNK')
+
+    with pytest.raises(ValueError):
+        store.read(7)
+
+def test_concurrent_writes_of_one_activity(tmp_path):
+    store = StreamStore(str(tmp_path))
+    errors = []
+
+    def write():
+        try:
+            for _ in range(20):
+                store.write(7, STREAMS)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert os.listdir(store.streams_dir) == ['activity_7.strm']
+    assert store.read(7)['time'].tolist() == [0, 1, 2, 5, 6]
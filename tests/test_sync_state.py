@@ -0,0 +1,93 @@
+import json
+import os
+
+from aiohttp import web
+
+from fake_strava import FakeStrava
+from api_app.utils.api_manager import APIManager, options_from_sections
+from api_app.utils.sync_state import SyncState, SYNC_STATE_FILENAME
+
+class FlakyStrava(FakeStrava):
+    """Fake server failing the second activities page while ``failing_listing`` is set, and the kudos of one activity while ``failing_kudos`` is set."""
+    failing_listing = True
+    failing_kudos = True
+
+    async def handle_activities(self, request: web.Request) -> web.Response:
+        if self.failing_listing and request.query.get('page') == '2':
+            return web.json_response({'message': 'Internal Server Error'}, status=500)
+        return await super().handle_activities(request)
+
+    @property
+    def failing_kudos_id(self) -> int:
+        # Kudos of activities without kudos are saved without a request
+        return next(activity_id for activity_id in self.activity_ids() if self.activity_summary(activity_id)['kudos_count'])
+
+    async def handle_activity(self, request: web.Request) -> web.Response:
+        if self.failing_kudos and request.match_info.get('kind') == 'kudos' and int(request.match_info['activity_id']) == self.failing_kudos_id:
+            return web.json_response({'message': 'Internal Server Error'}, status=500)
+        return await super().handle_activity(request)
+
+def sync(base_url, data_dir, sections):
+    manager = APIManager('test-token', base_url=base_url, data_dir=data_dir, http_cache=False, use_local_store=False)
+    manager.context.retry_policy.base_delay = 0
+    try:
+        manager.run_sections(options_from_sections(sections))
+    finally:
+        manager.close()
+    return manager
+
+def load_state(data_dir):
+    return SyncState(os.path.join(data_dir, SYNC_STATE_FILENAME))
+
+def test_update_only_moves_the_mark_forward(tmp_path):
+    state = SyncState(str(tmp_path / SYNC_STATE_FILENAME))
+    state.update(1, 'activities', '2024-05-02T07:00:00Z')
+    state.update(1, 'activities', '2024-05-01T07:00:00Z')
+    state.update(1, 'activities', None)
+
+    assert state.get_high_water_mark(1, 'activities') == '2024-05-02T07:00:00Z'
+
+def test_get_after_uses_the_oldest_mark(tmp_path):
+    state = SyncState(str(tmp_path / SYNC_STATE_FILENAME))
+    state.update(1, 'activities', '2024-05-02T00:00:00Z')
+    state.update(1, 'laps', '2024-05-01T00:00:00Z')
+
+    assert state.get_after(1, ['activities', 'laps'], lookback_seconds=3600) == 1714518000
+    assert state.get_after(1, ['activities', 'kudos']) is None
+
+def test_save_is_atomic_and_reloads(tmp_path):
+    path = str(tmp_path / SYNC_STATE_FILENAME)
+    state = SyncState(path)
+    state.update(1, 'activities', '2024-05-02T07:00:00Z')
+    state.save()
+
+    assert os.listdir(tmp_path) == [SYNC_STATE_FILENAME]
+    assert SyncState(path).get_high_water_mark(1, 'activities') == '2024-05-02T07:00:00Z'
+
+def test_incomplete_listing_does_not_advance_the_mark(fake_strava, tmp_path):
+    server, base_url = fake_strava(FlakyStrava, activities=450)
+    data_dir = str(tmp_path)
+
+    manager = sync(base_url, data_dir, ['activities'])
+    assert not manager.activity_client.listing_complete
+    assert load_state(data_dir).get_high_water_mark(server.athlete_id, 'listing') is None
+
+    server.failing_listing = False
+    manager = sync(base_url, data_dir, ['activities'])
+    assert manager.activity_client.listing_complete
+    with open(os.path.join(data_dir, 'activities', 'athlete_activities_data.json')) as file:
+        listed = json.load(file)
+    assert len(listed) == 450
+    assert load_state(data_dir).get_high_water_mark(server.athlete_id, 'listing') == max(summary['start_date'] for summary in listed)
+
+def test_failed_items_do_not_advance_their_section(fake_strava, tmp_path):
+    server, base_url = fake_strava(FlakyStrava, activities=150)
+    server.failing_listing = False
+    data_dir = str(tmp_path)
+
+    manager = sync(base_url, data_dir, ['activities', 'kudos'])
+    state = load_state(data_dir)
+
+    assert manager.activity_client.listing_complete
+    assert state.get_high_water_mark(server.athlete_id, 'activities') is not None
+    assert state.get_high_water_mark(server.athlete_id, 'kudos') is None
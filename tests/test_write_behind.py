@@ -0,0 +1,45 @@
+import asyncio
+import threading
+
+from api_app.utils.manifest import DataManifest
+from api_app.utils.storage import JsonFileStorage
+from api_app.utils.write_behind import WriteBehindWriter
+
+class GatedStorage(JsonFileStorage):
+    """Storage whose batch writes wait until ``gate`` is set, like a disk falling behind."""
+    def __init__(self, data_dir):
+        super().__init__(data_dir)
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def write_many(self, records):
+        self.started.set()
+        self.gate.wait(5)
+        return super().write_many(records)
+
+def test_submit_waits_while_the_queue_is_full(tmp_path):
+    storage = GatedStorage(str(tmp_path))
+    writer = WriteBehindWriter(storage, DataManifest(storage), max_pending=2, batch_size=1)
+
+    async def scenario():
+        await writer.submit('activities', 'record_0.json', {'id': 0})
+        await asyncio.to_thread(storage.started.wait, 5)
+        for index in (1, 2):
+            await writer.submit('activities', f'record_{index}.json', {'id': index})
+
+        blocked = asyncio.ensure_future(writer.submit('activities', 'record_3.json', {'id': 3}))
+        await asyncio.sleep(0.2)
+        assert not blocked.done()
+        assert writer.counts['waits'] == 1
+
+        storage.gate.set()
+        await asyncio.wait_for(blocked, 5)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        storage.gate.set()
+        writer.close()
+
+    assert writer.counts['written'] == 4
+    assert [storage.read('activities', f'record_{index}.json') for index in range(4)] == [{'id': index} for index in range(4)]
@@ -0,0 +1,51 @@
+import pytest
+
+from api_app.utils.api_manager import APIManager, options_from_sections
+from api_app.utils.zones import ZoneEngine
+
+np = pytest.importorskip('numpy')
+
+ATHLETE_ZONES = {'heart_rate': {'custom_zones': False, 'zones': [{'min': 0, 'max': 150}, {'min': 150, 'max': -1}]}}
+
+def test_zones_and_streams_fetch_each_stream_once(fake_strava, tmp_path):
+    server, base_url = fake_strava(activities=30)
+
+    manager = APIManager('test-token', base_url=base_url, data_dir=str(tmp_path), http_cache=False, use_local_store=False, athlete_zones=ATHLETE_ZONES)
+    try:
+        manager.run_sections(options_from_sections(['activities', 'zones', 'streams']))
+    finally:
+        manager.close()
+
+    assert server.requests['/api/v3/activities/{activity_id}/{kind}'] == 30
+    assert manager.stream_store.ids() == server.activity_ids()
+    assert len(manager.dead_letters) == 0
+
+HEART_RATE_ZONES = [{'min': 0, 'max': 120}, {'min': 120, 'max': 150}, {'min': 150, 'max': -1}]
+POWER_ZONES = [{'min': 0, 'max': 200}, {'min': 200, 'max': 300}]
+
+def test_time_in_zones_by_hand():
+    engine = ZoneEngine({'heart_rate': {'custom_zones': True, 'zones': HEART_RATE_ZONES}, 'power': {'zones': POWER_ZONES}})
+    streams = {
+        # The 16 s pause after t=4 is longer than max_gap, so the sample before it does not count
+        'time': np.array([0, 1, 2, 3, 4, 20, 21, 22]),
+        # 120 and 150 are exactly on a boundary and belong to the upper zone, 200 is above every bounded zone, -1 is missing
+        'heartrate': np.array([100, 120, 150, 200, 119, 130, -1, 90]),
+        'watts': np.array([150, 200, 350, 199, 500, 300, 250, 0])
+    }
+
+    zones = engine.compute(streams)
+
+    assert zones == [
+        {'type': 'heartrate', 'sensor_based': True, 'custom_zones': True, 'resource_state': 3, 'distribution_buckets': [
+            {'min': 0, 'max': 120, 'time': 1.0}, {'min': 120, 'max': 150, 'time': 2.0}, {'min': 150, 'max': -1, 'time': 2.0}]},
+        {'type': 'power', 'sensor_based': True, 'custom_zones': False, 'resource_state': 3, 'distribution_buckets': [
+            {'min': 0, 'max': 200, 'time': 2.0}, {'min': 200, 'max': 300, 'time': 4.0}]}
+    ]
+
+def test_zones_without_streams():
+    engine = ZoneEngine({'heart_rate': {'zones': HEART_RATE_ZONES}})
+
+    assert engine.compute(None) is None
+    assert engine.compute({}) == []
+    assert engine.compute({'time': np.array([0, 1, 2])}) == []
+    assert engine.compute({'time': np.array([0]), 'heartrate': np.array([130])})[0]['distribution_buckets'][1]['time'] == 0.0